@@ -0,0 +1,551 @@
+"""Concurrent Kindle Notebook scraper built on the async Playwright API."""
+
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import AsyncIterator, Generator, Optional
+from playwright.async_api import async_playwright, BrowserContext, Page
+
+from .scraper import (
+    ANNOTATED_SELECTORS,
+    BOOK_LOAD_TIMEOUT,
+    BOOK_SELECTORS,
+    COUNT_SELECTORS,
+    EXTRACTION_MODES,
+    HIGHLIGHT_SELECTORS,
+    MAX_HIGHLIGHTS_CHECKED,
+    NOTEBOOK_LIBRARY_SELECTOR,
+    TIME_SELECTORS,
+    TITLE_SELECTORS,
+    capture_first_highlight_steps,
+    detect_layout_steps,
+    extract_first_highlight_steps,
+    filter_route,
+    first_highlight_from_payload,
+    is_signin_url,
+    load_full_library_steps,
+)
+from .browser import REQUEST_FILTER_PATTERN, has_session, open_session_async
+from .extract import (
+    ANNOTATIONS_JS,
+    BOOK_FINGERPRINT_JS,
+    LIBRARY_JS,
+    annotations_args,
+    fingerprint_args,
+    library_args,
+)
+from .fingerprints import BookFingerprints
+from .metrics import Metrics, get_metrics
+from .selector_cache import SelectorCache
+from .utils import (
+    get_auth_path,
+    get_book_notebook_url,
+    get_kindle_notebook_url,
+    utc_now,
+)
+
+
+DEFAULT_CONCURRENCY = 4
+
+
+async def run_steps(steps: Generator):
+    """Drive a scraper *_steps generator with the async Playwright API.
+
+    Async form of scraper.run_steps: each yielded call is awaited and its
+    value (or exception) is handed back to the generator.
+    """
+    try:
+        call = next(steps)
+        while True:
+            try:
+                value = await call
+            except Exception as e:
+                call = steps.throw(e)
+            else:
+                call = steps.send(value)
+    except StopIteration as done:
+        return done.value
+
+
+async def install_request_filter(context: BrowserContext) -> None:
+    """Abort every request that should_block_request rejects."""
+    await context.route(REQUEST_FILTER_PATTERN, filter_route)
+
+
+async def detect_layout(page: Page) -> str:
+    """Name the notebook layout on the page (see scraper.LAYOUT_MARKERS)."""
+    return await run_steps(detect_layout_steps(page))
+
+
+async def load_full_library(
+    page: Page,
+    book_selectors: list[str],
+    limit: Optional[int] = None,
+) -> int:
+    """Scroll the library sidebar until every book (or `limit` books) is listed.
+
+    Async form of scraper.load_full_library.
+    """
+    return await run_steps(load_full_library_steps(page, book_selectors, limit))
+
+
+async def list_books(
+    page: Page,
+    extraction: str = "dom",
+    cache: Optional[SelectorCache] = None,
+    limit: Optional[int] = None,
+) -> list[dict]:
+    """Read the book list from the notebook library sidebar.
+
+    The sidebar is scrolled first, so books beyond its first batch are
+    listed too.
+
+    Args:
+        page: Page showing the notebook library
+        extraction: 'evaluate' reads the whole sidebar in one in-page script
+        cache: Selector cache to order the book and title chains by
+        limit: Stop scrolling once this many books are listed (None for all)
+
+    Returns:
+        List of {"asin", "title", "annotated", "count"} dictionaries in
+        sidebar order. Books without an ASIN cannot be opened directly and
+        are skipped.
+    """
+    cache = cache or SelectorCache("", "")
+    if extraction in ("evaluate", "capture"):
+        book_selectors = cache.ranked("book", BOOK_SELECTORS)
+        await load_full_library(page, book_selectors, limit)
+        entries = await page.evaluate(
+            LIBRARY_JS,
+            library_args(
+                book_selectors,
+                cache.ranked("title", TITLE_SELECTORS),
+                ANNOTATED_SELECTORS,
+                COUNT_SELECTORS,
+            ),
+        )
+        print(f"Found {len(entries)} books")
+        return [entry for entry in entries if entry["title"] and entry["asin"]]
+
+    books = []
+    book_selectors = cache.order("book", BOOK_SELECTORS)
+    await load_full_library(page, book_selectors, limit)
+    for selector in book_selectors:
+        books = await page.query_selector_all(selector)
+        cache.record("book", selector, bool(books))
+        if books:
+            print(f"Found {len(books)} books using selector: {selector}")
+            break
+
+    library = []
+    for book_el in books:
+        asin = await book_el.get_attribute("data-asin") or await book_el.get_attribute("id")
+
+        title = None
+        for sel in cache.order("title", TITLE_SELECTORS):
+            title_el = await book_el.query_selector(sel)
+            if title_el:
+                title = (await title_el.inner_text()).strip()
+            cache.record("title", sel, bool(title))
+            if title:
+                break
+
+        if not title:
+            continue
+
+        if not asin:
+            print(f"Skipping book without ASIN: {title[:50]}")
+            continue
+
+        fields = await book_el.evaluate(
+            BOOK_FINGERPRINT_JS, fingerprint_args(ANNOTATED_SELECTORS, COUNT_SELECTORS)
+        )
+        library.append({"asin": asin, "title": title, **fields})
+
+    return library
+
+
+async def capture_first_highlight(
+    context: BrowserContext,
+    region: str,
+    book: dict,
+    fetched_at: str,
+) -> Optional[dict]:
+    """Fetch a book's annotations response directly and parse it."""
+    return await run_steps(capture_first_highlight_steps(
+        context, region, book["asin"], book["title"], fetched_at
+    ))
+
+
+async def scrape_book(
+    page: Page,
+    region: str,
+    book: dict,
+    fetched_at: str,
+    timer: Optional[Metrics] = None,
+    extraction: str = "dom",
+    cache: Optional[SelectorCache] = None,
+) -> Optional[dict]:
+    """Open one book's notebook view and extract its first highlight.
+
+    Args:
+        page: Page to load the book in
+        region: Amazon region ('com' or 'co.uk')
+        book: Book dictionary from list_books
+        fetched_at: Timestamp to stamp on the highlight
+        timer: Metrics to record open/extract time in (defaults to get_metrics())
+        extraction: 'dom', 'evaluate' (one in-page script per book) or
+            'capture' (parse the annotations response, DOM as fallback)
+        cache: Selector cache to order the highlight and time chains by
+
+    Returns:
+        Highlight dictionary, or None if the book has no usable highlight
+
+    Raises:
+        RuntimeError: If the book's highlights never rendered
+    """
+    timer = timer or get_metrics()
+    cache = cache or SelectorCache("", "")
+    timer.incr("books_visited")
+    url = get_book_notebook_url(region, book["asin"])
+
+    if extraction == "capture":
+        with timer.phase("capture"):
+            highlight = await capture_first_highlight(page.context, region, book, fetched_at)
+        if highlight:
+            return highlight
+        print("Falling back to the rendered page...")
+        extraction = "dom"
+
+    with timer.phase("open_book"):
+        await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        try:
+            await page.wait_for_selector(
+                ", ".join(HIGHLIGHT_SELECTORS), timeout=BOOK_LOAD_TIMEOUT
+            )
+        except Exception as e:
+            # Not the same as a book without highlights: it must not be
+            # marked as read.
+            raise RuntimeError(f"No highlights rendered for: {book['title'][:50]}") from e
+
+    with timer.phase("extract"):
+        if extraction == "evaluate":
+            payload = await page.evaluate(
+                ANNOTATIONS_JS,
+                annotations_args(
+                    cache.ranked("highlight", HIGHLIGHT_SELECTORS),
+                    cache.ranked("time", TIME_SELECTORS),
+                    MAX_HIGHLIGHTS_CHECKED,
+                ),
+            )
+            return first_highlight_from_payload(payload, book["title"], fetched_at)
+        return await extract_first_highlight(page, book["title"], fetched_at, cache)
+
+
+async def extract_first_highlight(
+    page: Page,
+    book_title: str,
+    fetched_at: str,
+    cache: Optional[SelectorCache] = None,
+) -> Optional[dict]:
+    """Extract the first usable highlight from the open book's annotations."""
+    return await run_steps(extract_first_highlight_steps(page, book_title, fetched_at, cache))
+
+
+async def iter_context(
+    context: BrowserContext,
+    region: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_books: Optional[int] = None,
+    timer: Optional[Metrics] = None,
+    extraction: str = "dom",
+    fingerprints: Optional[BookFingerprints] = None,
+) -> AsyncIterator[tuple[int, dict]]:
+    """Scrape with a pool of pages, yielding each highlight as its book finishes.
+
+    At most `concurrency` finished highlights wait to be consumed; beyond
+    that the pages hold off on the next book until the consumer catches up.
+    With fingerprints, only books whose sidebar fingerprint changed since
+    they were last read are opened (see app/fingerprints.py).
+
+    Args:
+        context: Browser context holding the Amazon session
+        region: Amazon region ('com' or 'co.uk')
+        concurrency: Number of pages loading books at the same time
+        max_books: Maximum number of books to visit (None for all)
+        timer: Metrics to record timings in (defaults to get_metrics()). Per-book
+            phases are summed across pages, so they can exceed wall time.
+        extraction: 'dom' or 'evaluate' (one in-page script per view)
+        fingerprints: Skip books whose sidebar fingerprint is unchanged and
+            mark the ones read (optional; every book is opened without).
+            Not saved here: save it once the highlights are stored
+
+    Yields:
+        (library index, highlight) pairs in the order the books finish;
+        books without a usable highlight are skipped
+    """
+    fetched_at = utc_now()
+    notebook_url = get_kindle_notebook_url(region)
+    timer = timer or get_metrics()
+
+    cache: Optional[SelectorCache] = None
+    pages = [await context.new_page()]
+    page = pages[0]
+    try:
+        print(f"Navigating to {notebook_url}...")
+        with timer.phase("navigate"):
+            await page.goto(notebook_url, wait_until="domcontentloaded", timeout=60000)
+
+        if is_signin_url(page.url):
+            raise RuntimeError(
+                "Auth session expired. Please regenerate auth.json by running "
+                "the login script locally."
+            )
+
+        with timer.phase("library"):
+            try:
+                await page.wait_for_selector(NOTEBOOK_LIBRARY_SELECTOR, timeout=30000)
+            except Exception:
+                print("Warning: Could not find notebook library selector, continuing anyway...")
+
+            cache = SelectorCache.load(region, await detect_layout(page))
+            fingerprints = fingerprints or BookFingerprints(region)
+            library = await list_books(
+                page, extraction, cache, max_books if fingerprints.opens_every_book() else None
+            )
+            books = fingerprints.select(library)[:max_books]
+        print(f"Scraping {len(books)} books with up to {concurrency} pages...")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for i, book in enumerate(books):
+            queue.put_nowait((i, book))
+
+        results: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency))
+
+        async def worker(worker_page: Page) -> None:
+            while True:
+                try:
+                    i, book = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                print(f"Processing book: {book['title'][:50]}...")
+                try:
+                    highlight = await scrape_book(
+                        worker_page, region, book, fetched_at, timer, extraction, cache
+                    )
+                except Exception as e:
+                    print(f"Error processing book {i}: {e}")
+                    continue
+                if highlight:
+                    await results.put((i, highlight, book))
+                else:
+                    fingerprints.mark(book)
+
+        async def run_workers() -> None:
+            # Workers catch their own errors, so the end marker is always sent
+            # unless the consumer cancels this task.
+            with timer.phase("books"):
+                await asyncio.gather(*(worker(worker_page) for worker_page in pages))
+            await results.put(None)
+
+        for _ in range(min(concurrency, len(books)) - 1):
+            pages.append(await context.new_page())
+
+        workers = asyncio.create_task(run_workers())
+        try:
+            while (item := await results.get()) is not None:
+                i, highlight, book = item
+                yield i, highlight
+                fingerprints.mark(book)
+            await workers
+        finally:
+            if not workers.done():
+                workers.cancel()
+                with suppress(asyncio.CancelledError):
+                    await workers
+    finally:
+        for worker_page in pages:
+            await worker_page.close()
+        if cache is not None:
+            cache.report(timer)
+            cache.save()
+            fingerprints.report(timer)
+
+
+async def scrape_context(
+    context: BrowserContext,
+    region: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_books: Optional[int] = None,
+    timer: Optional[Metrics] = None,
+    extraction: str = "dom",
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Scrape highlights using a pool of pages in an authenticated context.
+
+    Takes the same arguments as iter_context.
+
+    Returns:
+        Highlight dictionaries in library order
+    """
+    results = [
+        item async for item in iter_context(
+            context, region, concurrency, max_books, timer, extraction, fingerprints
+        )
+    ]
+    return [hl for _, hl in sorted(results, key=lambda item: item[0])]
+
+
+@asynccontextmanager
+async def scrape_session(
+    headless: bool = True,
+    block_resources: bool = False,
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    timer: Optional[Metrics] = None,
+) -> AsyncIterator[BrowserContext]:
+    """Open an authenticated browser context for one scrape.
+
+    Refreshed cookies are saved back to auth.json only if the block
+    completes; the trace (if any) is saved and the browser closed either way.
+
+    Raises:
+        FileNotFoundError: If there is no saved session to start from
+    """
+    auth_path = get_auth_path()
+
+    if not has_session(user_data_dir, cdp_url, auth_path):
+        raise FileNotFoundError(
+            f"Auth state file not found at {auth_path}. "
+            "Run the login script first to generate auth.json"
+        )
+
+    timer = timer or get_metrics()
+
+    async with async_playwright() as p:
+        with timer.phase("launch"):
+            session = await open_session_async(
+                p, headless, user_data_dir, cdp_url, auth_path
+            )
+        try:
+            context = session.context
+            if block_resources:
+                await install_request_filter(context)
+            if trace_path:
+                await session.start_tracing()
+            try:
+                yield context
+                await session.save_auth(auth_path)
+            finally:
+                if trace_path:
+                    await session.stop_tracing(trace_path)
+        finally:
+            with timer.phase("close"):
+                await session.close()
+
+
+async def iter_highlights_async(
+    region: str,
+    headless: bool = True,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_books: Optional[int] = None,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> AsyncIterator[dict]:
+    """Async-iterator form of scrape_highlights_async.
+
+    Yields each highlight as soon as its book finishes, in completion order
+    rather than library order. The browser stays open until the iterator
+    is exhausted or closed.
+    """
+    if extraction not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {extraction}")
+
+    timer = get_metrics()
+
+    async with scrape_session(
+        headless, block_resources, trace_path, user_data_dir, cdp_url, timer
+    ) as context:
+        async for _, highlight in iter_context(
+            context, region, max(1, concurrency), max_books, timer, extraction, fingerprints
+        ):
+            timer.incr("highlights_extracted")
+            yield highlight
+
+
+async def scrape_highlights_async(
+    region: str,
+    headless: bool = True,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_books: Optional[int] = None,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Launch a browser and scrape highlights with a bounded page pool."""
+    if extraction not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {extraction}")
+
+    timer = get_metrics()
+
+    async with scrape_session(
+        headless, block_resources, trace_path, user_data_dir, cdp_url, timer
+    ) as context:
+        highlights = await scrape_context(
+            context, region, concurrency, max_books, timer, extraction, fingerprints
+        )
+
+    timer.incr("highlights_extracted", len(highlights))
+    print(f"Scraped {len(highlights)} highlights total")
+    return highlights
+
+
+def scrape_highlights_concurrent(
+    region: str,
+    headless: bool = True,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_books: Optional[int] = None,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Scrape the whole library, loading several books in parallel.
+
+    Each book's notebook view is opened directly by ASIN in one of
+    `concurrency` pages sharing the same authenticated context.
+
+    Args:
+        region: Amazon region ('com' or 'co.uk')
+        headless: Run browser in headless mode
+        concurrency: Number of pages loading books at the same time
+        max_books: Maximum number of books to visit (None for all)
+        block_resources: Drop images, fonts, media and third-party trackers
+        extraction: 'dom' or 'evaluate' (one in-page script per view)
+        trace_path: Record a Playwright trace to this zip file (optional)
+        user_data_dir: Use a persistent Chromium profile in this directory
+        cdp_url: Attach to an already running browser over CDP instead
+        fingerprints: Skip books whose sidebar fingerprint is unchanged and
+            mark the ones read (optional; every book is opened without).
+            Not saved here: save it once the highlights are stored
+
+    Returns:
+        List of highlight dictionaries in the same shape as scrape_highlights
+    """
+    return asyncio.run(
+        scrape_highlights_async(
+            region, headless, max(1, concurrency), max_books, block_resources,
+            extraction, trace_path, user_data_dir, cdp_url, fingerprints,
+        )
+    )
@@ -0,0 +1,343 @@
+"""Sync several Amazon accounts in one run, from a JSON config file.
+
+All accounts share one Chromium process. Each account gets its own browser
+context, started from its own auth file, so cookies and storage never mix.
+Up to `concurrency` accounts are scraped at the same time, and each account
+loads `pages` books in parallel inside its context.
+
+Example config:
+
+    {
+      "concurrency": 3,
+      "pages": 2,
+      "accounts": [
+        {"name": "alice-us", "region": "com", "auth": "auth/alice-us.json",
+         "output_dir": "out/alice-us", "gist_id": "abc123",
+         "github_token_env": "ALICE_GITHUB_TOKEN"},
+        {"name": "alice-uk", "region": "co.uk", "auth": "auth/alice-uk.json"}
+      ]
+    }
+
+Relative paths are resolved against the config file's folder. An account's
+output_dir defaults to data/accounts/<name>, and holds that account's
+highlights.db, journal, latest.json and shards. Accounts without a gist_id are
+scraped and built but not uploaded.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from playwright.async_api import Browser, async_playwright
+
+from .async_scraper import install_request_filter, scrape_context
+from .fingerprints import BookFingerprints
+from .metrics import Metrics, get_metrics
+from .utils import (
+    DEFAULT_MAX_BOOKS,
+    EXTRACTION_MODES,
+    get_accounts_dir,
+    get_batch_report_path,
+    load_json,
+    save_json,
+    utc_now,
+)
+
+
+DEFAULT_BATCH_CONCURRENCY = 3
+DEFAULT_PAGES_PER_ACCOUNT = 2
+REGIONS = ("com", "co.uk")
+
+# Gist upload state lives in one file shared by every account.
+_upload_lock = threading.Lock()
+
+
+def load_batch_config(path: Path) -> dict:
+    """Load and validate a batch config file.
+
+    Args:
+        path: Path to the JSON config
+
+    Returns:
+        The config with defaults filled in and account paths resolved
+
+    Raises:
+        FileNotFoundError: If the config file does not exist
+        ValueError: If the config is invalid
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Batch config not found at {path}")
+
+    config = load_json(path)
+    base_dir = path.parent
+    accounts = config.get("accounts")
+    if not accounts:
+        raise ValueError(f"No accounts listed in {path}")
+
+    defaults = {
+        "region": config.get("region", "com"),
+        "max_books": config.get("max_books", DEFAULT_MAX_BOOKS),
+        "extraction": config.get("extraction", "dom"),
+    }
+
+    seen = set()
+    resolved = []
+    for i, account in enumerate(accounts):
+        name = account.get("name")
+        if not name:
+            raise ValueError(f"Account {i} in {path} has no name")
+        if name in seen:
+            raise ValueError(f"Duplicate account name in {path}: {name}")
+        seen.add(name)
+
+        account = {**defaults, **account}
+        if account["region"] not in REGIONS:
+            raise ValueError(f"Unknown region for {name}: {account['region']}")
+        if account["extraction"] not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode for {name}: {account['extraction']}")
+        if not account.get("auth"):
+            raise ValueError(f"Account {name} has no auth file")
+
+        account["auth"] = base_dir / account["auth"]
+        if account.get("output_dir"):
+            account["output_dir"] = base_dir / account["output_dir"]
+        else:
+            account["output_dir"] = get_accounts_dir() / name
+        resolved.append(account)
+
+    return {
+        "concurrency": max(1, config.get("concurrency", DEFAULT_BATCH_CONCURRENCY)),
+        "pages": max(1, config.get("pages", DEFAULT_PAGES_PER_ACCOUNT)),
+        "accounts": resolved,
+    }
+
+
+def _github_token(account: dict) -> Optional[str]:
+    env_name = account.get("github_token_env")
+    if env_name:
+        token = os.environ.get(env_name)
+        if not token:
+            raise ValueError(
+                f"Account {account['name']} reads its GitHub token from "
+                f"{env_name}, which is not set"
+            )
+        return token
+    return account.get("github_token") or os.environ.get("GITHUB_TOKEN")
+
+
+def publish_account(
+    account: dict,
+    highlights: list[dict],
+    upload: bool = True,
+    minify: bool = False,
+    force_upload: bool = False,
+    shards: bool = False,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> dict:
+    """Store, build and upload one account's highlights into its output_dir.
+
+    The book fingerprints the highlights were scraped with (if any) are
+    saved as soon as the highlights are stored.
+
+    Returns:
+        {"changed", "items", "raw_url"} for the account's result
+    """
+    from .pipeline import HighlightSink
+    from .shards import write_shards
+
+    output_dir = Path(account["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    latest_path = output_dir / "latest.json"
+    shards_dir = output_dir / "shards"
+    manifest = None
+
+    with HighlightSink(
+        output_dir / "highlights.db", output_dir / "journal", latest_path
+    ) as sink:
+        sink.add(highlights)
+        if fingerprints is not None:
+            fingerprints.save()
+        output = sink.store.export_latest(latest_path)
+        if shards:
+            manifest, _ = write_shards(sink.store.highlights_by_book(), shards_dir)
+
+    result = {"changed": sink.changed, "items": len(output["items"]), "raw_url": None}
+
+    gist_id = account.get("gist_id")
+    if not (upload and gist_id):
+        return result
+
+    from .gist import upload_shards_to_gist, upload_to_gist
+
+    token = _github_token(account)
+    with _upload_lock:
+        result["raw_url"] = upload_to_gist(
+            gist_id, token, data=output, minify=minify, force=force_upload
+        )
+        if manifest is not None:
+            upload_shards_to_gist(
+                manifest, shards_dir, gist_id, token, force=force_upload
+            )
+    return result
+
+
+async def sync_account(
+    browser: Browser,
+    account: dict,
+    semaphore: asyncio.Semaphore,
+    pages: int = DEFAULT_PAGES_PER_ACCOUNT,
+    block_resources: bool = False,
+    **publish_options,
+) -> dict:
+    """Scrape and publish one account in its own context of the shared browser.
+
+    Errors are caught and recorded in the result, so one failing account
+    does not stop the others.
+
+    Returns:
+        Result dictionary with name, region, status, timings and counts
+    """
+    name = account["name"]
+    timer = Metrics()
+    result = {"name": name, "region": account["region"], "status": "ok", "error": None}
+
+    async with semaphore:
+        start = time.perf_counter()
+        print(f"[{name}] Starting amazon.{account['region']}")
+        try:
+            auth_path = Path(account["auth"])
+            if not auth_path.exists():
+                raise FileNotFoundError(f"Auth state file not found at {auth_path}")
+            if publish_options.get("upload", True) and account.get("gist_id"):
+                # Fail before scraping rather than after.
+                _github_token(account)
+
+            fingerprints = BookFingerprints.load(
+                account["region"], Path(account["output_dir"]) / "book_fingerprints.json"
+            )
+            with timer.phase("context"):
+                context = await browser.new_context(storage_state=str(auth_path))
+            try:
+                if block_resources:
+                    await install_request_filter(context)
+                with timer.phase("scrape"):
+                    highlights = await scrape_context(
+                        context,
+                        account["region"],
+                        pages,
+                        account["max_books"] or None,
+                        timer,
+                        account["extraction"],
+                        fingerprints,
+                    )
+                await context.storage_state(path=str(auth_path))
+            finally:
+                await context.close()
+
+            result["highlights"] = len(highlights)
+            with timer.phase("publish"):
+                result.update(await asyncio.to_thread(
+                    publish_account, account, highlights,
+                    fingerprints=fingerprints, **publish_options
+                ))
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+            print(f"[{name}] Failed: {result['error']}")
+
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        result["timings"] = timer.to_dict()["spans"]
+        print(f"[{name}] {result['status']} in {result['seconds']:.1f}s")
+        return result
+
+
+async def run_batch_async(
+    config: dict,
+    headless: bool = True,
+    block_resources: bool = False,
+    **publish_options,
+) -> list[dict]:
+    """Run every account in the config against one shared browser."""
+    accounts = config["accounts"]
+    semaphore = asyncio.Semaphore(config["concurrency"])
+    metrics = get_metrics()
+
+    async with async_playwright() as p:
+        with metrics.phase("launch"):
+            browser = await p.chromium.launch(headless=headless)
+        try:
+            with metrics.phase("accounts"):
+                return await asyncio.gather(*(
+                    sync_account(
+                        browser, account, semaphore, config["pages"],
+                        block_resources, **publish_options,
+                    )
+                    for account in accounts
+                ))
+        finally:
+            with metrics.phase("close"):
+                await browser.close()
+
+
+def run_batch(
+    config_path: Path,
+    concurrency: Optional[int] = None,
+    headless: bool = True,
+    block_resources: bool = False,
+    report_path: Optional[Path] = None,
+    **publish_options,
+) -> list[dict]:
+    """Sync every account listed in a batch config file.
+
+    Args:
+        config_path: Path to the JSON config
+        concurrency: Accounts scraped at once (overrides the config)
+        headless: Run browser in headless mode
+        block_resources: Drop images, fonts, media and third-party trackers
+        report_path: Where to write the per-account results (defaults to
+            data/batch_report.json)
+        publish_options: upload, minify, force_upload and shards, passed on
+            to publish_account
+
+    Returns:
+        One result dictionary per account, in config order
+    """
+    config = load_batch_config(config_path)
+    if concurrency:
+        config["concurrency"] = max(1, concurrency)
+
+    accounts = config["accounts"]
+    print(
+        f"Syncing {len(accounts)} accounts, {config['concurrency']} at a time, "
+        f"{config['pages']} pages each"
+    )
+
+    results = asyncio.run(
+        run_batch_async(config, headless, block_resources, **publish_options)
+    )
+
+    metrics = get_metrics()
+    failed = [result for result in results if result["status"] != "ok"]
+    metrics.incr("accounts_ok", len(results) - len(failed))
+    metrics.incr("accounts_failed", len(failed))
+    metrics.incr("highlights_extracted", sum(result.get("highlights", 0) for result in results))
+
+    print("-" * 50)
+    for result in results:
+        if result["status"] == "ok":
+            print(
+                f"  {result['name']:<20} ok      {result['highlights']:>5} highlights, "
+                f"{result['changed']:>5} changed  ({result['seconds']:.1f}s)"
+            )
+        else:
+            print(f"  {result['name']:<20} FAILED  {result['error']}")
+
+    save_json(
+        {"finished_at": utc_now(), "accounts": results},
+        Path(report_path or get_batch_report_path()),
+    )
+    return results
@@ -0,0 +1,268 @@
+"""Open an authenticated browser context: fresh, persistent profile, or over CDP.
+
+- Default: launch Chromium and create a context from auth.json.
+- user_data_dir: launch a persistent Chromium profile, so the HTTP cache,
+  service workers and refreshed cookies survive between runs. A new
+  profile is seeded with the cookies from auth.json.
+- cdp_url: attach to an already running Chromium (started with
+  --remote-debugging-port) and use its default context.
+
+After a successful run the context's storage state can be written back
+to auth.json, so cookies Amazon refreshed during the run are kept. A
+browser reached over CDP is the user's own, so only its Amazon cookies
+and storage are written, and closing the session removes the request
+filter and tracing this run added to its context.
+"""
+
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from .jsonio import write_json
+from .utils import get_auth_path, load_json
+
+
+# Pattern the scrapers' request filters are routed on (see install_request_filter).
+REQUEST_FILTER_PATTERN = "**/*"
+
+
+def _profile_is_new(user_data_dir: Path) -> bool:
+    return not user_data_dir.exists() or not any(user_data_dir.iterdir())
+
+
+def has_session(
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    auth_path: Optional[Path] = None,
+) -> bool:
+    """Whether there is anything to start an authenticated session from."""
+    if cdp_url:
+        return True
+    if user_data_dir and not _profile_is_new(Path(user_data_dir)):
+        return True
+    return Path(auth_path or get_auth_path()).exists()
+
+
+def _auth_cookies(auth_path: Path) -> list[dict]:
+    try:
+        return load_json(auth_path).get("cookies", [])
+    except Exception as e:
+        print(f"Could not read cookies from {auth_path}: {e}")
+        return []
+
+
+def _is_amazon_host(host: str) -> bool:
+    return "amazon" in host.lower().lstrip(".").split(".")
+
+
+def amazon_storage_state(state: dict) -> dict:
+    """Keep only the Amazon cookies and origins of a storage state."""
+    return {
+        "cookies": [
+            cookie for cookie in state.get("cookies", [])
+            if _is_amazon_host(cookie.get("domain", ""))
+        ],
+        "origins": [
+            origin for origin in state.get("origins", [])
+            if _is_amazon_host(urlparse(origin.get("origin", "")).hostname or "")
+        ],
+    }
+
+
+class BrowserSession:
+    """A browser context plus the knowledge of how to let go of it.
+
+    Launched browsers and persistent profiles are closed; browsers reached
+    over CDP are only disconnected from, leaving them running.
+    """
+
+    def __init__(self, context, browser=None, mode: str = "launch"):
+        self.context = context
+        self.browser = browser
+        self.mode = mode
+        self.pages = []
+        self.tracing = False
+
+    def new_page(self):
+        """Return a page to work in (the profile's initial tab if it has one)."""
+        if self.mode == "profile" and self.context.pages:
+            return self.context.pages[0]
+        page = self.context.new_page()
+        self.pages.append(page)
+        return page
+
+    def start_tracing(self) -> None:
+        """Start a Playwright trace with screenshots and DOM snapshots."""
+        self.context.tracing.start(screenshots=True, snapshots=True)
+        self.tracing = True
+
+    def stop_tracing(self, path: Path) -> None:
+        """Stop the trace and save it to path."""
+        self.tracing = False
+        self.context.tracing.stop(path=str(path))
+        print(f"Saved Playwright trace to {path}")
+
+    def save_auth(self, auth_path: Optional[Path] = None) -> None:
+        """Write the context's current cookies and storage back to auth.json.
+
+        Over CDP only the Amazon cookies and storage are written, not the
+        rest of the user's browser session.
+        """
+        auth_path = Path(auth_path or get_auth_path())
+        if self.mode == "cdp":
+            write_json(amazon_storage_state(self.context.storage_state()), auth_path)
+        else:
+            self.context.storage_state(path=str(auth_path))
+        print(f"Refreshed session saved to {auth_path}")
+
+    def close(self) -> None:
+        """Close the browser, profile, or CDP connection."""
+        if self.mode == "profile":
+            self.context.close()
+            return
+        if self.mode == "cdp":
+            # Leave the user's browser as it was: undo our routes and
+            # tracing, and close only our own tabs.
+            self.context.unroute(REQUEST_FILTER_PATTERN)
+            if self.tracing:
+                self.tracing = False
+                self.context.tracing.stop()
+            for page in self.pages:
+                page.close()
+        self.browser.close()
+
+
+def open_session(
+    playwright,
+    headless: bool = True,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    auth_path: Optional[Path] = None,
+) -> BrowserSession:
+    """Open an authenticated context with the sync Playwright API.
+
+    Args:
+        playwright: The object returned by sync_playwright().__enter__()
+        headless: Run a launched browser in headless mode
+        user_data_dir: Persistent Chromium profile directory (optional)
+        cdp_url: Attach to a running browser at this CDP URL (optional)
+        auth_path: Storage state to start from (defaults to data/auth.json;
+            a fresh context is used if it does not exist yet)
+
+    Returns:
+        BrowserSession wrapping the context
+    """
+    auth_path = Path(auth_path or get_auth_path())
+
+    if cdp_url:
+        print(f"Connecting to browser at {cdp_url}...")
+        browser = playwright.chromium.connect_over_cdp(cdp_url)
+        if browser.contexts:
+            context = browser.contexts[0]
+        elif auth_path.exists():
+            context = browser.new_context(storage_state=str(auth_path))
+        else:
+            context = browser.new_context()
+        return BrowserSession(context, browser, mode="cdp")
+
+    if user_data_dir:
+        user_data_dir = Path(user_data_dir)
+        seed = _profile_is_new(user_data_dir) and auth_path.exists()
+        user_data_dir.mkdir(parents=True, exist_ok=True)
+        context = playwright.chromium.launch_persistent_context(
+            str(user_data_dir), headless=headless
+        )
+        if seed:
+            print(f"Seeding new browser profile from {auth_path.name}")
+            context.add_cookies(_auth_cookies(auth_path))
+        return BrowserSession(context, mode="profile")
+
+    browser = playwright.chromium.launch(headless=headless)
+    if auth_path.exists():
+        context = browser.new_context(storage_state=str(auth_path))
+    else:
+        context = browser.new_context()
+    return BrowserSession(context, browser, mode="launch")
+
+
+class AsyncBrowserSession(BrowserSession):
+    """BrowserSession for the async Playwright API."""
+
+    async def new_page(self):
+        if self.mode == "profile" and self.context.pages:
+            return self.context.pages[0]
+        page = await self.context.new_page()
+        self.pages.append(page)
+        return page
+
+    async def start_tracing(self) -> None:
+        await self.context.tracing.start(screenshots=True, snapshots=True)
+        self.tracing = True
+
+    async def stop_tracing(self, path: Path) -> None:
+        self.tracing = False
+        await self.context.tracing.stop(path=str(path))
+        print(f"Saved Playwright trace to {path}")
+
+    async def save_auth(self, auth_path: Optional[Path] = None) -> None:
+        auth_path = Path(auth_path or get_auth_path())
+        if self.mode == "cdp":
+            state = await self.context.storage_state()
+            write_json(amazon_storage_state(state), auth_path)
+        else:
+            await self.context.storage_state(path=str(auth_path))
+        print(f"Refreshed session saved to {auth_path}")
+
+    async def close(self) -> None:
+        if self.mode == "profile":
+            await self.context.close()
+            return
+        if self.mode == "cdp":
+            await self.context.unroute(REQUEST_FILTER_PATTERN)
+            if self.tracing:
+                self.tracing = False
+                await self.context.tracing.stop()
+            for page in self.pages:
+                await page.close()
+        await self.browser.close()
+
+
+async def open_session_async(
+    playwright,
+    headless: bool = True,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    auth_path: Optional[Path] = None,
+) -> AsyncBrowserSession:
+    """Async counterpart of open_session."""
+    auth_path = Path(auth_path or get_auth_path())
+
+    if cdp_url:
+        print(f"Connecting to browser at {cdp_url}...")
+        browser = await playwright.chromium.connect_over_cdp(cdp_url)
+        if browser.contexts:
+            context = browser.contexts[0]
+        elif auth_path.exists():
+            context = await browser.new_context(storage_state=str(auth_path))
+        else:
+            context = await browser.new_context()
+        return AsyncBrowserSession(context, browser, mode="cdp")
+
+    if user_data_dir:
+        user_data_dir = Path(user_data_dir)
+        seed = _profile_is_new(user_data_dir) and auth_path.exists()
+        user_data_dir.mkdir(parents=True, exist_ok=True)
+        context = await playwright.chromium.launch_persistent_context(
+            str(user_data_dir), headless=headless
+        )
+        if seed:
+            print(f"Seeding new browser profile from {auth_path.name}")
+            await context.add_cookies(_auth_cookies(auth_path))
+        return AsyncBrowserSession(context, mode="profile")
+
+    browser = await playwright.chromium.launch(headless=headless)
+    if auth_path.exists():
+        context = await browser.new_context(storage_state=str(auth_path))
+    else:
+        context = await browser.new_context()
+    return AsyncBrowserSession(context, browser, mode="launch")
@@ -1,7 +1,8 @@
 """Build and deduplicate highlights data."""
 
 from typing import Optional
-from .utils import utc_now, get_latest_path, load_json, save_json
+from .index import LatestIndex
+from .utils import get_latest_path, load_json, save_json
 
 
 def deduplicate_highlights(highlights: list[dict]) -> list[dict]:
@@ -57,13 +58,7 @@ def build_output(highlights: list[dict]) -> dict:
     Returns:
         Output dictionary with updated_at and items
     """
-    deduped = deduplicate_highlights(highlights)
-    sorted_highlights = sort_by_recency(deduped)
-    
-    return {
-        "updated_at": utc_now(),
-        "items": sorted_highlights,
-    }
+    return LatestIndex(highlights).to_output()
 
 
 def merge_with_existing(new_highlights: list[dict], existing_path: Optional[str] = None) -> list[dict]:
@@ -0,0 +1,174 @@
+"""Parse Kindle Notebook annotation responses without rendering them.
+
+The notebook page loads each book's annotations from
+`/notebook?asin=...&contentLimitState=&`. These parsers turn the body of
+that response into the same payload shape as extract.ANNOTATIONS_JS, so
+the scrapers can skip the rendered DOM entirely.
+"""
+
+import json
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import Any, Optional
+
+
+HIGHLIGHT_IDS = {"highlight"}
+HEADER_IDS = {"annotationHighlightHeader"}
+VOID_TAGS = {"area", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+# Keys that hold annotation text and creation times in JSON payloads.
+JSON_TEXT_KEYS = ("highlight", "highlightText", "text")
+JSON_TIME_KEYS = ("created", "createdDate", "creationTime", "timestamp", "lastUpdatedDate")
+
+
+class AnnotationsHTMLParser(HTMLParser):
+    """Collect highlight texts and their headers from an annotations fragment.
+
+    Each highlight gets the last header seen before it. The first header
+    on the page is also kept in `headers`, the page-wide fallback that
+    ANNOTATIONS_JS returns for the time selectors, for highlights whose
+    header is missing or comes after them.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.asin: Optional[str] = None
+        self.highlights: list[dict] = []
+        self.headers: list[str] = []
+        self._capture: Optional[str] = None
+        self._depth = 0
+        self._buffer: list[str] = []
+        self._header: Optional[str] = None
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        attrs = dict(attrs)
+        element_id = attrs.get("id") or ""
+
+        if tag == "input" and element_id == "kp-notebook-annotations-asin":
+            self.asin = attrs.get("value")
+            return
+
+        if self._capture:
+            if tag not in VOID_TAGS:
+                self._depth += 1
+            return
+
+        if element_id in HIGHLIGHT_IDS:
+            self._capture = "highlight"
+        elif element_id in HEADER_IDS:
+            self._capture = "header"
+        else:
+            return
+
+        self._depth = 1
+        self._buffer = []
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        if not self._capture:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._capture or tag in VOID_TAGS:
+            return
+
+        self._depth -= 1
+        if self._depth > 0:
+            return
+
+        text = " ".join("".join(self._buffer).split())
+        if self._capture == "header":
+            self._header = text
+            if not self.headers:
+                self.headers.append(text)
+        else:
+            self.highlights.append({"text": text, "header": self._header})
+
+        self._capture = None
+
+    def handle_data(self, data: str) -> None:
+        if self._capture:
+            self._buffer.append(data)
+
+
+def parse_annotations_html(html: str) -> dict:
+    """Parse an annotations HTML fragment into an ANNOTATIONS_JS-style payload."""
+    parser = AnnotationsHTMLParser()
+    parser.feed(html)
+    parser.close()
+    return {"asin": parser.asin, "highlights": parser.highlights, "headers": parser.headers}
+
+
+def _epoch_to_iso(value: Any) -> Optional[str]:
+    """Convert an epoch timestamp in seconds or milliseconds to ISO format."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    if seconds > 1e11:
+        seconds /= 1000
+    dt = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _find_annotations(data: Any) -> list[dict]:
+    """Find the first list of objects that carry highlight text."""
+    if isinstance(data, list):
+        if any(isinstance(item, dict) and _text_of(item) for item in data):
+            return [item for item in data if isinstance(item, dict)]
+        for item in data:
+            found = _find_annotations(item)
+            if found:
+                return found
+    elif isinstance(data, dict):
+        for value in data.values():
+            found = _find_annotations(value)
+            if found:
+                return found
+    return []
+
+
+def _text_of(item: dict) -> Optional[str]:
+    for key in JSON_TEXT_KEYS:
+        value = item.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def parse_annotations_json(data: Any) -> dict:
+    """Parse a JSON annotations payload.
+
+    JSON annotations carry creation times as epoch values, which are
+    returned as an exact "time" per highlight.
+    """
+    highlights = []
+    for item in _find_annotations(data):
+        text = _text_of(item)
+        if not text:
+            continue
+        time_value = next((item[k] for k in JSON_TIME_KEYS if item.get(k)), None)
+        highlights.append({
+            "text": text,
+            "header": None,
+            "time": _epoch_to_iso(time_value),
+        })
+    return {"asin": None, "highlights": highlights, "headers": []}
+
+
+def parse_annotations_response(body: str, content_type: str = "") -> dict:
+    """Parse an annotations response body, JSON or HTML.
+
+    Args:
+        body: Response body text
+        content_type: Response Content-Type header
+
+    Returns:
+        Payload with "highlights" ([{"text", "header", "time"?}]) and "headers"
+    """
+    stripped = body.lstrip()
+    if "json" in content_type or stripped.startswith(("{", "[")):
+        try:
+            return parse_annotations_json(json.loads(body))
+        except ValueError:
+            pass
+    return parse_annotations_html(body)
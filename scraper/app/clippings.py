@@ -0,0 +1,314 @@
+"""Streaming, checkpointed parser for Kindle's My Clippings.txt."""
+
+import hashlib
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .build import deduplicate_highlights
+from .dates import parse_date
+from .index import LatestIndex
+from .utils import get_clippings_state_path, load_json, save_json, utc_now
+
+
+SEPARATOR = b"=========="
+TAIL_HASH_BYTES = 4096
+BULK_THRESHOLD_BYTES = 8 * 1024 * 1024
+CHUNKS_PER_WORKER = 4
+
+_SEPARATOR_LINE_RE = re.compile(r"^==========[ \t\r]*$", re.MULTILINE)
+
+_HEADER_RE = re.compile(
+    r"^-\s*Your\s+(?P<kind>\w+)\b.*?\|\s*Added on\s+(?P<added>.+?)\s*$",
+    re.IGNORECASE,
+)
+
+
+def parse_added_on(added: str) -> Optional[str]:
+    """Parse the 'Added on ...' part of a clipping header to ISO format.
+
+    Handles formats like:
+    - "Monday, 28 February 2026 12:20:00"
+    - "Monday, February 28, 2026 12:20:00 PM"
+    """
+    return parse_date(added.strip())
+
+
+def parse_clipping(record: str, fetched_at: Optional[str] = None) -> Optional[dict]:
+    """Parse a single clippings record into a highlight dictionary.
+
+    Args:
+        record: Text between two '==========' separators
+        fetched_at: Timestamp to stamp on the highlight (defaults to now)
+
+    Returns:
+        Highlight dictionary, or None for bookmarks, notes and empty records
+    """
+    lines = [line.strip() for line in record.lstrip("\ufeff").strip().splitlines()]
+    if len(lines) < 3:
+        return None
+
+    book_title = lines[0].lstrip("\ufeff").strip()
+    header = _HEADER_RE.match(lines[1])
+    if not book_title or not header:
+        return None
+
+    if header.group("kind").lower() != "highlight":
+        return None
+
+    highlight_text = "\n".join(line for line in lines[2:] if line).strip()
+    if not highlight_text:
+        return None
+
+    return {
+        "book_title": book_title,
+        "highlight_text": highlight_text,
+        "highlight_time": parse_added_on(header.group("added")),
+        "fetched_at": fetched_at or utc_now(),
+    }
+
+
+def iter_clippings(
+    path: Path,
+    start_offset: int = 0,
+    fetched_at: Optional[str] = None,
+) -> Iterator[tuple[Optional[dict], int]]:
+    """Stream records from a clippings file.
+
+    Only complete records (terminated by a separator line) are yielded, so a
+    record that Kindle is still writing is picked up on the next run.
+
+    Args:
+        path: Path to My Clippings.txt
+        start_offset: Byte offset to start reading from
+        fetched_at: Timestamp to stamp on every highlight
+
+    Yields:
+        (highlight or None, byte offset just past the record's separator)
+    """
+    fetched_at = fetched_at or utc_now()
+    offset = start_offset
+    buffer: list[bytes] = []
+
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        for line in f:
+            offset += len(line)
+            if line.strip() == SEPARATOR:
+                record = b"".join(buffer).decode("utf-8", errors="replace")
+                buffer = []
+                yield parse_clipping(record, fetched_at), offset
+            else:
+                buffer.append(line)
+
+
+def _chunk_bounds(mm: mmap.mmap, n_chunks: int) -> list[tuple[int, int]]:
+    """Split a mapped file into byte ranges that end on separator lines."""
+    size = len(mm)
+    bounds = []
+    start = 0
+
+    for i in range(1, n_chunks + 1):
+        if start >= size:
+            break
+        target = max(start, size * i // n_chunks)
+        sep = mm.find(SEPARATOR, target) if i < n_chunks else -1
+        while sep > 0 and mm[sep - 1:sep] != b"\n":
+            sep = mm.find(SEPARATOR, sep + 1)
+        if sep == -1:
+            bounds.append((start, size))
+            break
+        newline = mm.find(b"\n", sep)
+        end = size if newline == -1 else newline + 1
+        bounds.append((start, end))
+        start = end
+
+    return bounds
+
+
+def _parse_chunk(args: tuple[str, int, int, str, bool]) -> list[dict]:
+    """Parse one byte range of a clippings file (runs in a worker process)."""
+    path, start, end, fetched_at, latest_only = args
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode("utf-8", errors="replace")
+
+    # The piece after the last separator is an incomplete record.
+    records = _SEPARATOR_LINE_RE.split(text)[:-1]
+    highlights = []
+    for record in records:
+        highlight = parse_clipping(record, fetched_at)
+        if highlight:
+            highlights.append(highlight)
+
+    if latest_only:
+        return deduplicate_highlights(highlights)
+    return highlights
+
+
+def parse_clippings_bulk(
+    path: Path,
+    workers: Optional[int] = None,
+    latest_only: bool = False,
+    fetched_at: Optional[str] = None,
+) -> tuple[list[dict], int]:
+    """Parse a whole clippings file in parallel using a memory map.
+
+    The file is split into chunks on '==========' lines and each chunk is
+    parsed in a process pool. Workers map the file themselves, so only the
+    byte ranges and the parsed highlights cross process boundaries.
+
+    Args:
+        path: Path to My Clippings.txt
+        workers: Number of worker processes (defaults to the CPU count)
+        latest_only: Reduce each chunk to the latest highlight per book
+            before returning it, which keeps inter-process traffic small
+        fetched_at: Timestamp to stamp on every highlight
+
+    Returns:
+        (highlights, byte offset just past the last complete record)
+    """
+    path = Path(path)
+    workers = workers or os.cpu_count() or 1
+    fetched_at = fetched_at or utc_now()
+
+    if path.stat().st_size == 0:
+        return [], 0
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            bounds = _chunk_bounds(mm, workers * CHUNKS_PER_WORKER)
+            last_sep = mm.rfind(SEPARATOR)
+            if last_sep == -1:
+                end_offset = 0
+            else:
+                newline = mm.find(b"\n", last_sep)
+                end_offset = len(mm) if newline == -1 else newline + 1
+
+    tasks = [(str(path), start, end, fetched_at, latest_only) for start, end in bounds]
+
+    if workers == 1 or len(tasks) == 1:
+        results = [_parse_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_chunk, tasks))
+
+    highlights = [hl for chunk in results for hl in chunk]
+    if latest_only:
+        highlights = deduplicate_highlights(highlights)
+
+    return highlights, end_offset
+
+
+def build_latest_from_clippings(path: Path, workers: Optional[int] = None) -> list[dict]:
+    """Full rebuild: latest highlight per book, most recent first.
+
+    Args:
+        path: Path to My Clippings.txt
+        workers: Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        Deduplicated highlights sorted by recency
+    """
+    highlights, _ = parse_clippings_bulk(path, workers=workers, latest_only=True)
+    return LatestIndex(highlights).items()
+
+
+def _tail_hash(path: Path, offset: int) -> str:
+    """Hash the bytes just before offset, used to detect rewritten files."""
+    start = max(0, offset - TAIL_HASH_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def load_checkpoint(state_path: Optional[Path] = None) -> dict:
+    """Load the clippings checkpoint, or an empty one if there is none."""
+    state_path = state_path or get_clippings_state_path()
+    try:
+        if state_path.exists():
+            return load_json(state_path)
+    except Exception as e:
+        print(f"Could not load clippings checkpoint: {e}")
+    return {}
+
+
+def checkpoint_is_valid(path: Path, checkpoint: dict) -> bool:
+    """Check that the file still starts with the bytes the checkpoint saw.
+
+    A file that shrank below the saved offset, or whose tail before that
+    offset no longer hashes the same, was truncated or rewritten.
+    """
+    offset = checkpoint.get("offset", 0)
+    if not offset or checkpoint.get("path") != str(path):
+        return False
+    if path.stat().st_size < offset:
+        return False
+    return _tail_hash(path, offset) == checkpoint.get("tail_hash")
+
+
+def read_new_clippings(
+    path: Path,
+    state_path: Optional[Path] = None,
+    full: bool = False,
+    workers: Optional[int] = None,
+) -> list[dict]:
+    """Parse highlights added to a clippings file since the last run.
+
+    Args:
+        path: Path to My Clippings.txt
+        state_path: Checkpoint path (optional, defaults to data/clippings_state.json)
+        full: Ignore the checkpoint and re-parse the whole file
+        workers: Worker processes for full parses (defaults to the CPU count).
+            Full parses of files over BULK_THRESHOLD_BYTES, or any full parse
+            when workers is set, use parse_clippings_bulk.
+
+    Returns:
+        List of highlight dictionaries in the same shape as scrape_highlights
+    """
+    path = Path(path)
+    state_path = state_path or get_clippings_state_path()
+
+    if not path.exists():
+        raise FileNotFoundError(f"Clippings file not found at {path}")
+
+    checkpoint = {} if full else load_checkpoint(state_path)
+    start_offset = 0
+
+    if checkpoint.get("offset"):
+        if checkpoint_is_valid(path, checkpoint):
+            start_offset = checkpoint["offset"]
+            print(f"Resuming clippings from byte {start_offset}")
+        else:
+            print("Clippings file was truncated or rewritten, doing a full re-parse")
+
+    highlights = []
+    end_offset = start_offset
+    use_bulk = start_offset == 0 and (
+        workers is not None or path.stat().st_size >= BULK_THRESHOLD_BYTES
+    )
+
+    if use_bulk:
+        highlights, end_offset = parse_clippings_bulk(path, workers=workers)
+    else:
+        for highlight, offset in iter_clippings(path, start_offset):
+            end_offset = offset
+            if highlight:
+                highlights.append(highlight)
+
+    save_json(
+        {
+            "path": str(path),
+            "offset": end_offset,
+            "tail_hash": _tail_hash(path, end_offset),
+            "updated_at": utc_now(),
+        },
+        state_path,
+    )
+
+    print(f"Parsed {len(highlights)} new highlights from {path.name}")
+    return highlights
@@ -0,0 +1,186 @@
+"""Long-running sync: one warm browser context polled on an adaptive schedule."""
+
+import signal
+import threading
+from pathlib import Path
+from typing import Optional
+
+from playwright.sync_api import sync_playwright
+
+from .browser import has_session, open_session
+from .fingerprints import BookFingerprints
+from .publish import publish_highlights
+from .metrics import reset_metrics
+from .scraper import (
+    DEFAULT_MAX_BOOKS,
+    EXTRACTION_MODES,
+    install_request_filter,
+    is_signin_url,
+    scrape_page,
+)
+from .utils import get_auth_path
+
+
+DEFAULT_MIN_INTERVAL = 120
+DEFAULT_MAX_INTERVAL = 3600
+BACKOFF_FACTOR = 2.0
+IDLE_POLLS_BEFORE_BACKOFF = 2
+
+
+class AdaptiveInterval:
+    """Polling interval that backs off while nothing changes.
+
+    After `idle_polls` polls in a row without changes the interval is
+    multiplied by `factor` on each further idle poll, up to
+    `max_interval`. Any change snaps it back to `min_interval`.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        factor: float = BACKOFF_FACTOR,
+        idle_polls: int = IDLE_POLLS_BEFORE_BACKOFF,
+    ):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.idle_polls = idle_polls
+        self.current = min_interval
+        self.idle = 0
+
+    def update(self, changed: bool) -> float:
+        """Record the outcome of a poll and return the delay before the next."""
+        if changed:
+            self.idle = 0
+            self.current = self.min_interval
+        else:
+            self.idle += 1
+            if self.idle >= self.idle_polls:
+                self.current = min(self.max_interval, self.current * self.factor)
+        return self.current
+
+
+def run_daemon(
+    region: str,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    headless: bool = True,
+    prometheus_path: Optional[str] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    full_scan: bool = False,
+    **publish_options,
+) -> None:
+    """Keep a browser context warm and re-scrape the notebook on a schedule.
+
+    The browser is launched once and reused for every poll; it is only
+    relaunched after an error. Refreshed cookies are written back to
+    auth.json after every successful poll. Each poll publishes through the
+    store, so unchanged polls touch no rows and skip the Gist upload. Runs
+    until SIGINT/SIGTERM, or until the Amazon session expires.
+
+    Args:
+        region: Amazon region ('com' or 'co.uk')
+        min_interval: Seconds between polls while highlights keep changing
+        max_interval: Upper bound for the backed-off interval
+        max_books: Maximum number of books to visit per poll (None for all)
+        block_resources: Drop images, fonts, media and third-party trackers
+        extraction: 'dom', 'evaluate' or 'capture'
+        headless: Run browser in headless mode
+        prometheus_path: Also write each poll's metrics as a Prometheus textfile
+        user_data_dir: Use a persistent Chromium profile in this directory
+        cdp_url: Attach to an already running browser over CDP instead
+        full_scan: Open every book on the first poll; later polls only
+            open books whose sidebar fingerprint changed
+        publish_options: Passed on to publish_highlights
+
+    Raises:
+        FileNotFoundError: If auth.json is missing
+        RuntimeError: If the session expires
+    """
+    if extraction not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {extraction}")
+
+    auth_path = get_auth_path()
+    if not has_session(user_data_dir, cdp_url, auth_path):
+        raise FileNotFoundError(
+            f"Auth state file not found at {auth_path}. "
+            "Run the login script first to generate auth.json"
+        )
+
+    interval = AdaptiveInterval(min_interval, max_interval)
+    stop = threading.Event()
+
+    def request_stop(signum, frame) -> None:
+        print("Stopping after the current poll...")
+        stop.set()
+
+    previous_handlers = {
+        sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)
+    }
+
+    print(f"Starting daemon for amazon.{region} (every {min_interval:g}-{max_interval:g}s)")
+
+    with sync_playwright() as p:
+        session = context = page = None
+        try:
+            while not stop.is_set():
+                metrics = reset_metrics()
+                changed = 0
+
+                try:
+                    if page is None:
+                        with metrics.phase("launch"):
+                            session = open_session(
+                                p, headless, user_data_dir, cdp_url, auth_path
+                            )
+                            context = session.context
+                            if block_resources:
+                                install_request_filter(context)
+                            page = session.new_page()
+
+                    fingerprints = BookFingerprints.load(region, full=full_scan)
+                    with metrics.phase("scrape"):
+                        highlights = scrape_page(
+                            context, page, region, max_books, extraction, metrics,
+                            fingerprints,
+                        )
+                    session.save_auth(auth_path)
+                    changed = publish_highlights(
+                        highlights, exit_on_error=False, fingerprints=fingerprints,
+                        **publish_options
+                    )
+                    full_scan = False
+                except Exception as e:
+                    if page is not None and is_signin_url(page.url):
+                        raise
+                    print(f"Poll failed: {e}")
+                    if session is not None:
+                        try:
+                            session.close()
+                        except Exception as close_error:
+                            print(f"Could not close the browser session: {close_error}")
+                    session = context = page = None
+
+                delay = interval.update(changed > 0)
+                metrics.incr("poll_interval_seconds", delay)
+                metrics.report()
+                metrics.write_json()
+                if prometheus_path:
+                    metrics.write_prometheus(prometheus_path)
+
+                print(f"Next poll in {delay:g}s")
+                stop.wait(delay)
+        finally:
+            if session is not None:
+                session.close()
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+
+    print("Daemon stopped")
@@ -0,0 +1,115 @@
+"""Date parsing for Kindle highlight headers across Amazon regions.
+
+Handles the header styles used by the notebook and My Clippings.txt on
+amazon.com, amazon.co.uk, amazon.de, amazon.fr and amazon.co.jp:
+
+- "Monday 28 February 2026", "28 Feb 2026"             (co.uk)
+- "Sunday, March 1, 2026 1:05:00 PM", "February 28, 2026" (com)
+- "Samstag, 28. Februar 2026 12:20:00"                  (de)
+- "samedi 28 février 2026 12:20:00"                     (fr)
+- "2026年2月28日土曜日 12:20:00"                          (jp)
+
+Patterns are compiled once, results are cached per raw string, and
+parse_dates normalises a whole batch, parsing each distinct string once.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional
+
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+CACHE_SIZE = 4096
+
+MONTH_NAMES = {
+    "en": [
+        ("january", "jan"), ("february", "feb"), ("march", "mar"),
+        ("april", "apr"), ("may", "may"), ("june", "jun"),
+        ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"),
+        ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ],
+    "de": [
+        ("januar", "jan", "jänner"), ("februar", "feb"), ("märz", "mär", "maerz"),
+        ("april", "apr"), ("mai",), ("juni", "jun"),
+        ("juli", "jul"), ("august", "aug"), ("september", "sep", "sept"),
+        ("oktober", "okt"), ("november", "nov"), ("dezember", "dez"),
+    ],
+    "fr": [
+        ("janvier", "janv"), ("février", "févr", "fevrier"), ("mars",),
+        ("avril", "avr"), ("mai",), ("juin",),
+        ("juillet", "juil"), ("août", "aout"), ("septembre", "sept"),
+        ("octobre", "oct"), ("novembre", "nov"), ("décembre", "déc", "decembre"),
+    ],
+}
+
+MONTHS: dict[str, int] = {
+    name: number
+    for table in MONTH_NAMES.values()
+    for number, names in enumerate(table, start=1)
+    for name in names
+}
+
+_TIME = r"(?:\D{0,20}?\b(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?\s*(?P<ampm>[AaPp]\.?[Mm]\.?)?)?"
+
+# Order matters: the first pattern whose month name is known wins.
+PATTERNS = [
+    re.compile(r"(?P<year>\d{4})年\s*(?P<month>\d{1,2})月\s*(?P<day>\d{1,2})日" + _TIME),
+    re.compile(r"(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})" + _TIME),
+    re.compile(r"\b(?P<day>\d{1,2})\.?\s+(?P<name>[^\W\d_]+)\.?,?\s+(?P<year>\d{4})" + _TIME),
+    re.compile(r"\b(?P<name>[^\W\d_]+)\.?\s+(?P<day>\d{1,2}),?\s+(?P<year>\d{4})" + _TIME),
+]
+
+
+def _to_iso(match: re.Match) -> Optional[str]:
+    """Build an ISO timestamp from a pattern match, or None if invalid."""
+    groups = match.groupdict()
+
+    if groups.get("name") is not None:
+        month = MONTHS.get(groups["name"].lower().rstrip("."))
+        if month is None:
+            return None
+    else:
+        month = int(groups["month"])
+
+    hour = int(groups["hour"]) if groups.get("hour") else 0
+    minute = int(groups["minute"]) if groups.get("minute") else 0
+    second = int(groups["second"]) if groups.get("second") else 0
+
+    ampm = (groups.get("ampm") or "").lower().replace(".", "")
+    if ampm == "pm" and hour < 12:
+        hour += 12
+    elif ampm == "am" and hour == 12:
+        hour = 0
+
+    try:
+        dt = datetime(int(groups["year"]), month, int(groups["day"]), hour, minute, second)
+    except ValueError:
+        return None
+    return dt.strftime(ISO_FORMAT)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(text: str) -> Optional[str]:
+    """Parse a highlight header or date string to ISO format.
+
+    Returns midnight when the string has no time of day, and None for
+    strings without a recognisable date (e.g. "Yesterday", "2 hours ago").
+    """
+    if not text:
+        return None
+
+    for pattern in PATTERNS:
+        for match in pattern.finditer(text):
+            iso = _to_iso(match)
+            if iso:
+                return iso
+
+    return None
+
+
+def parse_dates(texts: Iterable[Optional[str]]) -> list[Optional[str]]:
+    """Parse a batch of date strings, parsing each distinct string once."""
+    texts = list(texts)
+    parsed = {text: parse_date(text) for text in set(texts) if text}
+    return [parsed.get(text) if text else None for text in texts]
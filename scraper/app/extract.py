@@ -0,0 +1,220 @@
+"""In-page extraction scripts that read a whole view in one round trip.
+
+Each script is passed to page.evaluate together with the selector
+fallback chains, walks the DOM inside the browser and returns a plain
+JSON payload, instead of one IPC call per query_selector/inner_text.
+"""
+
+from typing import Optional
+
+# Returns the name of the first [name, selector] marker found on the page,
+# or "unknown"; used to keep selector statistics per page layout.
+LAYOUT_JS = """
+(markers) => {
+    for (const [name, sel] of markers) {
+        if (document.querySelector(sel)) return name;
+    }
+    return "unknown";
+}
+"""
+
+# Returns [{"asin", "title", "annotated", "count"}] for every book in the
+# library sidebar, in the same order as
+# page.query_selector_all(<first matching selector>). "annotated" is the
+# last-annotated date as shown and "count" the highlight count, each null
+# if the sidebar does not show it.
+LIBRARY_JS = """
+({bookSelectors, titleSelectors, annotatedSelectors, countSelectors}) => {
+    let books = [];
+    for (const sel of bookSelectors) {
+        books = Array.from(document.querySelectorAll(sel));
+        if (books.length) break;
+    }
+    const textIn = (book, selectors) => {
+        for (const sel of selectors) {
+            const el = book.querySelector(sel);
+            const text = el ? (el.value || el.innerText || "").trim() : "";
+            if (text) return text;
+        }
+        return null;
+    };
+    return books.map(book => {
+        const count = textIn(book, countSelectors);
+        const digits = count ? count.replace(/[^0-9]/g, "") : "";
+        return {
+            asin: book.getAttribute("data-asin") || book.id || null,
+            title: textIn(book, titleSelectors),
+            annotated: textIn(book, annotatedSelectors),
+            count: digits ? parseInt(digits, 10) : null,
+        };
+    });
+}
+"""
+
+# Returns {"annotated", "count"} for one library entry (the element the
+# script is evaluated on), as LIBRARY_JS reads them for every entry.
+BOOK_FINGERPRINT_JS = """
+(book, {annotatedSelectors, countSelectors}) => {
+    const textIn = selectors => {
+        for (const sel of selectors) {
+            const el = book.querySelector(sel);
+            const text = el ? (el.value || el.innerText || "").trim() : "";
+            if (text) return text;
+        }
+        return null;
+    };
+    const count = textIn(countSelectors);
+    const digits = count ? count.replace(/[^0-9]/g, "") : "";
+    return {
+        annotated: textIn(annotatedSelectors),
+        count: digits ? parseInt(digits, 10) : null,
+    };
+}
+"""
+
+# Scrolls the library sidebar to its last book, which makes the page fetch
+# the next batch of books, and returns {"count", "more"}: the books listed
+# so far, and false once the next-page marker is present but empty.
+LIBRARY_SCROLL_JS = """
+({bookSelectors, nextPageSelector}) => {
+    let books = [];
+    for (const sel of bookSelectors) {
+        books = Array.from(document.querySelectorAll(sel));
+        if (books.length) break;
+    }
+    if (books.length) books[books.length - 1].scrollIntoView({block: "end"});
+    const next = document.querySelector(nextPageSelector);
+    return {
+        count: books.length,
+        more: !next || Boolean((next.value || next.innerText || "").trim()),
+    };
+}
+"""
+
+# True once more than `count` books are listed (for page.wait_for_function).
+LIBRARY_GROWN_JS = """
+({bookSelectors, count}) => {
+    for (const sel of bookSelectors) {
+        const listed = document.querySelectorAll(sel).length;
+        if (listed) return listed > count;
+    }
+    return false;
+}
+"""
+
+# True once the annotations pane's hidden ASIN input shows `asin` (for
+# page.wait_for_function).
+ANNOTATIONS_SWITCHED_JS = """
+({selector, asin}) => {
+    const el = document.querySelector(selector);
+    return Boolean(el) && el.value === asin;
+}
+"""
+
+# Returns the text of the first highlight on the page, or null.
+FIRST_HIGHLIGHT_TEXT_JS = """
+(highlightSelectors) => {
+    for (const sel of highlightSelectors) {
+        const el = document.querySelector(sel);
+        if (el) return el.innerText.trim();
+    }
+    return null;
+}
+"""
+
+# True once a first highlight is shown whose text is not `previous` (for
+# page.wait_for_function).
+HIGHLIGHTS_CHANGED_JS = f"""
+({{highlightSelectors, previous}}) => {{
+    const text = ({FIRST_HIGHLIGHT_TEXT_JS.strip()})(highlightSelectors);
+    return text !== null && text !== previous;
+}}
+"""
+
+
+# Returns {"highlights": [{"text", "header"}], "headers": [...]}.
+# "header" is the time header inside the highlight's own annotation row,
+# "headers" holds the first page-wide match of each time selector.
+ANNOTATIONS_JS = """
+({highlightSelectors, timeSelectors, limit}) => {
+    let elements = [];
+    for (const sel of highlightSelectors) {
+        elements = Array.from(document.querySelectorAll(sel));
+        if (elements.length) break;
+    }
+    const headerIn = root => {
+        if (!root) return null;
+        for (const sel of timeSelectors) {
+            const el = root.querySelector(sel);
+            if (el) return el.innerText;
+        }
+        return null;
+    };
+    return {
+        highlights: elements.slice(0, limit).map(el => ({
+            text: el.innerText.trim(),
+            header: headerIn(el.closest(".a-row.a-spacing-base, .kp-notebook-row-separator")),
+        })),
+        headers: timeSelectors.map(sel => {
+            const el = document.querySelector(sel);
+            return el ? el.innerText : null;
+        }),
+    };
+}
+"""
+
+
+def library_args(
+    book_selectors: list[str],
+    title_selectors: list[str],
+    annotated_selectors: list[str],
+    count_selectors: list[str],
+) -> dict:
+    """Build the argument object for LIBRARY_JS."""
+    return {
+        "bookSelectors": book_selectors,
+        "titleSelectors": title_selectors,
+        "annotatedSelectors": annotated_selectors,
+        "countSelectors": count_selectors,
+    }
+
+
+def fingerprint_args(annotated_selectors: list[str], count_selectors: list[str]) -> dict:
+    """Build the argument object for BOOK_FINGERPRINT_JS."""
+    return {"annotatedSelectors": annotated_selectors, "countSelectors": count_selectors}
+
+
+def library_scroll_args(
+    book_selectors: list[str],
+    next_page_selector: str,
+    count: int = 0,
+) -> dict:
+    """Build the argument object for LIBRARY_SCROLL_JS and LIBRARY_GROWN_JS."""
+    return {
+        "bookSelectors": book_selectors,
+        "nextPageSelector": next_page_selector,
+        "count": count,
+    }
+
+
+def annotations_switched_args(selector: str, asin: str) -> dict:
+    """Build the argument object for ANNOTATIONS_SWITCHED_JS."""
+    return {"selector": selector, "asin": asin}
+
+
+def highlights_changed_args(highlight_selectors: list[str], previous: Optional[str]) -> dict:
+    """Build the argument object for HIGHLIGHTS_CHANGED_JS."""
+    return {"highlightSelectors": highlight_selectors, "previous": previous}
+
+
+def annotations_args(
+    highlight_selectors: list[str],
+    time_selectors: list[str],
+    limit: int = 5,
+) -> dict:
+    """Build the argument object for ANNOTATIONS_JS."""
+    return {
+        "highlightSelectors": highlight_selectors,
+        "timeSelectors": time_selectors,
+        "limit": limit,
+    }
@@ -0,0 +1,159 @@
+"""Per-book change fingerprints for incremental scraping.
+
+The notebook's library sidebar shows when each book was last annotated
+(and, on some layouts, how many highlights it has) without opening it.
+Once a run has read a book and its highlight is stored, BookFingerprints
+records those sidebar fields per ASIN in data/book_fingerprints.json:
+
+    {"version": 1, "regions": {"com": {"B00...": {"annotated": "...", "count": 12}}}}
+
+The next run opens only the books whose sidebar fields differ from the
+recorded ones, so a run in which nothing was highlighted opens no book
+at all. A book whose sidebar shows neither field (or has no ASIN) is
+always opened, since there is nothing to compare. A full scan opens every
+book and records fresh fingerprints.
+
+The scraper only marks books in memory, and only books whose view loaded
+and was read. Whoever stores the highlights calls save() once they are
+committed, so a run that fails before then opens the same books again.
+"""
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .jsonio import read_json, write_json
+from .metrics import Metrics, get_metrics
+from .utils import get_book_fingerprints_path
+
+
+FINGERPRINTS_VERSION = 1
+FINGERPRINT_FIELDS = ("annotated", "count")
+
+
+def _read(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    try:
+        return read_json(path)
+    except Exception as e:
+        print(f"Could not read book fingerprints, opening every book: {e}")
+        return None
+
+
+def fingerprint(book: dict) -> Optional[dict]:
+    """Return the sidebar fields that change when a book gets a highlight.
+
+    Returns:
+        {"annotated", "count"}, or None if the book has no ASIN or the
+        sidebar showed neither field
+    """
+    fields = {name: book.get(name) for name in FINGERPRINT_FIELDS}
+    if not book.get("asin") or all(value is None for value in fields.values()):
+        return None
+    return fields
+
+
+class BookFingerprints:
+    """Recorded sidebar fingerprints for one region's library.
+
+    A BookFingerprints created directly, without a path, has no records
+    (every book is opened) and is never saved.
+
+    Usage:
+        fingerprints = BookFingerprints.load(region)
+        for book in fingerprints.select(library):
+            ...open and read the book...
+            fingerprints.mark(book)
+        fingerprints.report()
+        ...store the highlights...
+        fingerprints.save()
+    """
+
+    def __init__(
+        self,
+        region: str,
+        data: Optional[dict] = None,
+        path: Optional[Path] = None,
+        full: bool = False,
+    ):
+        self.region = region
+        self.path = Path(path) if path else None
+        self.full = full
+        self.data = data if data and data.get("version") == FINGERPRINTS_VERSION else {
+            "version": FINGERPRINTS_VERSION, "regions": {},
+        }
+        self.books: dict[str, dict] = self.data["regions"].setdefault(region, {})
+        self.unchanged = 0
+        self.marked = 0
+
+    @classmethod
+    def load(
+        cls,
+        region: str,
+        path: Optional[Path] = None,
+        full: bool = False,
+    ) -> "BookFingerprints":
+        """Load the fingerprints file, starting empty if it is missing or unreadable.
+
+        Args:
+            region: Amazon region the library belongs to
+            path: Fingerprints file (defaults to data/book_fingerprints.json)
+            full: Open every book, but still record fresh fingerprints
+        """
+        path = Path(path or get_book_fingerprints_path())
+        return cls(region, _read(path), path, full)
+
+    def changed(self, book: dict) -> bool:
+        """Whether the book's sidebar fields differ from the recorded ones."""
+        current = fingerprint(book)
+        return current is None or self.books.get(book["asin"]) != current
+
+    def visit(self, book: dict) -> bool:
+        """Whether to open the book; counts the unchanged books it turns down."""
+        if self.full or self.changed(book):
+            return True
+        self.unchanged += 1
+        return False
+
+    def opens_every_book(self) -> bool:
+        """Whether every listed book will be opened (full scan, or nothing recorded)."""
+        return self.full or not self.books
+
+    def select(self, books: Iterable[dict]) -> list[dict]:
+        """Return the books to open, in library order."""
+        return [book for book in books if self.visit(book)]
+
+    def mark(self, book: dict) -> None:
+        """Record a book's fingerprint once its view has loaded and been read.
+
+        Kept in memory until save().
+        """
+        current = fingerprint(book)
+        if current is not None:
+            self.books[book["asin"]] = current
+            self.marked += 1
+
+    def report(self, timer: Optional[Metrics] = None) -> None:
+        """Print how many books were skipped and add them to the metrics."""
+        timer = timer or get_metrics()
+        print(
+            f"Book fingerprints (amazon.{self.region}): skipped {self.unchanged} "
+            f"unchanged books, read {self.marked}"
+        )
+        timer.incr("books_unchanged", self.unchanged)
+
+    def save(self) -> None:
+        """Write this region's fingerprints if any books were marked.
+
+        Call it only once the highlights of the marked books are stored.
+        The file is re-read first, so fingerprints another region saved in
+        the meantime are kept.
+        """
+        if not self.marked or self.path is None:
+            return
+        data = _read(self.path)
+        if not data or data.get("version") != FINGERPRINTS_VERSION:
+            data = self.data
+        data["regions"][self.region] = self.books
+        write_json(data, self.path)
+        self.marked = 0
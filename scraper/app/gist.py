@@ -2,46 +2,168 @@
 
 import os
 import json
-import urllib.request
-import urllib.error
+import hashlib
+from pathlib import Path
 from typing import Optional
 
-from .utils import get_latest_path, load_json
+from .github_client import GitHubAPIError, GitHubClient
+from .shards import INDEX_FILENAME
+from .utils import get_gist_state_path, get_latest_path, get_shards_dir, load_json, save_json
+
+
+def content_hash(data: dict) -> str:
+    """Hash the uploaded content, ignoring the updated_at timestamp.
+    
+    Two payloads that differ only in updated_at hash the same, so a run
+    that found nothing new does not need to upload.
+    """
+    content = {k: v for k, v in data.items() if k != "updated_at"}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def encode_content(data: dict, minify: bool = False) -> str:
+    """Serialise data as the Gist file content (compact or indented JSON)."""
+    if minify:
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def payload_size(files: dict[str, Optional[str]]) -> int:
+    """Size of a files PATCH: the encoded contents plus the JSON envelope.
+    
+    Escaping inside the contents is not counted, so this slightly
+    undercounts content with quotes or newlines, but it avoids encoding
+    the whole payload a second time just to measure it.
+    """
+    envelope = {
+        "files": {
+            name: None if content is None else {"content": ""}
+            for name, content in files.items()
+        }
+    }
+    contents = sum(len(content.encode("utf-8")) for content in files.values() if content)
+    return len(json.dumps(envelope).encode("utf-8")) + contents
+
+
+def load_upload_state() -> dict:
+    """Load the Gist upload state, or an empty one if there is none."""
+    path = get_gist_state_path()
+    try:
+        if path.exists():
+            return load_json(path)
+    except Exception as e:
+        print(f"Could not load Gist upload state: {e}")
+    return {}
+
+
+def save_upload_state(state: dict) -> None:
+    """Save the Gist upload state."""
+    save_json(state, get_gist_state_path())
+
+
+def resolve_credentials(
+    gist_id: Optional[str] = None,
+    github_token: Optional[str] = None,
+) -> tuple[str, str]:
+    """Fill in the Gist ID and token from the environment and validate them.
+    
+    Raises:
+        ValueError: If either is missing
+    """
+    gist_id = gist_id or os.environ.get("GIST_ID")
+    github_token = github_token or os.environ.get("GITHUB_TOKEN")
+    
+    if not gist_id:
+        raise ValueError(
+            "Gist ID is required. Set GIST_ID environment variable or pass gist_id parameter."
+        )
+    
+    if not github_token:
+        raise ValueError(
+            "GitHub token is required. Set GITHUB_TOKEN environment variable or pass github_token parameter."
+        )
+    
+    return gist_id, github_token
+
+
+def patch_gist_files(
+    gist_id: str,
+    github_token: str,
+    files: dict[str, Optional[str]],
+    client: Optional[GitHubClient] = None,
+) -> dict:
+    """Update several files of a Gist in one PATCH request.
+    
+    Args:
+        gist_id: The Gist ID
+        github_token: GitHub personal access token
+        files: {filename: content}; a content of None deletes the file
+        client: GitHub client to reuse (a new one is opened and closed
+            for this call if not provided)
+        
+    Returns:
+        The decoded API response
+        
+    Raises:
+        RuntimeError: If the upload fails
+    """
+    payload = {
+        "files": {
+            name: None if content is None else {"content": content}
+            for name, content in files.items()
+        }
+    }
+    
+    own_client = client is None
+    client = client or GitHubClient(github_token)
+    
+    try:
+        return client.request("PATCH", f"/gists/{gist_id}", payload) or {}
+    except GitHubAPIError as e:
+        if e.status == 0:
+            raise RuntimeError(f"Network error uploading to Gist: {e.reason}")
+        raise RuntimeError(
+            f"Failed to upload to Gist: {e.status} {e.reason}\n{e.body}"
+        )
+    finally:
+        if own_client:
+            client.close()
 
 
 def upload_to_gist(
     gist_id: Optional[str] = None,
     github_token: Optional[str] = None,
     data: Optional[dict] = None,
-    filename: str = "latest.json"
+    filename: str = "latest.json",
+    minify: bool = False,
+    force: bool = False,
+    client: Optional[GitHubClient] = None,
 ) -> str:
     """Upload data to a GitHub Gist.
     
+    The content hash and encoding of the last upload are kept in
+    data/gist_state.json, and the PATCH is skipped when nothing but
+    updated_at has changed.
+    
     Args:
         gist_id: The Gist ID (from env GIST_ID if not provided)
         github_token: GitHub personal access token (from env GITHUB_TOKEN if not provided)
         data: Data to upload (loads from latest.json if not provided)
         filename: Filename in the gist
+        minify: Upload compact JSON instead of indented JSON
+        force: Upload even if the content is unchanged
+        client: GitHub client to reuse across uploads (a new one is opened
+            and closed for this call if not provided)
         
     Returns:
-        The raw URL of the uploaded file
+        The raw URL of the uploaded file (the last known URL when skipped)
         
     Raises:
         ValueError: If required parameters are missing
         RuntimeError: If upload fails
     """
-    gist_id = gist_id or os.environ.get("GIST_ID")
-    github_token = github_token or os.environ.get("GITHUB_TOKEN")
-    
-    if not gist_id:
-        raise ValueError(
-            "Gist ID is required. Set GIST_ID environment variable or pass gist_id parameter."
-        )
-    
-    if not github_token:
-        raise ValueError(
-            "GitHub token is required. Set GITHUB_TOKEN environment variable or pass github_token parameter."
-        )
+    gist_id, github_token = resolve_credentials(gist_id, github_token)
     
     if data is None:
         latest_path = get_latest_path()
@@ -49,54 +171,122 @@ def upload_to_gist(
             raise FileNotFoundError(f"No data file found at {latest_path}")
         data = load_json(latest_path)
     
-    content = json.dumps(data, indent=2, ensure_ascii=False)
+    state = load_upload_state()
+    state_key = f"{gist_id}/{filename}"
+    file_state = state.setdefault("files", {}).setdefault(state_key, {})
+    digest = content_hash(data)
     
-    payload = {
-        "files": {
-            filename: {
-                "content": content
-            }
-        }
-    }
+    unchanged = file_state.get("hash") == digest and file_state.get("minify", False) == minify
+    if not force and unchanged:
+        state["requests_avoided"] = state.get("requests_avoided", 0) + 1
+        save_upload_state(state)
+        print(f"Gist content unchanged, skipping upload of {filename}")
+        print(
+            f"Upload stats: {state.get('bytes_sent', 0)} bytes sent, "
+            f"{state['requests_avoided']} requests avoided"
+        )
+        return file_state.get("raw_url", "")
     
-    url = f"https://api.github.com/gists/{gist_id}"
+    content = encode_content(data, minify)
+    response_data = patch_gist_files(gist_id, github_token, {filename: content}, client)
     
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {github_token}",
-        "X-GitHub-Api-Version": "2022-11-28",
-        "Content-Type": "application/json",
-    }
+    files = response_data.get("files", {})
+    file_info = files.get(filename, {})
+    raw_url = file_info.get("raw_url", "")
     
-    request_data = json.dumps(payload).encode("utf-8")
+    print(f"Successfully uploaded to Gist: {gist_id}")
+    print(f"Raw URL: {raw_url}")
     
-    req = urllib.request.Request(
-        url,
-        data=request_data,
-        headers=headers,
-        method="PATCH"
+    sent = payload_size({filename: content})
+    file_state.update({"hash": digest, "minify": minify, "raw_url": raw_url})
+    state["bytes_sent"] = state.get("bytes_sent", 0) + sent
+    save_upload_state(state)
+    print(
+        f"Upload stats: {sent} bytes sent this run, "
+        f"{state['bytes_sent']} total, "
+        f"{state.get('requests_avoided', 0)} requests avoided"
     )
     
-    try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            response_data = json.loads(response.read().decode("utf-8"))
-            
-            files = response_data.get("files", {})
-            file_info = files.get(filename, {})
-            raw_url = file_info.get("raw_url", "")
-            
-            print(f"Successfully uploaded to Gist: {gist_id}")
-            print(f"Raw URL: {raw_url}")
-            
-            return raw_url
-            
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode("utf-8") if e.fp else ""
-        raise RuntimeError(
-            f"Failed to upload to Gist: {e.code} {e.reason}\n{error_body}"
-        )
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"Network error uploading to Gist: {e.reason}")
+    return raw_url
+
+
+def upload_shards_to_gist(
+    manifest: dict,
+    shards_dir: Optional[Path] = None,
+    gist_id: Optional[str] = None,
+    github_token: Optional[str] = None,
+    force: bool = False,
+    client: Optional[GitHubClient] = None,
+) -> int:
+    """Upload index.json plus the shards whose hash changed since last upload.
+    
+    Shard hashes from the manifest are compared with the hashes recorded
+    for the last successful upload, so unchanged shards are never re-sent.
+    Shards that are no longer in the manifest are deleted from the Gist.
+    
+    Args:
+        manifest: Manifest returned by shards.write_shards
+        shards_dir: Directory holding the shard files (defaults to data/shards)
+        gist_id: The Gist ID (from env GIST_ID if not provided)
+        github_token: GitHub personal access token (from env GITHUB_TOKEN if not provided)
+        force: Upload every shard even if unchanged
+        client: GitHub client to reuse across uploads
+        
+    Returns:
+        Number of files sent (0 when everything was unchanged)
+    """
+    gist_id, github_token = resolve_credentials(gist_id, github_token)
+    shards_dir = Path(shards_dir or get_shards_dir())
+    
+    state = load_upload_state()
+    uploaded = state.setdefault("files", {})
+    prefix = f"{gist_id}/"
+    
+    files: dict[str, Optional[str]] = {}
+    hashes: dict[str, Optional[str]] = {}
+    
+    for entry in manifest.get("books", []):
+        key = prefix + entry["shard"]
+        if force or uploaded.get(key, {}).get("hash") != entry["hash"]:
+            files[entry["shard"]] = (shards_dir / entry["shard"]).read_text(encoding="utf-8")
+            hashes[entry["shard"]] = entry["hash"]
+    
+    current = {entry["shard"] for entry in manifest.get("books", [])}
+    for key, info in uploaded.items():
+        name = key[len(prefix):]
+        if key.startswith(prefix) and info.get("shard") and name not in current:
+            files[name] = None
+            hashes[name] = None
+    
+    index_hash = content_hash(manifest)
+    index_key = prefix + INDEX_FILENAME
+    if files or force or uploaded.get(index_key, {}).get("hash") != index_hash:
+        files[INDEX_FILENAME] = json.dumps(manifest, separators=(",", ":"), ensure_ascii=False)
+    
+    if not files:
+        state["requests_avoided"] = state.get("requests_avoided", 0) + 1
+        save_upload_state(state)
+        print("Shards unchanged, skipping Gist upload")
+        return 0
+    
+    sent = payload_size(files)
+    patch_gist_files(gist_id, github_token, files, client)
+    
+    for name, digest in hashes.items():
+        if digest is None:
+            uploaded.pop(prefix + name, None)
+        else:
+            uploaded[prefix + name] = {"hash": digest, "shard": True}
+    uploaded[index_key] = {"hash": index_hash}
+    state["bytes_sent"] = state.get("bytes_sent", 0) + sent
+    save_upload_state(state)
+    
+    skipped = len(current - set(files))
+    print(
+        f"Uploaded {len(files)} files ({sent} bytes) to Gist: {gist_id}, "
+        f"{skipped} unchanged shards skipped"
+    )
+    return len(files)
 
 
 def get_gist_raw_url(gist_id: str, filename: str = "latest.json") -> str:
@@ -0,0 +1,227 @@
+"""Small keep-alive GitHub API client with retries and rate-limit throttling."""
+
+import http.client
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_API_URL = "https://api.github.com"
+RETRY_STATUSES = {500, 502, 503, 504}
+CONNECTION_ERRORS = (http.client.HTTPException, OSError)
+
+
+def get_api_url() -> str:
+    """Get the GitHub API base URL (GITHUB_API_URL, as set in Actions)."""
+    return os.environ.get("GITHUB_API_URL", DEFAULT_API_URL).rstrip("/")
+
+
+class GitHubAPIError(RuntimeError):
+    """A GitHub API request failed after all retries."""
+
+    def __init__(self, status: int, reason: str, body: str = ""):
+        super().__init__(f"{status} {reason}\n{body}".rstrip())
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+def is_secondary_rate_limit(status: int, headers: dict, body: str) -> bool:
+    """Check whether a 403/429 response is a rate limit rather than a denial."""
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    return (
+        "retry-after" in headers
+        or headers.get("x-ratelimit-remaining") == "0"
+        or "rate limit" in body.lower()
+    )
+
+
+class GitHubClient:
+    """GitHub REST client that reuses one connection across requests.
+
+    5xx responses, secondary rate limits and dropped connections are retried
+    with jittered exponential backoff, and no retry waits longer than
+    `backoff_max`: a Retry-After or rate-limit reset further away than that
+    fails the request instead. X-RateLimit-Remaining/Reset from each
+    response are tracked, and requests are spaced out once the remaining
+    quota drops to `min_remaining`, so the limit itself is never hit.
+
+    Usage:
+        with GitHubClient(token) as client:
+            client.request("PATCH", f"/gists/{gist_id}", payload)
+    """
+
+    def __init__(
+        self,
+        token: str,
+        api_url: Optional[str] = None,
+        timeout: float = 30,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        min_remaining: int = 10,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        parsed = urlparse(api_url or get_api_url())
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.base_path = parsed.path.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_remaining = min_remaining
+        self.sleep = sleep
+
+        self.rate_remaining: Optional[int] = None
+        self.rate_reset: Optional[float] = None
+        self.requests_sent = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def __enter__(self) -> "GitHubClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self.scheme == "http":
+                self._conn = http.client.HTTPConnection(self.host, timeout=self.timeout)
+            else:
+                self._conn = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return self._conn
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_delay(self, attempt: int, headers: dict) -> float:
+        """Delay before retrying, honouring Retry-After and X-RateLimit-Reset.
+
+        May exceed backoff_max; the caller gives up in that case.
+        """
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        if headers.get("x-ratelimit-remaining") == "0" and self.rate_reset:
+            return max(0.0, self.rate_reset - time.time())
+        return self._backoff(attempt)
+
+    def _record_rate_limit(self, headers: dict) -> None:
+        try:
+            self.rate_remaining = int(headers["x-ratelimit-remaining"])
+            self.rate_reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            pass
+
+    def _throttle(self) -> None:
+        """Spread the remaining quota over the time left until it resets.
+
+        No single wait is longer than backoff_max; once the quota is used
+        up, the retry path decides whether the reset is worth waiting for.
+        """
+        if self.rate_remaining is None or self.rate_reset is None:
+            return
+        if self.rate_remaining > self.min_remaining:
+            return
+        window = self.rate_reset - time.time()
+        if window <= 0:
+            return
+        delay = min(window / (self.rate_remaining + 1), self.backoff_max)
+        print(
+            f"GitHub rate limit low ({self.rate_remaining} left), "
+            f"waiting {delay:.1f}s"
+        )
+        self.sleep(delay)
+
+    def request(self, method: str, path: str, payload: Optional[Any] = None) -> Any:
+        """Send an API request and return the decoded JSON response.
+
+        Args:
+            method: HTTP method
+            path: API path, e.g. '/gists/<id>'
+            payload: JSON-serialisable request body (optional)
+
+        Returns:
+            Decoded JSON response body (None for empty bodies)
+
+        Raises:
+            GitHubAPIError: If the request fails after all retries
+        """
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.token}",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "Connection": "keep-alive",
+        }
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+
+        attempt = 0
+        while True:
+            self._throttle()
+            try:
+                conn = self._connection()
+                conn.request(method, self.base_path + path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read().decode("utf-8")
+            except CONNECTION_ERRORS as e:
+                self.close()
+                if attempt >= self.max_retries:
+                    raise GitHubAPIError(0, str(e))
+                delay = self._backoff(attempt)
+                print(f"GitHub connection error ({e}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+                attempt += 1
+                self.retries += 1
+                continue
+
+            self.requests_sent += 1
+            self.bytes_sent += len(body or b"")
+            response_headers = {k.lower(): v for k, v in response.getheaders()}
+            self._record_rate_limit(response_headers)
+
+            if response_headers.get("connection", "").lower() == "close":
+                self.close()
+
+            if 200 <= response.status < 300:
+                return json.loads(data) if data else None
+
+            retryable = response.status in RETRY_STATUSES or is_secondary_rate_limit(
+                response.status, response_headers, data
+            )
+            if not retryable or attempt >= self.max_retries:
+                raise GitHubAPIError(response.status, response.reason, data)
+
+            delay = self._retry_delay(attempt, response_headers)
+            if delay > self.backoff_max:
+                raise GitHubAPIError(
+                    response.status,
+                    f"{response.reason} (retry would wait {delay:.0f}s, "
+                    f"over the {self.backoff_max:.0f}s limit)",
+                    data,
+                )
+            print(f"GitHub returned {response.status}, retrying in {delay:.1f}s")
+            self.sleep(delay)
+            attempt += 1
+            self.retries += 1
@@ -0,0 +1,151 @@
+"""Incremental latest-highlight-per-book index."""
+
+from bisect import bisect_left, insort
+from typing import Iterable, Optional
+
+from .utils import utc_now
+
+
+def _sort_time(hl: dict) -> str:
+    return hl.get("highlight_time") or hl.get("fetched_at") or ""
+
+
+def is_newer(hl: dict, existing: dict) -> bool:
+    """Whether `hl` should replace `existing` as a book's latest highlight.
+
+    Mirrors build.deduplicate_highlights: a strictly newer time wins, a
+    timed highlight beats an untimed one, and ties keep the existing one.
+    """
+    new_time = _sort_time(hl)
+    existing_time = _sort_time(existing)
+    if new_time and existing_time:
+        return new_time > existing_time
+    return bool(new_time)
+
+
+class LatestIndex:
+    """One highlight per book, kept ordered newest first as items arrive.
+
+    Books live in a dict, and their recency keys in a list kept sorted with
+    bisect, so an insert is a dict lookup plus a binary search, and top_k
+    only slices the tail of the list. Ties are ordered by when each book
+    was first seen, which matches build.deduplicate_highlights followed by
+    build.sort_by_recency.
+
+    Usage:
+        index = LatestIndex.from_output(load_json(get_latest_path()))
+        index.update(new_highlights)
+        save_json(index.to_output(), get_latest_path())
+    """
+
+    def __init__(self, highlights: Iterable[dict] = ()):
+        self._latest: dict[str, dict] = {}
+        self._seq: dict[str, int] = {}
+        # Ascending (sort_time, -seq, book_title); the newest is at the end.
+        self._keys: list[tuple[str, int, str]] = []
+        self.update(highlights)
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def __contains__(self, book_title: str) -> bool:
+        return book_title in self._latest
+
+    def get(self, book_title: str) -> Optional[dict]:
+        """Return the latest highlight for a book, if any."""
+        return self._latest.get(book_title)
+
+    def _key(self, book_title: str, hl: dict) -> tuple[str, int, str]:
+        return (_sort_time(hl), -self._seq[book_title], book_title)
+
+    def insert(self, hl: dict) -> bool:
+        """Add a highlight, replacing its book's entry if it is newer.
+
+        Args:
+            hl: Highlight dictionary
+
+        Returns:
+            True if the index changed
+        """
+        title = hl.get("book_title", "")
+        if not title:
+            return False
+
+        existing = self._latest.get(title)
+        if existing is None:
+            self._seq[title] = len(self._seq)
+        elif is_newer(hl, existing):
+            old_key = self._key(title, existing)
+            del self._keys[bisect_left(self._keys, old_key)]
+        else:
+            return False
+
+        self._latest[title] = hl
+        insort(self._keys, self._key(title, hl))
+        return True
+
+    def update(self, highlights: Iterable[dict]) -> int:
+        """Insert many highlights.
+
+        Returns:
+            Number of inserts that changed the index
+        """
+        return sum(1 for hl in highlights if self.insert(hl))
+
+    def top_k(self, k: int) -> list[dict]:
+        """Return the k most recent entries, newest first."""
+        if k <= 0:
+            return []
+        return [self._latest[title] for _, _, title in self._keys[:-k - 1:-1]]
+
+    def items(self) -> list[dict]:
+        """Return every entry, newest first."""
+        return [self._latest[title] for _, _, title in reversed(self._keys)]
+
+    def first_seen(self) -> list[str]:
+        """Return the book titles in the order they were first seen (the tie order)."""
+        return sorted(self._seq, key=self._seq.__getitem__)
+
+    def to_output(self, updated_at: Optional[str] = None) -> dict:
+        """Serialise to the latest.json structure."""
+        return {
+            "updated_at": updated_at or utc_now(),
+            "items": self.items(),
+        }
+
+    @classmethod
+    def from_output(cls, data: dict, first_seen: Optional[list[str]] = None) -> "LatestIndex":
+        """Restore an index from a latest.json structure.
+
+        The items are already one per book and newest first, so the index
+        is filled directly and sorted once instead of inserted item by item.
+
+        Args:
+            data: latest.json structure
+            first_seen: Book titles in the order they were first seen, as
+                saved from first_seen(). latest.json does not record it, so
+                without it the books are taken as first seen in item order,
+                and later ties may order differently from a full rebuild.
+        """
+        index = cls()
+        for hl in data.get("items", []):
+            title = hl.get("book_title", "")
+            if not title:
+                continue
+            if title in index._latest:
+                # Not a clean latest.json; fall back to a checked insert.
+                index._keys.sort()
+                index.insert(hl)
+                continue
+            index._seq[title] = len(index._seq)
+            index._latest[title] = hl
+            index._keys.append(index._key(title, hl))
+        if first_seen:
+            position = {title: i for i, title in enumerate(first_seen)}
+            ranked = sorted(
+                index._seq, key=lambda title: (position.get(title, len(position)), index._seq[title])
+            )
+            index._seq = {title: i for i, title in enumerate(ranked)}
+            index._keys = [index._key(title, hl) for title, hl in index._latest.items()]
+        index._keys.sort()
+        return index
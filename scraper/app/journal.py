@@ -0,0 +1,288 @@
+"""Append-only journal of stored highlights.
+
+Every highlight a run adds to the store (or gives a highlight time) is
+appended to data/journal/journal.jsonl as one compact JSON line carrying a
+monotonic sequence number, so a run writes only its new highlights:
+
+    {"seq": 42, "recorded_at": "...", "book_title": "...", ...}
+
+Once the journal passes COMPACT_THRESHOLD_BYTES it is compacted: its
+records are folded into snapshot.json (the latest.json view of everything
+journaled so far, plus the sequence number it covers and the order books
+were first seen in, so ties break as in a full rebuild) and moved,
+gzipped, to segments/<first seq>.jsonl.gz, which keeps the full history
+for audits and for readers tailing from an old sequence number. Appends carry on
+while a compaction runs in the background.
+
+There should only be one writing process per journal directory.
+"""
+
+import gzip
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .index import LatestIndex
+from .jsonio import atomic_write, dumps, loads, read_json, write_json
+from .utils import get_journal_dir, utc_now
+
+
+COMPACT_THRESHOLD_BYTES = 4 << 20
+# Bytes read from the end of the journal to find the last sequence number.
+TAIL_BYTES = 1 << 16
+SEQ_WIDTH = 12
+RECORD_FIELDS = ("seq", "recorded_at")
+
+
+def _highlight(record: dict) -> dict:
+    return {k: v for k, v in record.items() if k not in RECORD_FIELDS}
+
+
+def _complete_lines(data: bytes) -> list[bytes]:
+    # A line without its newline is a write that was cut short.
+    return data.split(b"\n")[:-1]
+
+
+def _parse_lines(lines: list[bytes]) -> Iterator[dict]:
+    for line in lines:
+        if line.strip():
+            yield loads(line)
+
+
+class HighlightJournal:
+    """Journal, snapshot and history segments in one directory.
+
+    Usage:
+        journal = HighlightJournal()
+        journal.append(new_highlights)
+        if journal.needs_compaction():
+            journal.compact_in_background()
+        for record in journal.iter_records(since=last_seen_seq):
+            ...
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        compact_threshold: int = COMPACT_THRESHOLD_BYTES,
+    ):
+        self.directory = Path(directory or get_journal_dir())
+        self.path = self.directory / "journal.jsonl"
+        self.snapshot_path = self.directory / "snapshot.json"
+        self.segments_dir = self.directory / "segments"
+        self.compact_threshold = compact_threshold
+        self._last_seq: Optional[int] = None
+        # Held while appending and while swapping in a compacted journal.
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+
+    def _recover(self) -> int:
+        """Drop a partly written last line and return the last sequence number."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+
+        tail_bytes = TAIL_BYTES
+        while size:
+            start = max(0, size - tail_bytes)
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                data = f.read()
+            if not data.endswith(b"\n"):
+                cut = data.rfind(b"\n")
+                if cut >= 0 or start == 0:
+                    size = start + cut + 1
+                    os.truncate(self.path, size)
+                    continue
+            lines = [line for line in _complete_lines(data) if line.strip()]
+            # The first line of a tail read may be cut at its start.
+            if lines and (start == 0 or len(lines) > 1):
+                return loads(lines[-1])["seq"]
+            if start == 0:
+                break
+            tail_bytes *= 4
+
+        return self.snapshot()["seq"]
+
+    def last_seq(self) -> int:
+        """Return the sequence number of the newest record (0 if none)."""
+        if self._last_seq is None:
+            with self._lock:
+                if self._last_seq is None:
+                    self._last_seq = self._recover()
+        return self._last_seq
+
+    def append(self, highlights: list[dict]) -> list[dict]:
+        """Append highlights as records with the next sequence numbers.
+
+        The records are fsynced before this returns.
+
+        Returns:
+            The records written
+        """
+        if not highlights:
+            return []
+
+        self.last_seq()
+        with self._lock:
+            recorded_at = utc_now()
+            records = [
+                {"seq": self._last_seq + i, "recorded_at": recorded_at, **_highlight(hl)}
+                for i, hl in enumerate(highlights, start=1)
+            ]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(b"".join(dumps(record, compact=True) + b"\n" for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+            self._last_seq = records[-1]["seq"]
+        return records
+
+    def is_empty(self) -> bool:
+        """Whether nothing was ever journaled or seeded here."""
+        return not self.last_seq() and not self.snapshot_path.exists()
+
+    def seed(self, highlights: list[dict]) -> bool:
+        """Start an empty journal from existing highlights (as sequence 0).
+
+        Returns:
+            True if a snapshot was written
+        """
+        if not self.is_empty():
+            return False
+        index = LatestIndex(highlights)
+        write_json(
+            {"seq": 0, **index.to_output(), "first_seen": index.first_seen()}, self.snapshot_path
+        )
+        return True
+
+    def snapshot(self) -> dict:
+        """Return the last compacted view: {"seq", "updated_at", "items", "first_seen"}."""
+        if not self.snapshot_path.exists():
+            return {"seq": 0, "updated_at": None, "items": []}
+        return read_json(self.snapshot_path)
+
+    def _segments(self) -> list[tuple[int, Path]]:
+        if not self.segments_dir.exists():
+            return []
+        return sorted(
+            (int(path.name.split(".")[0]), path)
+            for path in self.segments_dir.glob("*.jsonl.gz")
+        )
+
+    def iter_records(self, since: int = 0) -> Iterator[dict]:
+        """Yield the records after sequence number `since`, oldest first.
+
+        Compacted records are read back from the history segments, skipping
+        segments that end before `since`.
+        """
+        # Open the journal before listing segments: if a compaction moves
+        # its records into a new segment in between, they are read twice
+        # (and skipped by sequence number) rather than missed.
+        try:
+            journal = open(self.path, "rb")
+        except FileNotFoundError:
+            journal = None
+
+        last = since
+        try:
+            segments = self._segments()
+            for i, (_, path) in enumerate(segments):
+                if i + 1 < len(segments) and segments[i + 1][0] <= since + 1:
+                    continue
+                with gzip.open(path, "rb") as f:
+                    for record in _parse_lines(_complete_lines(f.read())):
+                        if record["seq"] > last:
+                            last = record["seq"]
+                            yield record
+
+            if journal is not None:
+                for record in _parse_lines(_complete_lines(journal.read())):
+                    if record["seq"] > last:
+                        last = record["seq"]
+                        yield record
+        finally:
+            if journal is not None:
+                journal.close()
+
+    def view(self) -> dict:
+        """Return the latest.json view of every record, with its sequence number.
+
+        The snapshot plus the records journaled since it was taken.
+        """
+        snapshot = self.snapshot()
+        index = LatestIndex.from_output(snapshot, snapshot.get("first_seen"))
+        seq, updated_at = snapshot["seq"], snapshot["updated_at"]
+        for record in self.iter_records(since=seq):
+            index.insert(_highlight(record))
+            seq, updated_at = record["seq"], record["recorded_at"]
+        return {"seq": seq, **index.to_output(updated_at)}
+
+    def needs_compaction(self) -> bool:
+        """Whether the journal has grown past the compaction threshold."""
+        try:
+            return self.path.stat().st_size >= self.compact_threshold
+        except FileNotFoundError:
+            return False
+
+    def compact(self) -> Optional[int]:
+        """Fold the journal into the snapshot and move it to a history segment.
+
+        Records appended while this runs stay in the journal.
+
+        Returns:
+            The sequence number the new snapshot covers, or None if the
+            journal was empty
+        """
+        with self._compact_lock:
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            cut = data.rfind(b"\n") + 1
+            records = list(_parse_lines(_complete_lines(data[:cut])))
+            if not records:
+                return None
+
+            snapshot = self.snapshot()
+            index = LatestIndex.from_output(snapshot, snapshot.get("first_seen"))
+            index.update(
+                _highlight(record) for record in records if record["seq"] > snapshot["seq"]
+            )
+            seq = max(snapshot["seq"], records[-1]["seq"])
+
+            # Snapshot first, then the segment, then the shorter journal: a
+            # crash in between leaves records that are folded in again
+            # (which changes nothing) rather than lost.
+            write_json(
+                {"seq": seq, **index.to_output(), "first_seen": index.first_seen()},
+                self.snapshot_path,
+            )
+            segment = self.segments_dir / f"{records[0]['seq']:0{SEQ_WIDTH}d}.jsonl.gz"
+            with atomic_write(segment) as f:
+                f.write(data[:cut])
+
+            with self._lock:
+                with open(self.path, "rb") as f:
+                    f.seek(cut)
+                    rest = f.read()
+                with atomic_write(self.path) as f:
+                    f.write(rest)
+
+        print(f"Compacted journal through seq {seq} into {segment.name}")
+        return seq
+
+    def compact_in_background(self) -> threading.Thread:
+        """Start compact() in a thread; the process waits for it before exiting."""
+        def run() -> None:
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Journal compaction failed: {e}")
+
+        thread = threading.Thread(target=run, name="journal-compaction")
+        thread.start()
+        return thread
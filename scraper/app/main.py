@@ -1,17 +1,53 @@
-"""Main entrypoint for the Kindle highlights scraper."""
+"""Main entrypoint for the Kindle highlights scraper.
+
+The pipeline runs in stages that can also be run on their own:
+
+    scrape  collect highlights (browser or My Clippings.txt) into the store
+    build   export latest.json (and shards) from the store, no browser
+    upload  upload the existing latest.json (and shards) to the Gist
+    sync    all of the above (the default when no command is given)
+    batch   sync every account listed in a config file (see app/batch.py)
+    search  query the full-text search index written by build --search-index
+    journal print journaled highlights after a sequence number, or compact
+
+Heavy modules (Playwright, SQLite, the GitHub client) are imported inside
+the stage that needs them, so `build` and `upload` start without loading
+a browser.
+"""
 
 import os
 import sys
+import time
 import argparse
+from pathlib import Path
+from typing import Optional
 
 from .utils import (
+    DEFAULT_MAX_BOOKS,
+    EXTRACTION_MODES,
     get_amazon_region,
     get_auth_path,
+    get_profile_path,
+    get_trace_path,
+    get_user_data_dir,
     decode_base64_to_file,
 )
-from .scraper import scrape_highlights, login_and_save_auth
-from .build import merge_with_existing, save_output
-from .gist import upload_to_gist
+from .fingerprints import BookFingerprints
+from .metrics import Metrics, get_metrics, reset_metrics
+from .publish import (
+    build_outputs,
+    publish_store,
+    store_highlights,
+    upload_outputs,
+)
+
+
+COMMANDS = ("scrape", "build", "upload", "sync", "batch", "search", "journal")
+
+# Options that --login and --daemon have no use for; given anyway, they are
+# rejected rather than silently dropped.
+LOGIN_UNUSED_OPTIONS = ("stream", "concurrency", "clippings", "daemon")
+DAEMON_UNUSED_OPTIONS = ("stream", "concurrency", "clippings", "trace", "profile")
 
 
 def setup_auth_from_env() -> bool:
@@ -30,80 +66,406 @@ def setup_auth_from_env() -> bool:
     return False
 
 
-def run_scraper(region: str, upload: bool = True) -> None:
-    """Run the full scraper pipeline.
+def start_web_session(
+    region: str,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+) -> None:
+    """Set up auth from the environment and exit if there is no session to use."""
+    from .browser import has_session
     
-    Args:
-        region: Amazon region ('com' or 'co.uk')
-        upload: Whether to upload to Gist
-    """
     print(f"Starting Kindle highlights scraper for amazon.{region}")
     print("-" * 50)
     
     setup_auth_from_env()
     
     auth_path = get_auth_path()
-    if not auth_path.exists():
+    if not has_session(user_data_dir, cdp_url, auth_path):
         print(f"Error: Auth file not found at {auth_path}")
         print("Run with --login flag to generate auth.json locally")
         sys.exit(1)
+
+
+def collect_from_web(
+    region: str,
+    concurrency: Optional[int] = None,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace: bool = False,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Scrape highlights from the Kindle Notebook.
+    
+    With fingerprints, only books whose library sidebar fingerprint changed
+    since they were last read are opened (see app/fingerprints.py).
+    
+    Args:
+        region: Amazon region ('com' or 'co.uk')
+        concurrency: Load this many books in parallel (None for sequential)
+        max_books: Maximum number of books to visit (None for all)
+        block_resources: Drop images, fonts, media and third-party trackers
+        extraction: 'dom' (element queries), 'evaluate' (in-page script) or
+            'capture' (parse annotation responses, DOM as fallback)
+        trace: Record a Playwright trace to data/trace.zip
+        user_data_dir: Use a persistent Chromium profile in this directory
+        cdp_url: Attach to an already running browser over CDP instead
+        fingerprints: Skip unchanged books and mark the ones read; the
+            caller saves it once the highlights are stored
+    
+    Returns:
+        Scraped highlight dictionaries
+    """
+    metrics = get_metrics()
+    trace_path = get_trace_path() if trace else None
+    
+    start_web_session(region, user_data_dir, cdp_url)
     
     print("Scraping highlights...")
-    highlights = scrape_highlights(region, headless=True)
+    with metrics.phase("scrape"):
+        if concurrency:
+            from .async_scraper import scrape_highlights_concurrent
+            
+            highlights = scrape_highlights_concurrent(
+                region,
+                headless=True,
+                concurrency=concurrency,
+                max_books=max_books,
+                block_resources=block_resources,
+                extraction=extraction,
+                trace_path=trace_path,
+                user_data_dir=user_data_dir,
+                cdp_url=cdp_url,
+                fingerprints=fingerprints,
+            )
+        else:
+            from .scraper import scrape_highlights
+            
+            highlights = scrape_highlights(
+                region,
+                headless=True,
+                max_books=max_books,
+                block_resources=block_resources,
+                extraction=extraction,
+                trace_path=trace_path,
+                user_data_dir=user_data_dir,
+                cdp_url=cdp_url,
+                fingerprints=fingerprints,
+            )
     
     if not highlights:
         print("Warning: No highlights scraped")
     
     print(f"Scraped {len(highlights)} highlights")
+    return highlights
+
+
+def stream_from_web(
+    region: str,
+    concurrency: Optional[int] = None,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace: bool = False,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> int:
+    """Scrape highlights and store each one as soon as its book has been read.
+    
+    Does what collect_from_web followed by store_highlights does, but with
+    the two stages overlapping (see app/pipeline.py). Takes the same
+    arguments as collect_from_web.
     
-    merged = merge_with_existing(highlights)
-    print(f"Total after merge/dedupe: {len(merged)} highlights")
+    Returns:
+        Number of highlights that were new or updated in the store
+    """
+    from .pipeline import store_stream, store_stream_async
     
-    output = save_output(merged)
-    print(f"Saved {len(output['items'])} items to latest.json")
+    metrics = get_metrics()
+    trace_path = get_trace_path() if trace else None
     
-    if upload:
-        gist_id = os.environ.get("GIST_ID")
-        github_token = os.environ.get("GITHUB_TOKEN")
-        
-        if gist_id and github_token:
-            print("Uploading to Gist...")
-            try:
-                raw_url = upload_to_gist()
-                print(f"Upload complete: {raw_url}")
-            except Exception as e:
-                print(f"Error uploading to Gist: {e}")
-                sys.exit(1)
+    start_web_session(region, user_data_dir, cdp_url)
+    
+    print("Scraping and storing highlights...")
+    with metrics.phase("scrape"):
+        if concurrency:
+            import asyncio
+            from .async_scraper import iter_highlights_async
+            
+            changed = asyncio.run(store_stream_async(iter_highlights_async(
+                region,
+                headless=True,
+                concurrency=concurrency,
+                max_books=max_books,
+                block_resources=block_resources,
+                extraction=extraction,
+                trace_path=trace_path,
+                user_data_dir=user_data_dir,
+                cdp_url=cdp_url,
+                fingerprints=fingerprints,
+            )))
         else:
-            print("Skipping Gist upload (GIST_ID or GITHUB_TOKEN not set)")
+            from .scraper import iter_highlights
+            
+            changed = store_stream(iter_highlights(
+                region,
+                headless=True,
+                max_books=max_books,
+                block_resources=block_resources,
+                extraction=extraction,
+                trace_path=trace_path,
+                user_data_dir=user_data_dir,
+                cdp_url=cdp_url,
+                fingerprints=fingerprints,
+            ))
+    
+    metrics.incr("highlights_stored", changed)
+    return changed
+
+
+def collect_from_clippings(
+    clippings_path: str,
+    full: bool = False,
+    workers: Optional[int] = None,
+) -> list[dict]:
+    """Read new highlights from a My Clippings.txt file.
+    
+    Args:
+        clippings_path: Path to My Clippings.txt
+        full: Ignore the saved checkpoint and re-parse the whole file
+        workers: Worker processes for full re-parses (defaults to CPU count)
+    
+    Returns:
+        Highlight dictionaries added since the last checkpoint
+    """
+    from .clippings import read_new_clippings
     
+    print(f"Reading Kindle clippings from {clippings_path}")
     print("-" * 50)
-    print("Done!")
+    
+    metrics = get_metrics()
+    with metrics.phase("clippings"):
+        highlights = read_new_clippings(Path(clippings_path), full=full, workers=workers)
+    metrics.incr("highlights_extracted", len(highlights))
+    return highlights
 
 
-def run_login(region: str) -> None:
+def run_login(
+    region: str,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+) -> None:
     """Run interactive login to generate auth.json.
     
     Args:
         region: Amazon region ('com' or 'co.uk')
+        user_data_dir: Log in inside this persistent Chromium profile
+        cdp_url: Log in inside an already running browser over CDP
     """
+    from .scraper import login_and_save_auth
+    
     print(f"Starting interactive login for amazon.{region}")
     print("-" * 50)
-    login_and_save_auth(region)
+    login_and_save_auth(region, user_data_dir, cdp_url)
 
 
-def main() -> None:
-    """Main entrypoint."""
-    parser = argparse.ArgumentParser(
-        description="Kindle Highlights Scraper"
+def _user_data_dir(args: argparse.Namespace) -> Optional[Path]:
+    return Path(args.user_data_dir) if args.user_data_dir else None
+
+
+def _max_books(args: argparse.Namespace) -> Optional[int]:
+    """Resolve --max-books: default 10, or all with --concurrency; 0 means all."""
+    max_books = args.max_books
+    if max_books is None:
+        max_books = None if args.concurrency else DEFAULT_MAX_BOOKS
+    return max_books or None
+
+
+def web_options(args: argparse.Namespace) -> dict:
+    """Keyword arguments for collect_from_web and stream_from_web."""
+    return {
+        "concurrency": args.concurrency,
+        "max_books": _max_books(args),
+        "block_resources": args.block_resources,
+        "extraction": args.extraction,
+        "trace": args.trace,
+        "user_data_dir": _user_data_dir(args),
+        "cdp_url": args.cdp_url,
+    }
+
+
+def collect(
+    args: argparse.Namespace,
+    region: str,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Collect highlights from the source selected by the parsed arguments."""
+    if args.clippings:
+        return collect_from_clippings(args.clippings, args.full_reparse, args.workers)
+    
+    return collect_from_web(region, fingerprints=fingerprints, **web_options(args))
+
+
+def collect_into_store(args: argparse.Namespace, region: str) -> int:
+    """Collect highlights into the store, streaming them in with --stream.
+    
+    Books read from the web are only recorded in data/book_fingerprints.json
+    once their highlights are stored, so a failed run reopens them.
+    
+    Returns:
+        Number of highlights that were new or updated in the store
+    """
+    if args.clippings:
+        return store_highlights(collect(args, region))
+    
+    fingerprints = BookFingerprints.load(region, full=args.full_scan)
+    if args.stream:
+        changed = stream_from_web(region, fingerprints=fingerprints, **web_options(args))
+    else:
+        changed = store_highlights(collect(args, region, fingerprints))
+    fingerprints.save()
+    return changed
+
+
+def run_batch_from_args(args: argparse.Namespace) -> None:
+    """Sync the accounts in the batch config; exit 1 if any of them failed."""
+    from .batch import run_batch
+    
+    results = run_batch(
+        Path(args.config),
+        concurrency=args.concurrency,
+        block_resources=args.block_resources,
+        upload=not args.no_upload,
+        minify=args.minify,
+        force_upload=args.force_upload,
+        shards=args.shards,
     )
+    if any(result["status"] != "ok" for result in results):
+        sys.exit(1)
+
+
+def run_pipeline(args: argparse.Namespace, region: str) -> None:
+    """Run the command selected by the parsed arguments."""
+    if args.command == "batch":
+        run_batch_from_args(args)
+    elif args.command == "scrape":
+        collect_into_store(args, region)
+    elif args.command == "build":
+        build_outputs(args.shards, args.search_index, args.collapse_variants, args.archive)
+    elif args.command == "upload":
+        if not upload_outputs(args.minify, args.force_upload, args.shards):
+            sys.exit(1)
+    else:
+        collect_into_store(args, region)
+        publish_store(
+            upload=not args.no_upload,
+            minify=args.minify,
+            force_upload=args.force_upload,
+            shards=args.shards,
+            search_index=args.search_index,
+            collapse_variants=args.collapse_variants,
+            archive=args.archive,
+        )
+
+
+def run_search(query: str, limit: int = 10, book_title: Optional[str] = None) -> None:
+    """Print the best matches for a query from the search index."""
+    from .search import SearchIndex
     
-    parser.add_argument(
-        "--login",
-        action="store_true",
-        help="Run interactive login to generate auth.json"
+    try:
+        index = SearchIndex()
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    results = index.search(query, limit=limit, book_title=book_title)
+    elapsed = (time.perf_counter() - start) * 1000
+    
+    for hit in results:
+        print(f"[{hit['score']:.2f}] {hit['book_title'][:50]} ({hit['highlight_time'][:10]})")
+        print(f"    {hit['highlight_text']}")
+    print(f"{len(results)} results in {elapsed:.1f}ms ({index.meta['doc_count']} highlights indexed)")
+
+
+def run_journal(since: int = 0, compact: bool = False, view: bool = False) -> None:
+    """Print journal records after a sequence number as JSON lines.
+    
+    Args:
+        since: Only print records with a higher sequence number
+        compact: Compact the journal into its snapshot instead
+        view: Print the latest.json view of the journal instead
+    """
+    from .journal import HighlightJournal
+    from .jsonio import dumps
+    
+    journal = HighlightJournal()
+    
+    if compact:
+        if journal.compact() is None:
+            print("Journal is empty, nothing to compact")
+        return
+    
+    if view:
+        sys.stdout.write(dumps(journal.view()).decode("utf-8") + "\n")
+        return
+    
+    for record in journal.iter_records(since=since):
+        sys.stdout.write(dumps(record, compact=True).decode("utf-8") + "\n")
+
+
+def run_daemon_from_args(args: argparse.Namespace, region: str) -> None:
+    """Start daemon mode with the options from the parsed arguments."""
+    from .daemon import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, run_daemon
+    
+    setup_auth_from_env()
+    
+    min_interval = args.min_interval or DEFAULT_MIN_INTERVAL
+    run_daemon(
+        region,
+        min_interval=min_interval,
+        max_interval=max(min_interval, args.max_interval or DEFAULT_MAX_INTERVAL),
+        max_books=DEFAULT_MAX_BOOKS if args.max_books is None else args.max_books or None,
+        block_resources=args.block_resources,
+        extraction=args.extraction,
+        prometheus_path=args.prometheus,
+        user_data_dir=_user_data_dir(args),
+        cdp_url=args.cdp_url,
+        full_scan=args.full_scan,
+        upload=not args.no_upload,
+        minify=args.minify,
+        force_upload=args.force_upload,
+        shards=args.shards,
+        search_index=args.search_index,
+        collapse_variants=args.collapse_variants,
+        archive=args.archive,
     )
+
+
+def save_profile(profiler, limit: int = 25) -> None:
+    """Dump cProfile stats to data/profile.pstats and print the top entries."""
+    import pstats
     
+    path = get_profile_path()
+    profiler.dump_stats(str(path))
+    print(f"Saved profile to {path} (view with: python -m pstats {path})")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(limit)
+
+
+def write_run_metrics(metrics: Metrics, prometheus_path: Optional[str] = None) -> None:
+    """Print the run metrics and write them to disk."""
+    print("-" * 50)
+    metrics.report()
+    metrics.write_json()
+    if prometheus_path:
+        metrics.write_prometheus(Path(prometheus_path))
+
+
+def add_source_options(parser: argparse.ArgumentParser) -> None:
+    """Options for collecting highlights (browser or My Clippings.txt)."""
     parser.add_argument(
         "--region",
         type=str,
@@ -111,20 +473,378 @@ def main() -> None:
         help="Amazon region (com or co.uk). Defaults to AMAZON_REGION env var or 'com'"
     )
     
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Load this many books in parallel with the async scraper"
+    )
+    
+    parser.add_argument(
+        "--max-books",
+        type=int,
+        default=None,
+        help=f"Maximum number of books to visit (default: {DEFAULT_MAX_BOOKS}, "
+             "or the whole library with --concurrency; 0 for no limit)"
+    )
+    
+    parser.add_argument(
+        "--block-resources",
+        action="store_true",
+        help="Drop images, fonts, media and third-party trackers while scraping"
+    )
+    
+    parser.add_argument(
+        "--extraction",
+        choices=EXTRACTION_MODES,
+        default="dom",
+        help="How to read the page: per-element queries (dom), one in-page "
+             "script per view (evaluate), or parse each book's annotations "
+             "response without rendering it (capture)"
+    )
+    
+    parser.add_argument(
+        "--user-data-dir",
+        nargs="?",
+        const=str(get_user_data_dir()),
+        default=None,
+        metavar="PATH",
+        help="Use a persistent Chromium profile so caches and refreshed cookies "
+             "survive between runs (default PATH: data/browser-profile)"
+    )
+    
+    parser.add_argument(
+        "--cdp-url",
+        type=str,
+        default=None,
+        help="Attach to an already running Chromium over CDP, "
+             "e.g. http://localhost:9222"
+    )
+    
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record a Playwright trace of the scrape to data/trace.zip"
+    )
+    
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Store each highlight as soon as its book has been read, while "
+             "the browser carries on with the rest of the library"
+    )
+    
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Open every book instead of only those whose last-annotated date "
+             "or highlight count changed since they were last read"
+    )
+    
+    parser.add_argument(
+        "--clippings",
+        type=str,
+        default=None,
+        help="Read highlights from a My Clippings.txt file instead of scraping"
+    )
+    
+    parser.add_argument(
+        "--full-reparse",
+        action="store_true",
+        help="Ignore the clippings checkpoint and re-parse the whole file"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for full clippings parses (default: CPU count)"
+    )
+
+
+def add_upload_options(parser: argparse.ArgumentParser) -> None:
+    """Options for the Gist upload."""
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Upload compact JSON instead of indented JSON"
+    )
+    
+    parser.add_argument(
+        "--force-upload",
+        action="store_true",
+        help="Upload to Gist even if the content is unchanged"
+    )
+
+
+def add_shards_option(parser: argparse.ArgumentParser) -> None:
+    """Option to write and upload per-book shards."""
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="Also write (or upload) index.json plus one shard file per book"
+    )
+
+
+def add_build_options(parser: argparse.ArgumentParser) -> None:
+    """Options for the extra outputs of the build stage."""
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="Also rebuild the full-text search index in data/search"
+    )
+    
+    parser.add_argument(
+        "--collapse-variants",
+        action="store_true",
+        help="Collapse overlapping or extended variants of a highlight to the "
+             "longest one in the shards and the search index"
+    )
+    
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Also write every stored highlight to PATH as compact JSON "
+             "(gzip-compressed if PATH ends in .gz)"
+    )
+
+
+def add_sync_options(parser: argparse.ArgumentParser) -> None:
+    """Options only meaningful for the full pipeline."""
     parser.add_argument(
         "--no-upload",
         action="store_true",
         help="Skip uploading to Gist"
     )
     
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep a warm browser running and re-poll the notebook on an "
+             "adaptive schedule until interrupted"
+    )
+    
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=None,
+        help="Daemon: seconds between polls while highlights keep changing (default: 120)"
+    )
+    
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=None,
+        help="Daemon: longest interval to back off to when nothing changes (default: 3600)"
+    )
+
+
+def add_run_options(parser: argparse.ArgumentParser) -> None:
+    """Metrics and profiling options shared by every command."""
+    parser.add_argument(
+        "--prometheus",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Also write run metrics as a Prometheus textfile to PATH"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run with cProfile and save stats to data/profile.pstats"
+    )
+
+
+def defer_to_top_level(
+    parser: argparse.ArgumentParser,
+    command: argparse.ArgumentParser,
+) -> None:
+    """Keep options given before the command name.
+    
+    argparse copies every default of a command's parser over the values
+    already parsed, so `--no-upload sync` would reset no_upload. Options the
+    top-level parser also has are only set by the command when given after it.
+    """
+    shared = {action.dest for action in parser._actions if action.option_strings}
+    for action in command._actions:
+        if action.option_strings and action.dest in shared:
+            action.default = argparse.SUPPRESS
+
+
+def reject_unused_options(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    mode: str,
+    options: tuple[str, ...],
+) -> None:
+    """Exit with a usage error if any of options was given along with mode."""
+    given = [
+        "--" + name.replace("_", "-")
+        for name in options
+        if getattr(args, name, None) not in (None, False)
+    ]
+    if given:
+        parser.error(f"{', '.join(given)} cannot be used with {mode}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser.
+    
+    Without a command the top-level options run the full pipeline, as the
+    CLI always has. Options for a command go after the command name.
+    """
+    parser = argparse.ArgumentParser(
+        description="Kindle Highlights Scraper"
+    )
+    
+    parser.add_argument(
+        "--login",
+        action="store_true",
+        help="Run interactive login to generate auth.json"
+    )
+    
+    add_source_options(parser)
+    add_upload_options(parser)
+    add_shards_option(parser)
+    add_build_options(parser)
+    add_sync_options(parser)
+    add_run_options(parser)
+    
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    
+    scrape = commands.add_parser(
+        "scrape", help="Collect highlights into the store (no export or upload)"
+    )
+    add_source_options(scrape)
+    add_run_options(scrape)
+    
+    build = commands.add_parser(
+        "build", help="Export latest.json (and shards) from the store, without a browser"
+    )
+    add_shards_option(build)
+    add_build_options(build)
+    add_run_options(build)
+    
+    upload = commands.add_parser(
+        "upload", help="Upload the existing latest.json (and shards) to the Gist"
+    )
+    add_upload_options(upload)
+    add_shards_option(upload)
+    add_run_options(upload)
+    
+    sync = commands.add_parser(
+        "sync", help="Collect, build and upload (the default without a command)"
+    )
+    add_source_options(sync)
+    add_upload_options(sync)
+    add_shards_option(sync)
+    add_build_options(sync)
+    add_sync_options(sync)
+    add_run_options(sync)
+    
+    batch = commands.add_parser(
+        "batch", help="Sync several accounts and regions from a JSON config file"
+    )
+    batch.add_argument("config", help="Path to the batch config (see app/batch.py)")
+    batch.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Accounts synced at the same time (overrides the config, default: 3)"
+    )
+    batch.add_argument(
+        "--block-resources",
+        action="store_true",
+        help="Drop images, fonts, media and third-party trackers while scraping"
+    )
+    batch.add_argument(
+        "--no-upload",
+        action="store_true",
+        help="Skip uploading to Gist"
+    )
+    add_upload_options(batch)
+    add_shards_option(batch)
+    add_run_options(batch)
+    
+    search = commands.add_parser(
+        "search", help="Search every stored highlight (needs build --search-index)"
+    )
+    search.add_argument("query", help='Words to match; "quoted phrases" match exactly')
+    search.add_argument("--limit", type=int, default=10, help="Maximum results (default: 10)")
+    search.add_argument("--book", type=str, default=None, help="Only search this book title")
+    
+    journal = commands.add_parser(
+        "journal", help="Print journaled highlights as JSON lines, oldest first"
+    )
+    journal.add_argument(
+        "--since",
+        type=int,
+        default=0,
+        metavar="SEQ",
+        help="Only print records after this sequence number"
+    )
+    journal.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold the journal into its snapshot now instead of printing"
+    )
+    journal.add_argument(
+        "--view",
+        action="store_true",
+        help="Print the latest.json view of the journal instead of records"
+    )
+    
+    for command in commands.choices.values():
+        defer_to_top_level(parser, command)
+    
+    return parser
+
+
+def main() -> None:
+    """Main entrypoint."""
+    parser = build_parser()
     args = parser.parse_args()
     
-    region = args.region or get_amazon_region()
+    region = getattr(args, "region", None) or get_amazon_region()
+    
+    if args.command == "search":
+        run_search(args.query, args.limit, args.book)
+        return
+    
+    if args.command == "journal":
+        run_journal(args.since, args.compact, args.view)
+        return
     
     if args.login:
-        run_login(region)
-    else:
-        run_scraper(region, upload=not args.no_upload)
+        if args.command is not None:
+            parser.error(f"--login cannot be used with the {args.command} command")
+        reject_unused_options(parser, args, "--login", LOGIN_UNUSED_OPTIONS)
+        run_login(region, _user_data_dir(args), args.cdp_url)
+        return
+    
+    if args.command in (None, "sync") and args.daemon:
+        reject_unused_options(parser, args, "--daemon", DAEMON_UNUSED_OPTIONS)
+        run_daemon_from_args(args, region)
+        return
+    
+    metrics = reset_metrics()
+    profiler = None
+    if args.profile:
+        import cProfile
+        
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    try:
+        run_pipeline(args, region)
+    finally:
+        if profiler:
+            profiler.disable()
+            save_profile(profiler)
+        write_run_metrics(metrics, args.prometheus)
 
 
 if __name__ == "__main__":
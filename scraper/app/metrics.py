@@ -0,0 +1,130 @@
+"""Run metrics: named spans and counters, exported as JSON or Prometheus text.
+
+The scrapers and main record into one process-wide Metrics instance
+(get_metrics), so a run's launch, navigation, per-book, store and upload
+times all end up in the same report.
+"""
+
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from .jsonio import atomic_write, write_json
+from .utils import PhaseTimer, get_metrics_path, utc_now
+
+
+METRIC_PREFIX = "kindle_sync"
+
+
+class Metrics(PhaseTimer):
+    """PhaseTimer that also counts span calls and named counters.
+
+    Usage:
+        metrics = get_metrics()
+        with metrics.phase("upload"):
+            ...
+        metrics.incr("bytes_uploaded", sent)
+        metrics.write_json()
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.span_counts: dict[str, int] = {}
+        self.counters: dict[str, float] = {}
+        self.started_at = utc_now()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block and add it to the named span."""
+        self.span_counts[name] = self.span_counts.get(name, 0) + 1
+        with super().phase(name):
+            yield
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Add value to a named counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        """Return the spans and counters as a JSON-serialisable dict."""
+        return {
+            "started_at": self.started_at,
+            "finished_at": utc_now(),
+            "wall_seconds": round(time.perf_counter() - self._start, 4),
+            "spans": {
+                name: {"seconds": round(seconds, 4), "count": self.span_counts.get(name, 0)}
+                for name, seconds in self.timings.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def report(self) -> None:
+        """Print the span timings and counters."""
+        super().report()
+        if self.counters:
+            print("Counters:")
+            for name, value in self.counters.items():
+                print(f"  {name:<20} {value:g}")
+
+    def write_json(self, path: Optional[Path] = None) -> Path:
+        """Write the metrics JSON file (defaults to data/metrics.json)."""
+        path = Path(path or get_metrics_path())
+        write_json(self.to_dict(), path)
+        print(f"Saved metrics to {path}")
+        return path
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        data = self.to_dict()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_seconds Wall-clock seconds spent in each stage.",
+            f"# TYPE {METRIC_PREFIX}_span_seconds gauge",
+        ]
+        for name, span in data["spans"].items():
+            lines.append(f'{METRIC_PREFIX}_span_seconds{{span="{name}"}} {span["seconds"]}')
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_count Number of times each stage ran.",
+            f"# TYPE {METRIC_PREFIX}_span_count gauge",
+        ]
+        for name, span in data["spans"].items():
+            lines.append(f'{METRIC_PREFIX}_span_count{{span="{name}"}} {span["count"]}')
+        for name, value in data["counters"].items():
+            lines += [
+                f"# TYPE {METRIC_PREFIX}_{name} gauge",
+                f"{METRIC_PREFIX}_{name} {value:g}",
+            ]
+        lines += [
+            f"# TYPE {METRIC_PREFIX}_wall_seconds gauge",
+            f"{METRIC_PREFIX}_wall_seconds {data['wall_seconds']}",
+            f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> Path:
+        """Write a Prometheus textfile (for node_exporter's textfile collector).
+
+        The file is written next to its target and renamed into place, so
+        the collector never reads a half-written file.
+        """
+        path = Path(path)
+        with atomic_write(path) as f:
+            f.write(self.to_prometheus().encode("utf-8"))
+        print(f"Saved Prometheus metrics to {path}")
+        return path
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics for the current run."""
+    return _metrics
+
+
+def reset_metrics() -> Metrics:
+    """Start a fresh set of metrics and return it."""
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
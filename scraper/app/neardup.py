@@ -0,0 +1,260 @@
+"""Collapse near-duplicate highlights within a book.
+
+Kindle stores a new highlight each time one is extended or adjusted, so
+the store ends up with several overlapping variants of one passage. This
+module finds them without comparing every pair:
+
+1. Each highlight becomes a set of word shingles (WORD_SHINGLE words each).
+2. A MinHash signature is computed with one-permutation hashing: every
+   shingle hash is dropped into one of NUM_BINS bins and each bin keeps its
+   minimum, and empty bins borrow from the next filled one (densification).
+3. The signature is cut into bands (LSH). Highlights of the same book that
+   agree on any whole band land in the same bucket and become candidates.
+4. Candidates are confirmed exactly: one highlight is a variant of another
+   when at least `threshold` of the shorter one's shingles occur in the
+   longer one (containment, which suits extended highlights better than
+   Jaccard similarity).
+
+A highlight of WORD_SHORT words or fewer has too few shingles to share a
+band with its extensions, so it is left out of the LSH buckets and
+matched by word containment instead: it joins the group of the one
+highlight of the same book that shares the most of its distinct words
+(at least `threshold` of them, longest container on ties), as "the map"
+joins "the map is not the territory". Joining only one container keeps
+a common short highlight from chaining unrelated passages together.
+Highlights without any words are never grouped.
+
+Confirmed variants are grouped and each group is collapsed to its longest
+(or most recent) highlight.
+"""
+
+import math
+import zlib
+from functools import lru_cache
+from typing import Iterable
+
+from .search import tokenize
+
+
+WORD_SHINGLE = 3
+WORD_SHORT = WORD_SHINGLE
+NUM_BINS = 32
+ROWS_PER_BAND = 2
+DEFAULT_THRESHOLD = 0.8
+# Largest number of distinct highlights compared within one bucket; more
+# only happens when many unrelated highlights share common phrasing.
+MAX_BUCKET_LEADERS = 32
+PREFER = ("longest", "recent")
+
+_BIN_BITS = NUM_BINS.bit_length() - 1
+_HASH_MASK = (1 << 32) - 1
+_EMPTY = 1 << 32
+
+
+def _sort_time(hl: dict) -> str:
+    return hl.get("highlight_time") or hl.get("fetched_at") or ""
+
+
+@lru_cache(maxsize=65536)
+def _word_hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
+
+
+def shingles(text: str, size: int = WORD_SHINGLE) -> set[int]:
+    """Hash the overlapping runs of `size` words in text.
+
+    Texts of `size` words or fewer become a single shingle, and texts
+    without words (empty or punctuation only) have none.
+    """
+    return _shingles(tokenize(text), size)
+
+
+def _shingles(tokens: list[str], size: int = WORD_SHINGLE) -> set[int]:
+    # Word hashes are combined with the (unsalted) tuple hash, so shingle
+    # hashes are stable between runs without hashing every joined string.
+    words = list(map(_word_hash, tokens))
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {hash(tuple(words)) & _HASH_MASK}
+    return {
+        hash(tuple(words[i:i + size])) & _HASH_MASK
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash(shingle_hashes: Iterable[int]) -> list[int]:
+    """One-permutation MinHash signature of NUM_BINS values."""
+    signature = [_EMPTY] * NUM_BINS
+    for h in shingle_hashes:
+        b = h & (NUM_BINS - 1)
+        v = h >> _BIN_BITS
+        if v < signature[b]:
+            signature[b] = v
+
+    # Rotation densification: an empty bin takes the next filled bin's
+    # value, tagged with the distance so borrowed values stay distinct.
+    if _EMPTY in signature and any(v != _EMPTY for v in signature):
+        first = next(i for i, v in enumerate(signature) if v != _EMPTY)
+        next_filled = first + NUM_BINS
+        for i in range(NUM_BINS - 1, -1, -1):
+            if signature[i] != _EMPTY:
+                next_filled = i
+            else:
+                j = next_filled % NUM_BINS
+                signature[i] = signature[j] + (next_filled - i) * _EMPTY
+    return signature
+
+
+def containment(a: set[int], b: set[int]) -> float:
+    """Share of the smaller shingle set that occurs in the larger one."""
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    return len(a & b) / len(a)
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _attach_short(
+    parent: list[int],
+    words: dict[int, set[str]],
+    short: list[int],
+    threshold: float,
+) -> None:
+    """Add each short highlight to the group of its best containing highlight.
+
+    Only the short highlight's own group moves, so two containers are
+    never merged through it.
+    """
+    postings: dict[str, list[int]] = {}
+    for i, found in words.items():
+        for word in found:
+            postings.setdefault(word, []).append(i)
+
+    for i in short:
+        need = math.ceil(threshold * len(words[i]))
+        # A highlight sharing `need` of the words has at least one of the
+        # len - need + 1 rarest, so only their postings are candidates.
+        rarest = sorted(words[i], key=lambda word: len(postings[word]))
+        candidates = {
+            j for word in rarest[:len(rarest) - need + 1] for j in postings[word]
+        }
+        candidates.discard(i)
+        matches = [j for j in candidates if len(words[i] & words[j]) >= need]
+        if not matches:
+            continue
+        best = max(matches, key=lambda j: (len(words[i] & words[j]), len(words[j]), -j))
+        root = _find(parent, i)
+        if root != _find(parent, best):
+            parent[root] = _find(parent, best)
+
+
+def find_variant_groups(
+    highlights: list[dict],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[list[int]]:
+    """Group highlights that are variants of the same passage.
+
+    Args:
+        highlights: Highlight dictionaries (any mix of books)
+        threshold: Minimum containment for two highlights to be variants
+
+    Returns:
+        Groups of indexes into highlights, each with two or more members
+    """
+    by_book: dict[str, list[int]] = {}
+    for i, hl in enumerate(highlights):
+        by_book.setdefault(hl.get("book_title", ""), []).append(i)
+
+    parent = list(range(len(highlights)))
+    sets: dict[int, set[int]] = {}
+    buckets: list[list[int]] = []
+    for indexes in by_book.values():
+        if len(indexes) < 2:
+            continue
+        book_buckets: dict[tuple, list[int]] = {}
+        tokens: dict[int, list[str]] = {}
+        short: list[int] = []
+        for i in indexes:
+            tokens[i] = tokenize(highlights[i].get("highlight_text", ""))
+            if not tokens[i]:
+                continue
+            if len(tokens[i]) <= WORD_SHORT:
+                short.append(i)
+                continue
+            sets[i] = _shingles(tokens[i])
+            signature = minhash(sets[i])
+            bands = zip(*(signature[row::ROWS_PER_BAND] for row in range(ROWS_PER_BAND)))
+            for key in enumerate(bands):
+                book_buckets.setdefault(key, []).append(i)
+        buckets.extend(members for members in book_buckets.values() if len(members) > 1)
+        if short:
+            words = {i: set(found) for i, found in tokens.items() if found}
+            _attach_short(parent, words, short, threshold)
+
+    for members in buckets:
+        # Compare each member against the distinct highlights seen so far in
+        # this bucket, largest first, instead of against every other member.
+        members.sort(key=lambda i: len(sets[i]), reverse=True)
+        leaders: list[int] = []
+        for i in members:
+            root = _find(parent, i)
+            for leader in leaders:
+                if _find(parent, leader) == root:
+                    break
+                if containment(sets[i], sets[leader]) >= threshold:
+                    parent[root] = _find(parent, leader)
+                    break
+            else:
+                if len(leaders) < MAX_BUCKET_LEADERS:
+                    leaders.append(i)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(highlights)):
+        groups.setdefault(_find(parent, i), []).append(i)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def collapse_near_duplicates(
+    highlights: list[dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    prefer: str = "longest",
+) -> list[dict]:
+    """Keep one highlight per group of overlapping or extended variants.
+
+    Args:
+        highlights: Highlight dictionaries; variants are only looked for
+            within the same book
+        threshold: Minimum containment for two highlights to be variants
+        prefer: Keep the 'longest' variant (newest on ties) or the most
+            'recent' one (longest on ties)
+
+    Returns:
+        The highlights with the other variants removed, in their original order
+
+    Raises:
+        ValueError: If prefer is not 'longest' or 'recent'
+    """
+    if prefer not in PREFER:
+        raise ValueError(f"Unknown preference: {prefer}")
+
+    def rank(i: int) -> tuple:
+        hl = highlights[i]
+        length = len(hl.get("highlight_text", ""))
+        if prefer == "longest":
+            return length, _sort_time(hl)
+        return _sort_time(hl), length
+
+    dropped = set()
+    for group in find_variant_groups(highlights, threshold):
+        keep = max(group, key=rank)
+        dropped.update(i for i in group if i != keep)
+
+    return [hl for i, hl in enumerate(highlights) if i not in dropped]
@@ -0,0 +1,197 @@
+"""Store highlights while the browser is still scraping.
+
+By default a run scrapes every book into a list, closes the browser and
+only then stores, builds and uploads. The streaming pipeline overlaps the
+first two stages instead:
+
+    scraper generator --bounded queue--> store + journal thread --> build --> upload
+
+The scraper's generator form (scraper.iter_highlights, or
+async_scraper.iter_highlights_async with --concurrency) yields each book's
+highlight as soon as it has been read. A thread upserts them into the
+store and appends them to the journal in small batches, so by the time the
+last book is read the store is up to date and only the export and upload
+remain. The queue is bounded: if storing falls behind, the scraper waits
+rather than letting highlights pile up in memory.
+"""
+
+import asyncio
+import queue
+import threading
+from pathlib import Path
+from typing import AsyncIterable, Iterable, Optional
+
+from .journal import HighlightJournal
+from .store import HighlightStore
+
+
+QUEUE_SIZE = 256
+STORE_BATCH_SIZE = 64
+_DONE = object()
+
+
+class HighlightSink:
+    """Store and journal highlights batch by batch.
+
+    On open the store is seeded from latest.json if it is empty, and an
+    empty journal from the store. On close the journal is compacted in the
+    background if it has grown past its threshold.
+
+    Usage:
+        with HighlightSink() as sink:
+            sink.add(highlights)
+            print(sink.changed, sink.store.count())
+    """
+
+    def __init__(
+        self,
+        store_path: Optional[Path] = None,
+        journal_dir: Optional[Path] = None,
+        latest_path: Optional[Path] = None,
+    ):
+        self.store = HighlightStore(store_path)
+        self.journal = HighlightJournal(journal_dir)
+        self.changed = 0
+        self.first_seq: Optional[int] = None
+        self.last_seq: Optional[int] = None
+
+        if self.store.count() == 0:
+            self.store.import_json(latest_path)
+        if self.journal.is_empty():
+            self.journal.seed(self.store.latest_per_book())
+
+    def __enter__(self) -> "HighlightSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, highlights: Iterable[dict]) -> list[dict]:
+        """Upsert highlights and journal the ones that were new or updated.
+
+        Returns:
+            The highlights that were new or updated
+        """
+        changed = self.store.upsert_changed(highlights)
+        records = self.journal.append(changed)
+        if records:
+            self.first_seq = self.first_seq or records[0]["seq"]
+            self.last_seq = records[-1]["seq"]
+        self.changed += len(changed)
+        return changed
+
+    def close(self) -> None:
+        """Close the store and start a journal compaction if one is due."""
+        self.store.close()
+        if self.last_seq is not None:
+            print(f"Journaled seq {self.first_seq}-{self.last_seq}")
+            if self.journal.needs_compaction():
+                self.journal.compact_in_background()
+
+
+def _store_worker(
+    items: queue.Queue,
+    result: dict,
+    batch_size: int,
+    sink_options: dict,
+) -> None:
+    # The store's SQLite connection has to be opened in the thread using it.
+    done = False
+    try:
+        with HighlightSink(**sink_options) as sink:
+            while not done:
+                batch = [items.get()]
+                # Take whatever else is already waiting, up to a batch.
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(items.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+                sink.add(batch)
+            result["changed"] = sink.changed
+            result["total"] = sink.store.count()
+    except BaseException as e:
+        result["error"] = e
+        # Keep draining so the producer never blocks on a full queue.
+        while not done:
+            done = items.get() is _DONE
+
+
+def _finish(result: dict) -> int:
+    if "error" in result:
+        raise result["error"]
+    print(f"Stored {result['changed']} new or updated highlights ({result['total']} total)")
+    return result["changed"]
+
+
+def store_stream(
+    highlights: Iterable[dict],
+    queue_size: int = QUEUE_SIZE,
+    batch_size: int = STORE_BATCH_SIZE,
+    **sink_options,
+) -> int:
+    """Store highlights from a generator while it is still producing them.
+
+    The generator runs in the calling thread (as the sync Playwright API
+    requires) and a worker thread stores what it yields.
+
+    Args:
+        highlights: Highlights, typically from scraper.iter_highlights
+        queue_size: Highlights that may wait to be stored before the
+            producer is held up
+        batch_size: Most highlights stored in one transaction
+        sink_options: store_path, journal_dir and latest_path for HighlightSink
+
+    Returns:
+        Number of highlights that were new or updated in the store
+    """
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    result: dict = {}
+    worker = threading.Thread(
+        target=_store_worker, args=(items, result, batch_size, sink_options), name="store"
+    )
+    worker.start()
+    try:
+        for hl in highlights:
+            items.put(hl)
+            if "error" in result:
+                break
+    finally:
+        items.put(_DONE)
+        worker.join()
+    return _finish(result)
+
+
+async def store_stream_async(
+    highlights: AsyncIterable[dict],
+    queue_size: int = QUEUE_SIZE,
+    batch_size: int = STORE_BATCH_SIZE,
+    **sink_options,
+) -> int:
+    """Async form of store_stream, for async_scraper.iter_highlights_async.
+
+    Handing a highlight to the store thread never blocks the event loop;
+    when the queue is full only this consumer waits, and the scraping
+    pages follow once their own buffer fills.
+    """
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    result: dict = {}
+    worker = threading.Thread(
+        target=_store_worker, args=(items, result, batch_size, sink_options), name="store"
+    )
+    worker.start()
+    try:
+        async for hl in highlights:
+            try:
+                items.put_nowait(hl)
+            except queue.Full:
+                await asyncio.to_thread(items.put, hl)
+            if "error" in result:
+                break
+    finally:
+        await asyncio.to_thread(items.put, _DONE)
+        await asyncio.to_thread(worker.join)
+    return _finish(result)
@@ -0,0 +1,232 @@
+"""Store collected highlights, build the outputs and upload them.
+
+The publishing half of the pipeline, shared by the CLI (app/main.py) and
+the daemon (app/daemon.py):
+
+    store_highlights    upsert highlights into the store and the journal
+    build_outputs       export latest.json, shards, search index, archive
+    upload_outputs      upload latest.json (and shards) to the Gist
+    publish_highlights  all three, for newly collected highlights
+    publish_store       build and upload, for highlights already stored
+
+Like main.py, heavy modules (SQLite, the GitHub client) are imported
+inside the function that needs them.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .fingerprints import BookFingerprints
+from .metrics import get_metrics
+
+
+def store_highlights(highlights: list[dict]) -> int:
+    """Upsert highlights into the store, seeding it from latest.json if empty.
+    
+    The highlights that were new or updated are appended to the journal in
+    data/journal, which is compacted in the background once it grows past
+    its threshold.
+    
+    Returns:
+        Number of highlights that were new or updated in the store
+    """
+    from .pipeline import HighlightSink
+    
+    metrics = get_metrics()
+    
+    with metrics.phase("store"), HighlightSink() as sink:
+        sink.add(highlights)
+        print(f"Stored {sink.changed} new or updated highlights ({sink.store.count()} total)")
+    
+    metrics.incr("highlights_stored", sink.changed)
+    return sink.changed
+
+
+def build_outputs(
+    shards: bool = False,
+    search_index: bool = False,
+    collapse_variants: bool = False,
+    archive: Optional[str] = None,
+) -> Optional[dict]:
+    """Export latest.json (and optionally the shards) from the store.
+    
+    Args:
+        shards: Also write index.json plus per-book shards
+        search_index: Also rebuild the full-text search index in data/search
+        collapse_variants: Keep only the longest of overlapping or extended
+            variants of a highlight in the shards and the search index
+        archive: Also stream every stored highlight to this path
+            (gzip-compressed if it ends in .gz)
+    
+    Returns:
+        The shard manifest, or None when shards are not written
+    """
+    from .store import HighlightStore
+    
+    metrics = get_metrics()
+    manifest = None
+    
+    with metrics.phase("build"), HighlightStore() as store:
+        if store.count() == 0:
+            store.import_json()
+        
+        output = store.export_latest()
+        print(f"Saved {len(output['items'])} items to latest.json")
+        
+        if archive:
+            store.export_archive(Path(archive))
+        
+        books = store.highlights_by_book() if shards or search_index else {}
+        
+        if collapse_variants and books:
+            from .neardup import collapse_near_duplicates
+            
+            with metrics.phase("collapse_variants"):
+                total = sum(len(highlights) for highlights in books.values())
+                books = {
+                    title: collapse_near_duplicates(highlights)
+                    for title, highlights in books.items()
+                }
+                collapsed = total - sum(len(highlights) for highlights in books.values())
+            print(f"Collapsed {collapsed} near-duplicate highlight variants")
+            metrics.incr("variants_collapsed", collapsed)
+        
+        if shards:
+            from .shards import write_shards
+            
+            manifest, _ = write_shards(books)
+    
+    if search_index:
+        from .search import build_search_index
+        
+        with metrics.phase("search_index"):
+            build_search_index(hl for highlights in books.values() for hl in highlights)
+    
+    return manifest
+
+
+def upload_outputs(
+    minify: bool = False,
+    force_upload: bool = False,
+    shards: bool = False,
+    manifest: Optional[dict] = None,
+    exit_on_error: bool = True,
+) -> bool:
+    """Upload latest.json (and the shards) to the Gist.
+    
+    Args:
+        minify: Upload compact JSON
+        force_upload: Upload even if the content is unchanged
+        shards: Also upload index.json and the changed shards
+        manifest: Shard manifest from build_outputs (loaded from
+            data/shards/index.json if not provided)
+        exit_on_error: Exit with status 1 if the upload fails (otherwise
+            the error is printed and publishing carries on)
+    
+    Returns:
+        True if the upload succeeded, False if it failed or was skipped for
+        lack of credentials
+    """
+    gist_id = os.environ.get("GIST_ID")
+    github_token = os.environ.get("GITHUB_TOKEN")
+    
+    if not (gist_id and github_token):
+        print("Skipping Gist upload (GIST_ID or GITHUB_TOKEN not set)")
+        return False
+    
+    from .gist import upload_shards_to_gist, upload_to_gist
+    from .github_client import GitHubClient
+    
+    if shards and manifest is None:
+        from .shards import load_manifest
+        
+        manifest = load_manifest() or None
+    
+    metrics = get_metrics()
+    print("Uploading to Gist...")
+    try:
+        with metrics.phase("upload"), GitHubClient(github_token) as client:
+            try:
+                raw_url = upload_to_gist(minify=minify, force=force_upload, client=client)
+                if manifest is not None:
+                    upload_shards_to_gist(manifest, force=force_upload, client=client)
+            finally:
+                metrics.incr("bytes_uploaded", client.bytes_sent)
+                metrics.incr("github_requests", client.requests_sent)
+                metrics.incr("github_retries", client.retries)
+        print(f"Upload complete: {raw_url}")
+    except Exception as e:
+        print(f"Error uploading to Gist: {e}")
+        if exit_on_error:
+            sys.exit(1)
+        return False
+    
+    return True
+
+
+def publish_highlights(
+    highlights: list[dict],
+    upload: bool = True,
+    minify: bool = False,
+    force_upload: bool = False,
+    shards: bool = False,
+    search_index: bool = False,
+    collapse_variants: bool = False,
+    archive: Optional[str] = None,
+    exit_on_error: bool = True,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> int:
+    """Upsert new highlights into the store, export latest.json and upload it.
+    
+    Args:
+        highlights: Newly collected highlights
+        upload: Whether to upload to Gist
+        minify: Upload compact JSON
+        force_upload: Upload even if the content is unchanged
+        shards: Also write (and upload) index.json plus per-book shards
+        search_index: Also rebuild the full-text search index
+        collapse_variants: Collapse near-duplicate variants in the shards
+            and the search index
+        archive: Also stream every stored highlight to this path
+        exit_on_error: Exit with status 1 if the upload fails (otherwise
+            the error is printed and publishing carries on)
+        fingerprints: Book fingerprints the highlights were scraped with,
+            saved as soon as the highlights are stored
+    
+    Returns:
+        Number of highlights that were new or updated in the store
+    """
+    changed = store_highlights(highlights)
+    if fingerprints is not None:
+        fingerprints.save()
+    publish_store(
+        upload, minify, force_upload, shards, search_index, collapse_variants,
+        archive, exit_on_error,
+    )
+    return changed
+
+
+def publish_store(
+    upload: bool = True,
+    minify: bool = False,
+    force_upload: bool = False,
+    shards: bool = False,
+    search_index: bool = False,
+    collapse_variants: bool = False,
+    archive: Optional[str] = None,
+    exit_on_error: bool = True,
+) -> None:
+    """Export latest.json (and the other outputs) from the store and upload it.
+    
+    The second half of publish_highlights, for highlights that are already
+    stored. Takes the same options.
+    """
+    manifest = build_outputs(shards, search_index, collapse_variants, archive)
+    
+    if upload:
+        upload_outputs(minify, force_upload, shards, manifest, exit_on_error)
+    
+    print("-" * 50)
+    print("Done!")
@@ -1,11 +1,124 @@
 """Playwright scraper for Amazon Kindle Notebook highlights."""
 
-import re
-from datetime import datetime
-from typing import Optional
-from playwright.sync_api import sync_playwright, Page, Browser
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator, Iterator, Optional
+from urllib.parse import urlparse
+from playwright.sync_api import sync_playwright, Page, BrowserContext, Route
 
-from .utils import get_auth_path, get_kindle_notebook_url, utc_now
+from .browser import REQUEST_FILTER_PATTERN, has_session, open_session
+from .capture import parse_annotations_response
+from .dates import parse_date, parse_dates
+from .extract import (
+    ANNOTATIONS_JS,
+    ANNOTATIONS_SWITCHED_JS,
+    BOOK_FINGERPRINT_JS,
+    FIRST_HIGHLIGHT_TEXT_JS,
+    HIGHLIGHTS_CHANGED_JS,
+    LAYOUT_JS,
+    LIBRARY_GROWN_JS,
+    LIBRARY_JS,
+    LIBRARY_SCROLL_JS,
+    annotations_args,
+    annotations_switched_args,
+    fingerprint_args,
+    highlights_changed_args,
+    library_args,
+    library_scroll_args,
+)
+from .fingerprints import BookFingerprints
+from .metrics import Metrics, get_metrics
+from .selector_cache import SelectorCache
+from .utils import (
+    DEFAULT_MAX_BOOKS,
+    EXTRACTION_MODES,
+    get_auth_path,
+    get_book_notebook_url,
+    get_kindle_notebook_url,
+    utc_now,
+)
+
+
+NOTEBOOK_LIBRARY_SELECTOR = "#kp-notebook-library, .kp-notebook-library, [id*='notebook']"
+ANNOTATIONS_ASIN_SELECTOR = "#kp-notebook-annotations-asin"
+
+BOOK_SELECTORS = [
+    ".kp-notebook-library-each-book",
+    "[id^='library-section'] .a-row",
+    ".library-book",
+    "div[data-asin]",
+]
+
+TITLE_SELECTORS = [
+    "h2",
+    ".kp-notebook-searchable",
+    ".book-title",
+    "span[id*='title']",
+    "a",
+]
+
+HIGHLIGHT_SELECTORS = [
+    "#highlight",
+    ".kp-notebook-highlight",
+    "[id*='highlight']",
+    ".highlight-text",
+    ".a-size-base-plus",
+]
+
+TIME_SELECTORS = [
+    "#annotationHighlightHeader",
+    ".kp-notebook-metadata",
+    "[id*='highlight'] + *",
+    ".a-color-secondary",
+]
+
+# Sidebar fields that change when a book gets a new highlight (see
+# app/fingerprints.py). Hidden inputs are read by their value.
+ANNOTATED_SELECTORS = [
+    "input[id^='kp-notebook-annotated-date']",
+    "[id^='kp-notebook-annotated-date']",
+    ".kp-notebook-annotated-date",
+]
+
+COUNT_SELECTORS = [
+    "[id^='kp-notebook-highlights-count']",
+    ".kp-notebook-highlights-count",
+    ".kp-notebook-highlight-count",
+]
+
+# Holds the token for the next batch of books; empty after the last one.
+LIBRARY_NEXT_PAGE_SELECTOR = ".kp-notebook-library-next-page-start"
+
+# Page layouts told apart for the selector cache, checked in this order.
+LAYOUT_MARKERS = [
+    ["kp-notebook", "#kp-notebook-library"],
+    ["library-section", "[id^='library-section']"],
+    ["library-book", ".library-book"],
+]
+
+MAX_HIGHLIGHTS_CHECKED = 5
+MIN_HIGHLIGHT_LENGTH = 10
+BOOK_LOAD_TIMEOUT = 15000
+LIBRARY_PAGE_TIMEOUT = 5000
+MAX_LIBRARY_PAGES = 500
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+FIRST_PARTY_DOMAINS = (
+    "amazon.com",
+    "amazon.co.uk",
+    "media-amazon.com",
+    "ssl-images-amazon.com",
+    "images-amazon.com",
+)
+
+TRACKER_HOSTS = (
+    "fls-na.amazon.com",
+    "fls-eu.amazon.co.uk",
+    "unagi.amazon.com",
+    "unagi-na.amazon.com",
+    "device-metrics-us.amazon.com",
+)
 
 
 def parse_highlight_time(time_str: str) -> Optional[str]:
@@ -15,96 +128,470 @@ def parse_highlight_time(time_str: str) -> Optional[str]:
     - "Monday 28 February 2026"
     - "February 28, 2026"
     - "28 Feb 2026"
+    - "28. Februar 2026", "28 février 2026", "2026年2月28日"
     - Relative times like "Yesterday", "2 hours ago" (returns None)
+    
+    Parsing is delegated to app.dates, which caches results per string.
     """
     if not time_str:
         return None
+    return parse_date(time_str.strip())
+
+
+def parse_highlight_times(time_strs: list[Optional[str]]) -> list[Optional[str]]:
+    """Parse a batch of highlight time strings, parsing each distinct one once."""
+    return parse_dates(time_str.strip() if time_str else None for time_str in time_strs)
+
+
+def is_signin_url(url: str) -> bool:
+    """Check whether the browser was redirected to the Amazon sign-in page."""
+    return "signin" in url.lower() or "ap/signin" in url
+
+
+def should_block_request(url: str, resource_type: str) -> bool:
+    """Decide whether a request is unnecessary for reading highlights.
     
-    time_str = time_str.strip()
+    Images, fonts, media, Amazon telemetry endpoints and any third-party
+    host are blocked; documents, scripts, styles and XHR from Amazon pass.
+    """
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
     
-    patterns = [
-        (r"(\d{1,2})\s+(\w+)\s+(\d{4})", "%d %B %Y"),
-        (r"(\w+)\s+(\d{1,2}),?\s+(\d{4})", "%B %d %Y"),
-        (r"(\d{1,2})\s+(\w{3})\s+(\d{4})", "%d %b %Y"),
-    ]
+    host = (urlparse(url).hostname or "").lower()
+    if not host:
+        return False
     
-    for pattern, date_format in patterns:
-        match = re.search(pattern, time_str)
-        if match:
-            try:
-                date_str = " ".join(match.groups())
-                dt = datetime.strptime(date_str, date_format)
-                return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-            except ValueError:
-                continue
+    if host in TRACKER_HOSTS:
+        return True
     
-    return None
+    return not any(host == d or host.endswith("." + d) for d in FIRST_PARTY_DOMAINS)
 
 
-def scrape_highlights(region: str, headless: bool = True) -> list[dict]:
-    """Scrape recent highlights from Kindle Notebook.
+def filter_route(route: Route):
+    """Route handler that aborts every request should_block_request rejects.
+    
+    Shared by both scrapers: with the async API the returned coroutine is
+    awaited by Playwright.
+    """
+    request = route.request
+    if should_block_request(request.url, request.resource_type):
+        return route.abort()
+    return route.continue_()
+
+
+def install_request_filter(context: BrowserContext) -> None:
+    """Abort every request that should_block_request rejects."""
+    context.route(REQUEST_FILTER_PATTERN, filter_route)
+
+
+def is_book_response(url: str, asin: Optional[str] = None) -> bool:
+    """Check whether a response URL is the annotations fetch for a book."""
+    if "notebook" not in url or "asin=" not in url:
+        return False
+    return not asin or f"asin={asin}" in url
+
+
+def open_book(page: Page, book_el, asin: Optional[str]) -> None:
+    """Click a book in the library and wait until its highlights render.
+    
+    Waits for the annotations response for the book's ASIN, then until the
+    page shows that book, then for a highlight element, instead of sleeping
+    for a fixed time. Without the switch check, the previous book's
+    highlights could still be on the page and be read as this one's.
+    
+    The current layout names the open book in a hidden input, which is
+    compared with the entry's data-asin. Without that input, or when the
+    entry has no data-asin (the ASIN fell back to its element id), the wait
+    is instead until the first highlight's text changes.
+    
+    Raises:
+        RuntimeError: If the page never switches to the book
+    """
+    pane = page.query_selector(ANNOTATIONS_ASIN_SELECTOR)
+    data_asin = book_el.get_attribute("data-asin")
+    by_pane = pane is not None and bool(data_asin) and data_asin == asin
+    if by_pane and pane.get_attribute("value") == asin:
+        page.wait_for_selector(", ".join(HIGHLIGHT_SELECTORS), timeout=BOOK_LOAD_TIMEOUT)
+        return
+    previous = None if by_pane else page.evaluate(FIRST_HIGHLIGHT_TEXT_JS, HIGHLIGHT_SELECTORS)
+    
+    try:
+        with page.expect_response(
+            lambda response: is_book_response(response.url, data_asin),
+            timeout=BOOK_LOAD_TIMEOUT,
+        ):
+            book_el.click()
+    except Exception as e:
+        print(f"No annotations response seen, waiting on the DOM instead: {e}")
+    
+    if by_pane:
+        switched = (ANNOTATIONS_SWITCHED_JS, annotations_switched_args(ANNOTATIONS_ASIN_SELECTOR, asin))
+    elif previous is not None:
+        switched = (HIGHLIGHTS_CHANGED_JS, highlights_changed_args(HIGHLIGHT_SELECTORS, previous))
+    else:
+        # Nothing was shown before the click, so whatever appears is this book.
+        switched = None
+    
+    if switched:
+        try:
+            page.wait_for_function(switched[0], arg=switched[1], timeout=BOOK_LOAD_TIMEOUT)
+        except Exception as e:
+            raise RuntimeError(
+                f"Notebook did not switch to {asin or 'the clicked book'}"
+            ) from e
+    
+    page.wait_for_selector(", ".join(HIGHLIGHT_SELECTORS), timeout=BOOK_LOAD_TIMEOUT)
+
+
+def run_steps(steps: Generator):
+    """Drive a *_steps generator with the sync Playwright API.
+    
+    The steps generators hold the logic shared with the async scraper.
+    They yield the result of each Playwright call and get back its value:
+    with the sync API the call has already run, so the value is sent
+    straight back (async_scraper.run_steps awaits it first).
     
-    Args:
-        region: Amazon region ('com' or 'co.uk')
-        headless: Run browser in headless mode
-        
     Returns:
-        List of highlight dictionaries with book_title, highlight_text, 
-        highlight_time, and fetched_at.
+        The generator's return value
     """
-    auth_path = get_auth_path()
-    notebook_url = get_kindle_notebook_url(region)
+    try:
+        value = next(steps)
+        while True:
+            value = steps.send(value)
+    except StopIteration as done:
+        return done.value
+
+
+def detect_layout_steps(page: Page) -> Generator:
+    """Steps of detect_layout (see run_steps)."""
+    try:
+        return (yield page.evaluate(LAYOUT_JS, LAYOUT_MARKERS))
+    except Exception:
+        return "unknown"
+
+
+def detect_layout(page: Page) -> str:
+    """Name the notebook layout on the page (see LAYOUT_MARKERS)."""
+    return run_steps(detect_layout_steps(page))
+
+
+def load_full_library_steps(
+    page: Page,
+    book_selectors: list[str],
+    limit: Optional[int] = None,
+) -> Generator:
+    """Steps of load_full_library (see run_steps)."""
+    args = library_scroll_args(book_selectors, LIBRARY_NEXT_PAGE_SELECTOR)
+    state = yield page.evaluate(LIBRARY_SCROLL_JS, args)
+    pages = 1
+    while (
+        state["count"] and state["more"]
+        and (limit is None or state["count"] < limit)
+        and pages < MAX_LIBRARY_PAGES
+    ):
+        try:
+            yield page.wait_for_function(
+                LIBRARY_GROWN_JS,
+                arg=library_scroll_args(book_selectors, LIBRARY_NEXT_PAGE_SELECTOR, state["count"]),
+                timeout=LIBRARY_PAGE_TIMEOUT,
+            )
+        except Exception:
+            break
+        state = yield page.evaluate(LIBRARY_SCROLL_JS, args)
+        pages += 1
     
-    if not auth_path.exists():
-        raise FileNotFoundError(
-            f"Auth state file not found at {auth_path}. "
-            "Run the login script first to generate auth.json"
+    if pages > 1:
+        print(f"Listed {state['count']} books over {pages} library pages")
+    return state["count"]
+
+
+def load_full_library(page: Page, book_selectors: list[str], limit: Optional[int] = None) -> int:
+    """Scroll the library sidebar until every book (or `limit` books) is listed.
+    
+    The sidebar lists the most recently annotated books first and fetches
+    the next batch each time it is scrolled to its end.
+    
+    Returns:
+        Number of books listed
+    """
+    return run_steps(load_full_library_steps(page, book_selectors, limit))
+
+
+def read_book_info(book_el, cache: Optional[SelectorCache] = None) -> dict:
+    """Read a library entry's title, ASIN and fingerprint fields.
+    
+    The title is read one element query at a time; the last-annotated date
+    and highlight count in one script on the entry.
+    
+    Returns:
+        {"asin", "title", "annotated", "count"}, as LIBRARY_JS returns them
+    """
+    cache = cache or SelectorCache("", "")
+    book_title = None
+    for sel in cache.order("title", TITLE_SELECTORS):
+        title_el = book_el.query_selector(sel)
+        if title_el:
+            book_title = title_el.inner_text().strip()
+        cache.record("title", sel, bool(book_title))
+        if book_title:
+            break
+    
+    asin = book_el.get_attribute("data-asin") or book_el.get_attribute("id")
+    fields = book_el.evaluate(
+        BOOK_FINGERPRINT_JS, fingerprint_args(ANNOTATED_SELECTORS, COUNT_SELECTORS)
+    )
+    return {"asin": asin or None, "title": book_title, **fields}
+
+
+def first_highlight_from_payload(payload: dict, book_title: str, fetched_at: str) -> Optional[dict]:
+    """Build the first usable highlight from an ANNOTATIONS_JS payload.
+    
+    An exact "time" on the entry (from captured JSON) wins, then the
+    highlight's own header, then the page-wide time headers. All candidate
+    header strings are parsed in one batch.
+    """
+    entries = payload.get("highlights") or []
+    page_headers = payload.get("headers") or []
+    
+    candidates = [entry.get("header") for entry in entries] + page_headers
+    times = parse_highlight_times(candidates)
+    page_time = next((t for t in times[len(entries):] if t), None)
+    
+    for entry, own_time in zip(entries, times):
+        highlight_text = (entry.get("text") or "").strip()
+        
+        if not highlight_text or len(highlight_text) < MIN_HIGHLIGHT_LENGTH:
+            continue
+        
+        return {
+            "book_title": book_title,
+            "highlight_text": highlight_text,
+            "highlight_time": entry.get("time") or own_time or page_time,
+            "fetched_at": fetched_at,
+        }
+    
+    return None
+
+
+def extract_first_highlight_evaluate(
+    page: Page,
+    book_title: str,
+    fetched_at: str,
+    cache: Optional[SelectorCache] = None,
+) -> Optional[dict]:
+    """Extract the first usable highlight with a single in-page script.
+    
+    The script tries the selectors in the cache's order, but it is one
+    round trip either way, so nothing is recorded.
+    """
+    cache = cache or SelectorCache("", "")
+    payload = page.evaluate(
+        ANNOTATIONS_JS,
+        annotations_args(
+            cache.ranked("highlight", HIGHLIGHT_SELECTORS),
+            cache.ranked("time", TIME_SELECTORS),
+            MAX_HIGHLIGHTS_CHECKED,
+        ),
+    )
+    return first_highlight_from_payload(payload, book_title, fetched_at)
+
+
+def capture_first_highlight_steps(
+    context: BrowserContext,
+    region: str,
+    asin: str,
+    book_title: str,
+    fetched_at: str,
+) -> Generator:
+    """Steps of capture_first_highlight (see run_steps)."""
+    url = get_book_notebook_url(region, asin)
+    try:
+        response = yield context.request.get(url, timeout=BOOK_LOAD_TIMEOUT)
+        if not response.ok or is_signin_url(response.url):
+            print(f"Annotations request failed ({response.status}) for {book_title[:50]}")
+            return None
+        payload = parse_annotations_response(
+            (yield response.text()), response.headers.get("content-type", "")
         )
+    except Exception as e:
+        print(f"Could not capture annotations for {book_title[:50]}: {e}")
+        return None
     
-    highlights = []
-    fetched_at = utc_now()
+    if payload.get("asin") and payload["asin"] != asin:
+        return None
     
-    with sync_playwright() as p:
-        browser: Browser = p.chromium.launch(headless=headless)
-        context = browser.new_context(storage_state=str(auth_path))
-        page: Page = context.new_page()
+    return first_highlight_from_payload(payload, book_title, fetched_at)
+
+
+def capture_first_highlight(
+    context: BrowserContext,
+    region: str,
+    asin: str,
+    book_title: str,
+    fetched_at: str,
+) -> Optional[dict]:
+    """Fetch a book's annotations response directly and parse it.
+    
+    The request goes through the context's cookie jar, so it is
+    authenticated like the page, but nothing is rendered.
+    
+    Returns:
+        Highlight dictionary, or None if the capture failed
+    """
+    return run_steps(
+        capture_first_highlight_steps(context, region, asin, book_title, fetched_at)
+    )
+
+
+def extract_first_highlight_steps(
+    page: Page,
+    book_title: str,
+    fetched_at: str,
+    cache: Optional[SelectorCache] = None,
+) -> Generator:
+    """Steps of extract_first_highlight (see run_steps)."""
+    cache = cache or SelectorCache("", "")
+    highlight_elements = []
+    for sel in cache.order("highlight", HIGHLIGHT_SELECTORS):
+        highlight_elements = yield page.query_selector_all(sel)
+        cache.record("highlight", sel, bool(highlight_elements))
+        if highlight_elements:
+            break
+    
+    for hl_el in highlight_elements[:MAX_HIGHLIGHTS_CHECKED]:
+        highlight_text = (yield hl_el.inner_text()).strip()
         
-        print(f"Navigating to {notebook_url}...")
-        page.goto(notebook_url, wait_until="networkidle", timeout=60000)
+        if not highlight_text or len(highlight_text) < MIN_HIGHLIGHT_LENGTH:
+            continue
         
-        page.wait_for_timeout(3000)
+        highlight_time = None
+        for sel in cache.order("time", TIME_SELECTORS):
+            time_el = yield page.query_selector(sel)
+            if not time_el:
+                cache.record("time", sel, False)
+                continue
+            highlight_time = parse_highlight_time((yield time_el.inner_text()))
+            if highlight_time:
+                cache.record("time", sel, True)
+                break
+            cache.record_unparsed("time", sel)
         
-        if "signin" in page.url.lower() or "ap/signin" in page.url:
-            browser.close()
-            raise RuntimeError(
-                "Auth session expired. Please regenerate auth.json by running "
-                "the login script locally."
-            )
+        return {
+            "book_title": book_title,
+            "highlight_text": highlight_text,
+            "highlight_time": highlight_time,
+            "fetched_at": fetched_at,
+        }
+    
+    return None
+
+
+def extract_first_highlight(
+    page: Page,
+    book_title: str,
+    fetched_at: str,
+    cache: Optional[SelectorCache] = None,
+) -> Optional[dict]:
+    """Extract the first usable highlight from the open book's annotations.
+    
+    Args:
+        page: Page showing the book's annotations
+        book_title: Title of the open book
+        fetched_at: Timestamp to stamp on the highlight
+        cache: Selector cache to order the fallback chains by and record
+            hits in (optional; default order without)
+        
+    Returns:
+        Highlight dictionary, or None if no highlight is long enough
+    """
+    return run_steps(extract_first_highlight_steps(page, book_title, fetched_at, cache))
+
+
+def iter_page_highlights(
+    context: BrowserContext,
+    page: Page,
+    region: str,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    extraction: str = "dom",
+    timer: Optional[Metrics] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> Iterator[dict]:
+    """Load the notebook in an open page and yield each book's first highlight.
+    
+    Highlights are yielded as soon as their book has been read, so the
+    caller can store them while the remaining books load. The whole
+    library is listed, but with fingerprints only the books whose sidebar
+    fingerprint changed since they were last read are opened (see
+    app/fingerprints.py).
+    
+    Args:
+        context: Authenticated browser context (used by 'capture' mode)
+        page: Page to load the notebook in
+        region: Amazon region ('com' or 'co.uk')
+        max_books: Maximum number of books to visit (None for all)
+        extraction: 'dom', 'evaluate' or 'capture' (see scrape_highlights)
+        timer: Metrics to record timings in (defaults to get_metrics())
+        fingerprints: Skip books whose sidebar fingerprint is unchanged and
+            mark the ones read (optional; every book is opened without).
+            Not saved here: save it once the highlights are stored
         
-        print("Loading Kindle Notebook page...")
+    Yields:
+        Highlight dictionaries, in library order
         
+    Raises:
+        RuntimeError: If the session has expired
+    """
+    notebook_url = get_kindle_notebook_url(region)
+    fetched_at = utc_now()
+    timer = timer or get_metrics()
+    
+    print(f"Navigating to {notebook_url}...")
+    with timer.phase("navigate"):
+        page.goto(notebook_url, wait_until="domcontentloaded", timeout=60000)
+    
+    if is_signin_url(page.url):
+        raise RuntimeError(
+            "Auth session expired. Please regenerate auth.json by running "
+            "the login script locally."
+        )
+    
+    print("Loading Kindle Notebook page...")
+    
+    with timer.phase("library"):
         try:
-            page.wait_for_selector(
-                "#kp-notebook-library, .kp-notebook-library, [id*='notebook']",
-                timeout=30000
-            )
+            page.wait_for_selector(NOTEBOOK_LIBRARY_SELECTOR, timeout=30000)
         except Exception:
             print("Warning: Could not find notebook library selector, continuing anyway...")
         
-        book_selectors = [
-            ".kp-notebook-library-each-book",
-            "[id^='library-section'] .a-row",
-            ".library-book",
-            "div[data-asin]",
-        ]
+        cache = SelectorCache.load(region, detect_layout(page))
+        fingerprints = fingerprints or BookFingerprints(region)
         
         books = []
+        book_selectors = cache.order("book", BOOK_SELECTORS)
+        load_full_library(
+            page, book_selectors, max_books if fingerprints.opens_every_book() else None
+        )
         for selector in book_selectors:
             books = page.query_selector_all(selector)
+            cache.record("book", selector, bool(books))
             if books:
                 print(f"Found {len(books)} books using selector: {selector}")
                 break
         
+        library = []
+        if extraction in ("evaluate", "capture"):
+            # Same book selector order, so library[i] describes books[i].
+            library = page.evaluate(
+                LIBRARY_JS,
+                library_args(
+                    book_selectors,
+                    cache.ranked("title", TITLE_SELECTORS),
+                    ANNOTATED_SELECTORS,
+                    COUNT_SELECTORS,
+                ),
+            )
+    
+    try:
         if not books:
             print("No books found with standard selectors, trying alternative approach...")
             page.screenshot(path="debug_screenshot.png")
@@ -112,103 +599,228 @@ def scrape_highlights(region: str, headless: bool = True) -> list[dict]:
             all_links = page.query_selector_all("a[href*='notebook']")
             print(f"Found {len(all_links)} notebook links")
         
-        for i, book_el in enumerate(books[:10]):
+        visited = 0
+        for i, book_el in enumerate(books):
+            if max_books is not None and visited >= max_books:
+                break
             try:
-                title_selectors = [
-                    "h2",
-                    ".kp-notebook-searchable",
-                    ".book-title",
-                    "span[id*='title']",
-                    "a",
-                ]
-                
-                book_title = None
-                for sel in title_selectors:
-                    title_el = book_el.query_selector(sel)
-                    if title_el:
-                        book_title = title_el.inner_text().strip()
-                        if book_title:
-                            break
+                book = library[i] if i < len(library) else read_book_info(book_el, cache)
+                book_title, asin = book["title"], book["asin"]
                 
-                if not book_title:
+                if not book_title or not fingerprints.visit(book):
                     continue
                 
                 print(f"Processing book: {book_title[:50]}...")
+                visited += 1
+                timer.incr("books_visited")
+                
+                if extraction == "capture" and asin:
+                    with timer.phase("capture"):
+                        highlight = capture_first_highlight(
+                            context, region, asin, book_title, fetched_at
+                        )
+                    if highlight:
+                        timer.incr("highlights_extracted")
+                        yield highlight
+                        fingerprints.mark(book)
+                        continue
+                    print("Falling back to the rendered page...")
                 
                 try:
-                    book_el.click()
-                    page.wait_for_timeout(2000)
+                    with timer.phase("open_book"):
+                        open_book(page, book_el, asin)
                 except Exception as e:
-                    print(f"Could not click book: {e}")
+                    print(f"Could not open book: {e}")
                     continue
                 
-                highlight_selectors = [
-                    "#highlight",
-                    ".kp-notebook-highlight",
-                    "[id*='highlight']",
-                    ".highlight-text",
-                    ".a-size-base-plus",
-                ]
-                
-                highlight_elements = []
-                for sel in highlight_selectors:
-                    highlight_elements = page.query_selector_all(sel)
-                    if highlight_elements:
-                        break
+                with timer.phase("extract"):
+                    if extraction == "evaluate":
+                        highlight = extract_first_highlight_evaluate(
+                            page, book_title, fetched_at, cache
+                        )
+                    else:
+                        highlight = extract_first_highlight(page, book_title, fetched_at, cache)
                 
-                for hl_el in highlight_elements[:5]:
-                    highlight_text = hl_el.inner_text().strip()
-                    
-                    if not highlight_text or len(highlight_text) < 10:
-                        continue
-                    
-                    time_selectors = [
-                        "#annotationHighlightHeader",
-                        ".kp-notebook-metadata",
-                        "[id*='highlight'] + *",
-                        ".a-color-secondary",
-                    ]
-                    
-                    highlight_time = None
-                    for sel in time_selectors:
-                        time_el = page.query_selector(sel)
-                        if time_el:
-                            time_str = time_el.inner_text()
-                            highlight_time = parse_highlight_time(time_str)
-                            if highlight_time:
-                                break
-                    
-                    highlights.append({
-                        "book_title": book_title,
-                        "highlight_text": highlight_text,
-                        "highlight_time": highlight_time,
-                        "fetched_at": fetched_at,
-                    })
-                    
-                    break
+                if highlight:
+                    timer.incr("highlights_extracted")
+                    yield highlight
+                fingerprints.mark(book)
                     
             except Exception as e:
                 print(f"Error processing book {i}: {e}")
                 continue
+    finally:
+        cache.report(timer)
+        cache.save()
+        fingerprints.report(timer)
+
+
+def scrape_page(
+    context: BrowserContext,
+    page: Page,
+    region: str,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    extraction: str = "dom",
+    timer: Optional[Metrics] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Load the notebook in an open page and scrape the first highlight per book.
+    
+    Used by scrape_highlights for one-shot runs, and by the daemon to poll
+    again and again with the same warm page and context. Takes the same
+    arguments as iter_page_highlights.
+    
+    Returns:
+        List of highlight dictionaries
+        
+    Raises:
+        RuntimeError: If the session has expired
+    """
+    return list(iter_page_highlights(
+        context, page, region, max_books, extraction, timer, fingerprints
+    ))
+
+
+@contextmanager
+def scrape_session(
+    headless: bool = True,
+    block_resources: bool = False,
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    timer: Optional[Metrics] = None,
+) -> Iterator[tuple[BrowserContext, Page]]:
+    """Open an authenticated browser session for one scrape.
+    
+    Yields the context and a page. Refreshed cookies are saved back to
+    auth.json only if the block completes; the trace (if any) is saved and
+    the browser closed either way.
+    
+    Raises:
+        FileNotFoundError: If there is no saved session to start from
+    """
+    auth_path = get_auth_path()
+    
+    if not has_session(user_data_dir, cdp_url, auth_path):
+        raise FileNotFoundError(
+            f"Auth state file not found at {auth_path}. "
+            "Run the login script first to generate auth.json"
+        )
+    
+    timer = timer or get_metrics()
+    
+    with sync_playwright() as p:
+        with timer.phase("launch"):
+            session = open_session(p, headless, user_data_dir, cdp_url, auth_path)
+            context = session.context
+            if block_resources:
+                install_request_filter(context)
+            if trace_path:
+                session.start_tracing()
+            page: Page = session.new_page()
+        
+        try:
+            yield context, page
+            session.save_auth(auth_path)
+        finally:
+            with timer.phase("close"):
+                if trace_path:
+                    session.stop_tracing(trace_path)
+                session.close()
+
+
+def iter_highlights(
+    region: str,
+    headless: bool = True,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> Iterator[dict]:
+    """Generator form of scrape_highlights, yielding each highlight as its book finishes.
+    
+    The browser stays open until the generator is exhausted or closed, and
+    must be iterated from one thread. Takes the same arguments as
+    scrape_highlights.
+    """
+    if extraction not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {extraction}")
+    
+    timer = get_metrics()
+    
+    with scrape_session(
+        headless, block_resources, trace_path, user_data_dir, cdp_url, timer
+    ) as (context, page):
+        yield from iter_page_highlights(
+            context, page, region, max_books, extraction, timer, fingerprints
+        )
+
+
+def scrape_highlights(
+    region: str,
+    headless: bool = True,
+    max_books: Optional[int] = DEFAULT_MAX_BOOKS,
+    block_resources: bool = False,
+    extraction: str = "dom",
+    trace_path: Optional[Path] = None,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+    fingerprints: Optional[BookFingerprints] = None,
+) -> list[dict]:
+    """Scrape recent highlights from Kindle Notebook.
+    
+    With fingerprints, only books whose last-annotated date or highlight
+    count in the library sidebar changed since they were last read are
+    opened.
+    
+    Args:
+        region: Amazon region ('com' or 'co.uk')
+        headless: Run browser in headless mode
+        max_books: Maximum number of books to visit (None for all)
+        block_resources: Drop images, fonts, media and third-party trackers
+        extraction: 'dom' queries elements one by one; 'evaluate' reads the
+            library and each book view with a single in-page script;
+            'capture' fetches and parses each book's annotations response
+            without rendering it, falling back to 'dom' when that fails
+        trace_path: Record a Playwright trace to this zip file (optional)
+        user_data_dir: Use a persistent Chromium profile in this directory
+        cdp_url: Attach to an already running browser over CDP instead
+        fingerprints: Skip books whose sidebar fingerprint is unchanged and
+            mark the ones read (optional; every book is opened without).
+            Not saved here: save it once the highlights are stored
         
-        browser.close()
+    Returns:
+        List of highlight dictionaries with book_title, highlight_text, 
+        highlight_time, and fetched_at.
+    """
+    highlights = list(iter_highlights(
+        region, headless, max_books, block_resources, extraction,
+        trace_path, user_data_dir, cdp_url, fingerprints,
+    ))
     
     print(f"Scraped {len(highlights)} highlights total")
     return highlights
 
 
-def login_and_save_auth(region: str) -> None:
+def login_and_save_auth(
+    region: str,
+    user_data_dir: Optional[Path] = None,
+    cdp_url: Optional[str] = None,
+) -> None:
     """Interactive login to Amazon and save auth state.
     
     This should be run locally with headful browser to log in manually.
+    With user_data_dir the login also stays in that persistent profile.
     """
     auth_path = get_auth_path()
     notebook_url = get_kindle_notebook_url(region)
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context()
-        page = context.new_page()
+        session = open_session(p, False, user_data_dir, cdp_url, auth_path)
+        page = session.new_page()
         
         print(f"Opening {notebook_url}...")
         print("Please log in manually in the browser window.")
@@ -218,10 +830,9 @@ def login_and_save_auth(region: str) -> None:
         
         input("Press Enter after you've logged in successfully...")
         
-        context.storage_state(path=str(auth_path))
-        print(f"Auth state saved to {auth_path}")
+        session.save_auth(auth_path)
         
-        browser.close()
+        session.close()
     
     print("\nTo use this in GitHub Actions, base64 encode the file:")
     print(f"  base64 -i {auth_path} | tr -d '\\n'")
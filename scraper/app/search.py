@@ -0,0 +1,413 @@
+"""Full-text search over the highlight archive.
+
+The index is built in the build stage from every highlight in the store
+and written as plain JSON files, so the viewer can fetch them as well:
+
+    data/search/meta.json                   document count, average length,
+                                            book titles, current generation
+    data/search/gen-NNNNNN/lengths.json     length in terms and book number of each document
+    data/search/gen-NNNNNN/docs-NNNN.json   [book, highlight_text, time] for a chunk of documents
+    data/search/gen-NNNNNN/terms-NNNN.json  postings for the terms hashed to that shard
+                                            (crc32 of the UTF-8 term)
+
+Each build writes a new generation directory and only then replaces
+meta.json to point at it, so a reader never mixes the files of two
+builds, and a failed build leaves the previous index in place.
+
+Each term's postings are [doc_gaps, counts, position_gaps]: delta-encoded
+document ids, the number of positions in each document, and every
+position delta-encoded within its document, all as flat lists.
+SearchIndex only loads the term shards and document chunks a query
+touches, ranks with BM25 (counts only), and decodes positions just for
+"quoted phrases".
+
+Usage:
+    index = SearchIndex()
+    for hit in index.search('"the map is not" territory', limit=5):
+        print(hit["score"], hit["book_title"], hit["highlight_text"])
+"""
+
+import heapq
+import math
+import re
+import shutil
+import zlib
+from itertools import accumulate
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .jsonio import write_json
+from .utils import get_search_dir, load_json, save_json, utc_now
+
+
+INDEX_VERSION = 2
+META_FILENAME = "meta.json"
+LENGTHS_FILENAME = "lengths.json"
+DOCS_PER_CHUNK = 1000
+# Shards are sized so a query loads roughly this many postings per term.
+POSTINGS_PER_SHARD = 20000
+MAX_SHARDS = 4096
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+# Suffixes stripped by stem(), longest first, with the replacement and the
+# shortest stem that may remain.
+SUFFIXES = (
+    ("ational", "ate", 3),
+    ("ization", "ize", 3),
+    ("fulness", "ful", 3),
+    ("iveness", "ive", 3),
+    ("ements", "", 4),
+    ("ement", "", 4),
+    ("ments", "", 4),
+    ("ment", "", 4),
+    ("ness", "", 3),
+    ("ings", "", 3),
+    ("ing", "", 3),
+    ("ies", "y", 2),
+    ("ied", "y", 2),
+    ("edly", "", 3),
+    ("ed", "", 3),
+    ("ly", "", 3),
+    ("es", "", 4),
+    ("s", "", 3),
+)
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Strip one common English suffix ("stemming-lite").
+
+    Tokens that are not plain ASCII letters (numbers, CJK, accented words)
+    are returned unchanged, and stems never get shorter than a few letters,
+    so "running", "runs" -> "run" but "is", "this" stay as they are.
+    """
+    if not token.isascii() or not token.isalpha():
+        return token
+    for suffix, replacement, min_stem in SUFFIXES:
+        if suffix == "s" and token.endswith(("ss", "us", "is")):
+            break
+        if token.endswith(suffix) and len(token) - len(suffix) >= min_stem:
+            base = token[: -len(suffix)] + replacement
+            # "running" -> "runn" -> "run"
+            if suffix.startswith(("ing", "ed")) and len(base) > 3 and base[-1] == base[-2] \
+                    and base[-1] not in "lsz":
+                base = base[:-1]
+            return base
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into case-folded word tokens."""
+    return TOKEN_RE.findall(text.casefold())
+
+
+def analyze(text: str) -> list[str]:
+    """Tokenise and stem text into index terms, one per position."""
+    return [stem(token) for token in tokenize(text)]
+
+
+def shard_of(term: str, shard_count: int) -> int:
+    """Shard number a term is stored in."""
+    return zlib.crc32(term.encode("utf-8")) % shard_count
+
+
+def _shard_filename(shard: int) -> str:
+    return f"terms-{shard:04d}.json"
+
+
+def _chunk_filename(chunk: int) -> str:
+    return f"docs-{chunk:04d}.json"
+
+
+def _generation_dirname(generation: int) -> str:
+    return f"gen-{generation:06d}"
+
+
+def _current_generation(output_dir: Path) -> int:
+    try:
+        return int(load_json(output_dir / META_FILENAME).get("generation", 0))
+    except Exception:
+        return 0
+
+
+def _remove_stale(output_dir: Path, keep: Path) -> None:
+    """Delete every generation but `keep`, and files of the flat version 1 layout."""
+    for path in output_dir.iterdir():
+        if path == keep:
+            continue
+        if path.is_dir() and path.name.startswith("gen-"):
+            shutil.rmtree(path)
+        elif path.name.startswith(("terms-", "docs-")) or path.name == LENGTHS_FILENAME:
+            path.unlink()
+
+
+def _shard_count(total_postings: int) -> int:
+    count = 1
+    while count * POSTINGS_PER_SHARD < total_postings and count < MAX_SHARDS:
+        count *= 2
+    return count
+
+
+def _sort_time(hl: dict) -> str:
+    return hl.get("highlight_time") or hl.get("fetched_at") or ""
+
+
+def _encode_postings(postings: dict[int, list[int]]) -> list:
+    doc_gaps, counts, position_gaps = [], [], []
+    previous_doc = 0
+    for doc_id, positions in postings.items():
+        doc_gaps.append(doc_id - previous_doc)
+        counts.append(len(positions))
+        position_gaps.append(positions[0])
+        position_gaps.extend(b - a for a, b in zip(positions, positions[1:]))
+        previous_doc = doc_id
+    return [doc_gaps, counts, position_gaps]
+
+
+def build_search_index(
+    highlights: Iterable[dict],
+    output_dir: Optional[Path] = None,
+    shard_count: Optional[int] = None,
+) -> dict:
+    """Build the sharded search index and write it to disk.
+
+    Args:
+        highlights: Every highlight to make searchable
+        output_dir: Output directory (optional, defaults to data/search)
+        shard_count: Number of term shards (sized from the number of
+            postings if not provided)
+
+    Returns:
+        The meta dictionary that was written
+    """
+    output_dir = Path(output_dir or get_search_dir())
+    output_dir.mkdir(parents=True, exist_ok=True)
+    generation = _current_generation(output_dir) + 1
+    build_dir = output_dir / _generation_dirname(generation)
+    if build_dir.exists():
+        # Left by a build that failed before meta.json pointed at it.
+        shutil.rmtree(build_dir)
+    build_dir.mkdir()
+
+    books: dict[str, int] = {}
+    docs = []
+    lengths = []
+    book_ids = []
+    # Documents are numbered in order, so each term's postings dict stays
+    # sorted by document id.
+    index: dict[str, dict[int, list[int]]] = {}
+
+    for doc_id, hl in enumerate(sorted(highlights, key=_sort_time, reverse=True)):
+        book = books.setdefault(hl.get("book_title", ""), len(books))
+        text = hl.get("highlight_text", "")
+        docs.append([book, text, _sort_time(hl)])
+        book_ids.append(book)
+        terms = analyze(text)
+        lengths.append(len(terms))
+        for position, term in enumerate(terms):
+            postings = index.get(term)
+            if postings is None:
+                postings = index[term] = {}
+            positions = postings.get(doc_id)
+            if positions is None:
+                postings[doc_id] = [position]
+            else:
+                positions.append(position)
+
+    shard_count = shard_count or _shard_count(sum(len(p) for p in index.values()))
+    shards: list[dict] = [{} for _ in range(shard_count)]
+    for term, postings in index.items():
+        shards[shard_of(term, shard_count)][term] = _encode_postings(postings)
+    for shard, terms in enumerate(shards):
+        write_json(terms, build_dir / _shard_filename(shard), compact=True)
+
+    for chunk, start in enumerate(range(0, len(docs), DOCS_PER_CHUNK)):
+        write_json(
+            docs[start:start + DOCS_PER_CHUNK], build_dir / _chunk_filename(chunk), compact=True
+        )
+    write_json(
+        {"lengths": lengths, "books": book_ids}, build_dir / LENGTHS_FILENAME, compact=True
+    )
+
+    meta = {
+        "version": INDEX_VERSION,
+        "generation": generation,
+        "updated_at": utc_now(),
+        "doc_count": len(docs),
+        "avg_length": sum(lengths) / len(docs) if docs else 0.0,
+        "shard_count": shard_count,
+        "docs_per_chunk": DOCS_PER_CHUNK,
+        "books": list(books),
+    }
+    save_json(meta, output_dir / META_FILENAME)
+    _remove_stale(output_dir, build_dir)
+    print(f"Indexed {len(docs)} highlights, {len(index)} terms in {shard_count} shards")
+    return meta
+
+
+def parse_query(query: str) -> tuple[list[list[str]], list[str]]:
+    """Split a query into quoted phrases and bare terms, both analysed.
+
+    Returns:
+        (phrases as lists of terms, bare terms)
+    """
+    phrases = [analyze(phrase) for phrase in PHRASE_RE.findall(query)]
+    terms = analyze(PHRASE_RE.sub(" ", query))
+    return [phrase for phrase in phrases if phrase], terms
+
+
+def _phrase_matches(positions: list[dict[int, list[int]]], doc_id: int) -> bool:
+    """Whether the phrase's terms appear at consecutive positions in doc_id."""
+    starts = set(positions[0][doc_id])
+    for offset, term_positions in enumerate(positions[1:], start=1):
+        starts &= {position - offset for position in term_positions[doc_id]}
+        if not starts:
+            return False
+    return True
+
+
+class SearchIndex:
+    """Query API over an index written by build_search_index.
+
+    Shards and document chunks are loaded on first use and kept, so a
+    long-lived index answers repeated queries from memory.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or get_search_dir())
+        meta_path = self.directory / META_FILENAME
+        if not meta_path.exists():
+            raise FileNotFoundError(
+                f"Search index not found at {self.directory}. "
+                "Run the build stage with --search-index first"
+            )
+        self.meta = load_json(meta_path)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {self.meta.get('version')}")
+        self.files = self.directory / _generation_dirname(self.meta["generation"])
+        self._shards: dict[int, dict] = {}
+        self._chunks: dict[int, list] = {}
+        self._counts: dict[str, dict[int, int]] = {}
+        self._positions: dict[str, dict[int, list[int]]] = {}
+        self._lengths: Optional[list[int]] = None
+        self._book_ids: Optional[list[int]] = None
+
+    def _encoded(self, term: str) -> list:
+        shard = shard_of(term, self.meta["shard_count"])
+        if shard not in self._shards:
+            self._shards[shard] = load_json(self.files / _shard_filename(shard))
+        return self._shards[shard].get(term, [[], [], []])
+
+    def counts(self, term: str) -> dict[int, int]:
+        """Occurrences of an (already analysed) term, by document id."""
+        counts = self._counts.get(term)
+        if counts is None:
+            doc_gaps, term_counts, _ = self._encoded(term)
+            counts = self._counts[term] = dict(zip(accumulate(doc_gaps), term_counts))
+        return counts
+
+    def positions(self, term: str) -> dict[int, list[int]]:
+        """Positions of an (already analysed) term, by document id."""
+        positions = self._positions.get(term)
+        if positions is None:
+            doc_gaps, term_counts, position_gaps = self._encoded(term)
+            positions = {}
+            start = 0
+            for doc_id, count in zip(accumulate(doc_gaps), term_counts):
+                positions[doc_id] = list(accumulate(position_gaps[start:start + count]))
+                start += count
+            self._positions[term] = positions
+        return positions
+
+    def document(self, doc_id: int) -> dict:
+        """Load one indexed highlight."""
+        chunk, offset = divmod(doc_id, self.meta["docs_per_chunk"])
+        if chunk not in self._chunks:
+            self._chunks[chunk] = load_json(self.files / _chunk_filename(chunk))
+        book, text, highlight_time = self._chunks[chunk][offset]
+        return {
+            "book_title": self.meta["books"][book],
+            "highlight_text": text,
+            "highlight_time": highlight_time,
+        }
+
+    def _load_lengths(self) -> None:
+        if self._lengths is None:
+            data = load_json(self.files / LENGTHS_FILENAME)
+            self._lengths = data["lengths"]
+            self._book_ids = data["books"]
+
+    def search(self, query: str, limit: int = 10, book_title: Optional[str] = None) -> list[dict]:
+        """Find highlights matching every term and phrase of the query.
+
+        Args:
+            query: Words to match (stemmed), with "quoted phrases" matched
+                as consecutive words
+            limit: Maximum number of results
+            book_title: Only return highlights from this book
+
+        Returns:
+            Highlight dictionaries (book_title, highlight_text,
+            highlight_time, score), best match first
+        """
+        phrases, terms = parse_query(query)
+        all_terms = list(dict.fromkeys(terms + [term for phrase in phrases for term in phrase]))
+        if not all_terms:
+            return []
+
+        term_counts = {term: self.counts(term) for term in all_terms}
+
+        # Intersect starting from the rarest term.
+        ordered = sorted(term_counts.values(), key=len)
+        candidates = set(ordered[0])
+        for counts in ordered[1:]:
+            if not candidates:
+                return []
+            candidates.intersection_update(counts)
+
+        self._load_lengths()
+        if book_title is not None:
+            books = self.meta["books"]
+            candidates = {
+                doc_id for doc_id in candidates if books[self._book_ids[doc_id]] == book_title
+            }
+
+        for phrase in phrases:
+            phrase_positions = [self.positions(term) for term in phrase]
+            candidates = {
+                doc_id for doc_id in candidates if _phrase_matches(phrase_positions, doc_id)
+            }
+
+        if not candidates:
+            return []
+
+        doc_count = self.meta["doc_count"]
+        avg_length = self.meta["avg_length"] or 1.0
+        weights = [
+            (math.log(1 + (doc_count - len(counts) + 0.5) / (len(counts) + 0.5)), counts)
+            for counts in term_counts.values()
+        ]
+
+        scored = []
+        lengths = self._lengths
+        for doc_id in candidates:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_length)
+            score = 0.0
+            for idf, counts in weights:
+                tf = counts[doc_id]
+                score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            scored.append((score, doc_id))
+
+        results = []
+        for score, doc_id in heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1])):
+            hit = self.document(doc_id)
+            hit["score"] = round(score, 4)
+            results.append(hit)
+        return results
@@ -0,0 +1,218 @@
+"""Persisted ranking of the scraper's selector fallback chains.
+
+The scraper finds books, titles, highlights and time headers by trying a
+chain of CSS selectors in order, and every selector that matches nothing
+costs a browser round trip. SelectorCache remembers which selector
+matched, per region and page layout, in data/selector_cache.json:
+
+- Each selector keeps a score that decays on every lookup and grows on
+  every hit. A selector that has been matching recently moves ahead of
+  the selectors as specific as it is (same CSS specificity, next to it
+  in the default chain), but never ahead of a more specific one, so a
+  generic fallback such as "a" cannot shadow the selector it backs up.
+- A selector that missed DEMOTE_AFTER times in a row without a hit in
+  between is tried after every other selector of its group (the group
+  order still holds, so a generic fallback never jumps ahead of it),
+  except on the first lookup of each run and every REPROBE_EVERY lookups
+  after it, which try it in its own place again so it can recover once
+  it matches.
+- Selectors are only ever reordered, never dropped, so a layout change
+  still falls through to whichever selector now matches.
+
+Hits, misses and the round trips spent on misses are counted per run and
+printed by report(), as are matched time headers that did not parse
+(record_unparsed), which count as neither.
+"""
+
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .jsonio import read_json, write_json
+from .metrics import Metrics, get_metrics
+from .utils import get_selector_cache_path
+
+
+CACHE_VERSION = 1
+DECAY = 0.9
+DEMOTE_AFTER = 3
+REPROBE_EVERY = 50
+
+_ATTRIBUTE_RE = re.compile(r"\[[^\]]*\]")
+_ID_RE = re.compile(r"#[\w-]+")
+_CLASS_RE = re.compile(r"\.[\w-]+|:[\w-]+")
+_TYPE_RE = re.compile(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)")
+
+
+def _read(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    try:
+        return read_json(path)
+    except Exception as e:
+        print(f"Could not read selector cache, starting fresh: {e}")
+        return None
+
+
+def specificity(selector: str) -> tuple[int, int, int]:
+    """CSS specificity of a selector: (ids, classes/attributes/pseudo-classes, types)."""
+    attributes = len(_ATTRIBUTE_RE.findall(selector))
+    selector = _ATTRIBUTE_RE.sub("", selector)
+    return (
+        len(_ID_RE.findall(selector)),
+        attributes + len(_CLASS_RE.findall(selector)),
+        len(_TYPE_RE.findall(selector)),
+    )
+
+
+def _groups(selectors: list[str]) -> list[int]:
+    """Number each selector by its run of equally specific neighbours."""
+    groups = []
+    for index, selector in enumerate(selectors):
+        if index and specificity(selector) == specificity(selectors[index - 1]):
+            groups.append(groups[-1])
+        else:
+            groups.append(index)
+    return groups
+
+
+class SelectorCache:
+    """Selector rankings for one region and page layout.
+
+    A SelectorCache created directly, without a path, starts with no
+    history (selectors in their default order) and is never saved.
+
+    Usage:
+        cache = SelectorCache.load(region, layout)
+        for sel in cache.order("book", BOOK_SELECTORS):
+            books = page.query_selector_all(sel)
+            cache.record("book", sel, bool(books))
+            if books:
+                break
+        cache.report()
+        cache.save()
+    """
+
+    def __init__(
+        self,
+        region: str,
+        layout: str,
+        data: Optional[dict] = None,
+        path: Optional[Path] = None,
+    ):
+        self.key = f"{region}/{layout}"
+        self.path = Path(path) if path else None
+        self.data = data if data and data.get("version") == CACHE_VERSION else {
+            "version": CACHE_VERSION, "layouts": {},
+        }
+        self.chains: dict[str, dict[str, dict]] = self.data["layouts"].setdefault(self.key, {})
+        # Per-run counts: chain -> [lookups, hits, misses, unparsed]
+        self.stats: dict[str, list[int]] = {}
+        self._changed = False
+
+    @classmethod
+    def load(cls, region: str, layout: str, path: Optional[Path] = None) -> "SelectorCache":
+        """Load the cache file, starting empty if it is missing or unreadable."""
+        path = Path(path or get_selector_cache_path())
+        return cls(region, layout, _read(path), path)
+
+    def _entry(self, chain: str, selector: str) -> dict:
+        return self.chains.setdefault(chain, {}).setdefault(
+            selector, {"score": 0.0, "hits": 0, "misses": 0, "streak": 0}
+        )
+
+    def ranked(
+        self,
+        chain: str,
+        selectors: Iterable[str],
+        demote: bool = True,
+    ) -> list[str]:
+        """Return the selectors best first, without counting a lookup.
+
+        Selectors keep the default order of their specificity groups.
+        Within a group, demoted selectors go last (unless demote is
+        False) and the rest are ranked by score; ties (including
+        selectors never tried) keep their default order.
+        """
+        selectors = list(selectors)
+        groups = _groups(selectors)
+        entries = self.chains.get(chain, {})
+
+        def rank(index: int) -> tuple:
+            entry = entries.get(selectors[index])
+            if entry is None:
+                return (groups[index], False, 0.0, index)
+            demoted = demote and entry["streak"] >= DEMOTE_AFTER
+            return (groups[index], demoted, -entry["score"], index)
+
+        return [selectors[index] for index in sorted(range(len(selectors)), key=rank)]
+
+    def order(self, chain: str, selectors: Iterable[str]) -> list[str]:
+        """Start a lookup: return the selectors in the order to try them.
+
+        Every score of the chain decays once per lookup, so old hits
+        count for less than recent ones. The first lookup of a run, and
+        every REPROBE_EVERY-th after it, tries demoted selectors in place.
+        """
+        for entry in self.chains.get(chain, {}).values():
+            entry["score"] *= DECAY
+        stats = self.stats.setdefault(chain, [0, 0, 0, 0])
+        stats[0] += 1
+        return self.ranked(chain, selectors, demote=stats[0] % REPROBE_EVERY != 1)
+
+    def record(self, chain: str, selector: str, hit: bool) -> None:
+        """Record whether a selector matched; call it for every selector tried."""
+        entry = self._entry(chain, selector)
+        stats = self.stats.setdefault(chain, [0, 0, 0, 0])
+        if hit:
+            entry["score"] += 1.0
+            entry["hits"] += 1
+            entry["streak"] = 0
+            stats[1] += 1
+        else:
+            entry["misses"] += 1
+            entry["streak"] += 1
+            stats[2] += 1
+        self._changed = True
+
+    def record_unparsed(self, chain: str, selector: str) -> None:
+        """Record a selector that matched an element whose text did not parse.
+
+        Neither a hit nor a miss: the selector keeps its rank and streak.
+        """
+        entry = self._entry(chain, selector)
+        entry["unparsed"] = entry.get("unparsed", 0) + 1
+        self.stats.setdefault(chain, [0, 0, 0, 0])[3] += 1
+        self._changed = True
+
+    def report(self, timer: Optional[Metrics] = None) -> None:
+        """Print this run's hit and miss counts and add them to the metrics."""
+        if not self.stats:
+            return
+        timer = timer or get_metrics()
+        print(f"Selector cache ({self.key}):")
+        for chain, (lookups, hits, misses, unparsed) in self.stats.items():
+            best = self.ranked(chain, self.chains.get(chain, {}))
+            print(
+                f"  {chain:<10} {lookups} lookups, {hits} hits, {misses} missed round trips"
+                + (f", {unparsed} unparsed" if unparsed else "")
+                + f" (now first: {best[0] if best else '-'})"
+            )
+            timer.incr("selector_hits", hits)
+            timer.incr("selector_misses", misses)
+            timer.incr("selector_unparsed", unparsed)
+
+    def save(self) -> None:
+        """Write this layout's rankings to the cache file if anything was recorded.
+
+        The file is re-read first, so rankings that another scrape saved
+        for other layouts in the meantime are kept.
+        """
+        if not self._changed or self.path is None:
+            return
+        data = _read(self.path)
+        if not data or data.get("version") != CACHE_VERSION:
+            data = self.data
+        data["layouts"][self.key] = self.chains
+        write_json(data, self.path)
+        self._changed = False
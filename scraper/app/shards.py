@@ -0,0 +1,115 @@
+"""Sharded per-book output with a compact index manifest."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from .utils import get_shards_dir, load_json, save_json, utc_now
+
+
+INDEX_FILENAME = "index.json"
+
+
+def book_id(book_title: str) -> str:
+    """Stable short identifier for a book title."""
+    return hashlib.sha1(book_title.encode("utf-8")).hexdigest()[:12]
+
+
+def shard_filename(book_title: str) -> str:
+    """Flat shard filename for a book (Gists cannot hold directories)."""
+    return f"book-{book_id(book_title)}.json"
+
+
+def encode_shard(book_title: str, highlights: list[dict]) -> str:
+    """Serialise one book's shard as compact JSON."""
+    shard = {"book_title": book_title, "items": highlights}
+    return json.dumps(shard, separators=(",", ":"), ensure_ascii=False)
+
+
+def _sort_time(hl: dict) -> str:
+    return hl.get("highlight_time") or hl.get("fetched_at") or ""
+
+
+def build_manifest(books: dict[str, list[dict]]) -> tuple[dict, dict[str, str]]:
+    """Build the index manifest and the encoded shard for every book.
+
+    Args:
+        books: Highlights grouped by book title, newest first
+
+    Returns:
+        (manifest, {shard filename: shard content})
+    """
+    entries = []
+    contents: dict[str, str] = {}
+
+    for book_title, highlights in books.items():
+        if not highlights:
+            continue
+        filename = shard_filename(book_title)
+        content = encode_shard(book_title, highlights)
+        contents[filename] = content
+        entries.append({
+            "book_title": book_title,
+            "latest_time": _sort_time(highlights[0]),
+            "count": len(highlights),
+            "shard": filename,
+            "hash": hashlib.sha256(content.encode("utf-8")).hexdigest()[:16],
+        })
+
+    entries.sort(key=lambda entry: entry["latest_time"], reverse=True)
+    manifest = {"updated_at": utc_now(), "books": entries}
+    return manifest, contents
+
+
+def load_manifest(output_dir: Optional[Path] = None) -> dict:
+    """Load the previously written manifest, or an empty one."""
+    path = Path(output_dir or get_shards_dir()) / INDEX_FILENAME
+    try:
+        if path.exists():
+            return load_json(path)
+    except Exception as e:
+        print(f"Could not load shard manifest: {e}")
+    return {}
+
+
+def write_shards(
+    books: dict[str, list[dict]],
+    output_dir: Optional[Path] = None,
+) -> tuple[dict, dict[str, str]]:
+    """Write index.json and every shard whose content hash changed.
+
+    Shards that are unchanged since the last manifest are not rewritten,
+    and shards for books that disappeared are removed.
+
+    Args:
+        books: Highlights grouped by book title, newest first
+        output_dir: Output directory (optional, defaults to data/shards)
+
+    Returns:
+        (manifest, {filename: content} for the shards that changed)
+    """
+    output_dir = Path(output_dir or get_shards_dir())
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    previous = {
+        entry["shard"]: entry["hash"]
+        for entry in load_manifest(output_dir).get("books", [])
+    }
+    manifest, contents = build_manifest(books)
+
+    changed = {}
+    for entry in manifest["books"]:
+        filename = entry["shard"]
+        shard_path = output_dir / filename
+        if previous.get(filename) == entry["hash"] and shard_path.exists():
+            continue
+        shard_path.write_text(contents[filename], encoding="utf-8")
+        changed[filename] = contents[filename]
+
+    for filename in set(previous) - set(contents):
+        (output_dir / filename).unlink(missing_ok=True)
+
+    save_json(manifest, output_dir / INDEX_FILENAME)
+    print(f"Wrote {len(changed)} of {len(contents)} shards to {output_dir}")
+    return manifest, changed
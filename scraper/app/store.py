@@ -0,0 +1,225 @@
+"""SQLite-backed persistent highlight store."""
+
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .jsonio import iter_items, write_items
+from .utils import get_latest_path, get_store_path, save_json, utc_now
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS highlights (
+    book_title TEXT NOT NULL,
+    highlight_text TEXT NOT NULL,
+    highlight_time TEXT,
+    fetched_at TEXT,
+    sort_time TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (book_title, highlight_text)
+);
+CREATE INDEX IF NOT EXISTS idx_highlights_book_time
+    ON highlights (book_title, sort_time);
+CREATE INDEX IF NOT EXISTS idx_highlights_time
+    ON highlights (sort_time);
+"""
+
+# Existing rows are only written when they gain a highlight_time, so
+# re-scraping a highlight that is already stored touches no rows.
+UPSERT_SQL = """
+INSERT INTO highlights (book_title, highlight_text, highlight_time, fetched_at, sort_time)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (book_title, highlight_text) DO UPDATE SET
+    highlight_time = excluded.highlight_time,
+    sort_time = excluded.sort_time
+WHERE highlights.highlight_time IS NULL AND excluded.highlight_time IS NOT NULL
+"""
+
+# Newest first. Highlight times are only day-granular, so ties on sort_time
+# are common: the highlight fetched last wins them, then the row stored last,
+# as merge_with_existing let new highlights win.
+RECENCY_ORDER = "sort_time DESC, fetched_at DESC, rowid DESC"
+
+LATEST_SQL = f"""
+SELECT book_title, highlight_text, highlight_time, fetched_at
+FROM (
+    SELECT book_title, highlight_text, highlight_time, fetched_at, sort_time,
+        ROW_NUMBER() OVER (PARTITION BY book_title ORDER BY {RECENCY_ORDER}) AS rank
+    FROM highlights
+)
+WHERE rank = 1
+ORDER BY sort_time DESC, fetched_at DESC, book_title
+"""
+
+
+def _sort_time(hl: dict) -> str:
+    return hl.get("highlight_time") or hl.get("fetched_at") or ""
+
+
+def _row(hl: dict) -> tuple:
+    return (
+        hl["book_title"],
+        hl.get("highlight_text", ""),
+        hl.get("highlight_time"),
+        hl.get("fetched_at"),
+        _sort_time(hl),
+    )
+
+
+class HighlightStore:
+    """Persistent store of every highlight seen, keyed by book and text.
+
+    Usage:
+        with HighlightStore() as store:
+            store.upsert(highlights)
+            output = store.export_latest()
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_store_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "HighlightStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def count(self) -> int:
+        """Return the number of stored highlights."""
+        return self.conn.execute("SELECT COUNT(*) FROM highlights").fetchone()[0]
+
+    def upsert(self, highlights: Iterable[dict]) -> int:
+        """Insert new highlights and fill in missing highlight times.
+
+        Args:
+            highlights: Highlight dictionaries
+
+        Returns:
+            Number of rows inserted or updated
+        """
+        rows = (_row(hl) for hl in highlights if hl.get("book_title"))
+
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(UPSERT_SQL, rows)
+        return self.conn.total_changes - before
+
+    def upsert_changed(self, highlights: Iterable[dict]) -> list[dict]:
+        """Like upsert, but return the highlights that were inserted or updated.
+
+        Rows are written one statement at a time (in one transaction) so
+        each can be checked, which makes this somewhat slower than upsert.
+        """
+        changed = []
+        with self.conn:
+            for hl in highlights:
+                if not hl.get("book_title"):
+                    continue
+                before = self.conn.total_changes
+                self.conn.execute(UPSERT_SQL, _row(hl))
+                if self.conn.total_changes != before:
+                    changed.append(hl)
+        return changed
+
+    def latest_per_book(self) -> list[dict]:
+        """Return the most recent highlight per book, most recent first."""
+        return [
+            {
+                "book_title": book_title,
+                "highlight_text": highlight_text,
+                "highlight_time": highlight_time,
+                "fetched_at": fetched_at,
+            }
+            for book_title, highlight_text, highlight_time, fetched_at in
+            self.conn.execute(LATEST_SQL)
+        ]
+
+    def highlights_by_book(self) -> dict[str, list[dict]]:
+        """Return every stored highlight grouped by book, newest first."""
+        books: dict[str, list[dict]] = {}
+        rows = self.conn.execute(
+            "SELECT book_title, highlight_text, highlight_time, fetched_at "
+            f"FROM highlights ORDER BY book_title, {RECENCY_ORDER}"
+        )
+        for book_title, highlight_text, highlight_time, fetched_at in rows:
+            books.setdefault(book_title, []).append({
+                "book_title": book_title,
+                "highlight_text": highlight_text,
+                "highlight_time": highlight_time,
+                "fetched_at": fetched_at,
+            })
+        return books
+
+    def iter_highlights(self) -> Iterator[dict]:
+        """Yield every stored highlight, newest first, without loading them all."""
+        rows = self.conn.execute(
+            "SELECT book_title, highlight_text, highlight_time, fetched_at "
+            f"FROM highlights ORDER BY {RECENCY_ORDER}"
+        )
+        for book_title, highlight_text, highlight_time, fetched_at in rows:
+            yield {
+                "book_title": book_title,
+                "highlight_text": highlight_text,
+                "highlight_time": highlight_time,
+                "fetched_at": fetched_at,
+            }
+
+    def export_archive(self, path: Path, compact: bool = True) -> int:
+        """Stream every stored highlight to a JSON archive.
+
+        Args:
+            path: Output path; a .gz suffix writes a gzip-compressed archive
+            compact: Write compact instead of indented JSON
+
+        Returns:
+            Number of highlights written
+        """
+        count = write_items(
+            Path(path), self.iter_highlights(), {"updated_at": utc_now()}, compact=compact
+        )
+        print(f"Saved {count} highlights to {path}")
+        return count
+
+    def import_json(self, path: Optional[Path] = None) -> int:
+        """Seed the store from an existing latest.json.
+
+        Args:
+            path: Path to latest.json (optional, defaults to data/latest.json)
+
+        Returns:
+            Number of rows inserted
+        """
+        path = Path(path or get_latest_path())
+        if not path.exists():
+            return 0
+
+        try:
+            inserted = self.upsert(iter_items(path))
+        except Exception as e:
+            print(f"Could not import existing highlights: {e}")
+            return 0
+
+        print(f"Imported {inserted} highlights from {path.name}")
+        return inserted
+
+    def export_latest(self, path: Optional[Path] = None) -> dict:
+        """Write latest.json from the store.
+
+        Args:
+            path: Output path (optional, defaults to data/latest.json)
+
+        Returns:
+            The output dictionary that was saved
+        """
+        output = {
+            "updated_at": utc_now(),
+            "items": self.latest_per_book(),
+        }
+        save_json(output, Path(path or get_latest_path()))
+        return output
@@ -1,11 +1,19 @@
 """Utility functions for the Kindle scraper."""
 
 import os
-import json
 import base64
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
+from .jsonio import read_json, write_json
+
+
+# Scraper settings the CLI needs without importing Playwright.
+DEFAULT_MAX_BOOKS = 10
+EXTRACTION_MODES = ("dom", "evaluate", "capture")
+
 
 def get_project_root() -> Path:
     """Get the project root directory (scraper folder)."""
@@ -29,6 +37,76 @@ def get_latest_path() -> Path:
     return get_data_dir() / "latest.json"
 
 
+def get_store_path() -> Path:
+    """Get the SQLite highlight store path."""
+    return get_data_dir() / "highlights.db"
+
+
+def get_clippings_state_path() -> Path:
+    """Get the My Clippings.txt checkpoint path."""
+    return get_data_dir() / "clippings_state.json"
+
+
+def get_shards_dir() -> Path:
+    """Get the directory for sharded per-book output."""
+    return get_data_dir() / "shards"
+
+
+def get_search_dir() -> Path:
+    """Get the directory for the full-text search index."""
+    return get_data_dir() / "search"
+
+
+def get_journal_dir() -> Path:
+    """Get the directory for the append-only highlight journal."""
+    return get_data_dir() / "journal"
+
+
+def get_selector_cache_path() -> Path:
+    """Get the selector hit cache path."""
+    return get_data_dir() / "selector_cache.json"
+
+
+def get_book_fingerprints_path() -> Path:
+    """Get the per-book change fingerprints path."""
+    return get_data_dir() / "book_fingerprints.json"
+
+
+def get_gist_state_path() -> Path:
+    """Get the Gist upload state path."""
+    return get_data_dir() / "gist_state.json"
+
+
+def get_user_data_dir() -> Path:
+    """Get the default persistent Chromium profile directory."""
+    return get_data_dir() / "browser-profile"
+
+
+def get_accounts_dir() -> Path:
+    """Get the default parent directory for per-account batch output."""
+    return get_data_dir() / "accounts"
+
+
+def get_batch_report_path() -> Path:
+    """Get the batch run report path."""
+    return get_data_dir() / "batch_report.json"
+
+
+def get_metrics_path() -> Path:
+    """Get the run metrics JSON path."""
+    return get_data_dir() / "metrics.json"
+
+
+def get_profile_path() -> Path:
+    """Get the cProfile stats output path."""
+    return get_data_dir() / "profile.pstats"
+
+
+def get_trace_path() -> Path:
+    """Get the Playwright trace output path."""
+    return get_data_dir() / "trace.zip"
+
+
 def utc_now() -> str:
     """Get current UTC timestamp in ISO format."""
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -43,16 +121,17 @@ def decode_base64_to_file(b64_string: str, output_path: Path) -> None:
 
 
 def load_json(path: Path) -> dict:
-    """Load JSON from a file."""
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Load JSON from a file (gzip-compressed if the name ends in .gz)."""
+    return read_json(Path(path))
+
 
+def save_json(data: dict, path: Path, compact: bool = False) -> None:
+    """Save data to a JSON file.
 
-def save_json(data: dict, path: Path) -> None:
-    """Save data to a JSON file."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    The file is replaced atomically, so an interrupted run leaves the
+    previous version intact instead of a truncated file.
+    """
+    write_json(data, Path(path), compact)
     print(f"Saved JSON to {path}")
 
 
@@ -68,3 +147,33 @@ def get_amazon_region() -> str:
 def get_kindle_notebook_url(region: str) -> str:
     """Get the Kindle Notebook URL for the given region."""
     return f"https://read.amazon.{region}/notebook"
+
+
+def get_book_notebook_url(region: str, asin: str) -> str:
+    """Get the Kindle Notebook URL that opens a single book's annotations."""
+    return f"{get_kindle_notebook_url(region)}?asin={asin}&contentLimitState=&"
+
+
+class PhaseTimer:
+    """Accumulate wall-clock seconds per named phase."""
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block and add it to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def report(self) -> None:
+        """Print the accumulated timings."""
+        if not self.timings:
+            return
+        print("Phase timings:")
+        for name, seconds in self.timings.items():
+            print(f"  {name:<12} {seconds:7.2f}s")
@@ -0,0 +1 @@
+"""Benchmarks for the Kindle highlights scraper."""
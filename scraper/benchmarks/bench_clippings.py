@@ -0,0 +1,59 @@
+"""Benchmark the bulk My Clippings.txt parser by worker count.
+
+Run from the scraper folder:
+
+    python -m benchmarks.bench_clippings --records 500000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.clippings import build_latest_from_clippings, iter_clippings
+
+from .generators import write_clippings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "My Clippings.txt"
+        write_clippings(path, args.records)
+        size_mb = path.stat().st_size / 1e6
+        print(f"{args.records} records, {size_mb:.1f} MB")
+
+        start = time.perf_counter()
+        count = sum(1 for hl, _ in iter_clippings(path) if hl)
+        streaming = time.perf_counter() - start
+        print(f"{'streaming':>10}: {streaming:7.3f}s  ({count} highlights)")
+
+        cpu_count = os.cpu_count() or 1
+        workers = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+        baseline = None
+
+        for n in workers:
+            best = min(
+                _timed(build_latest_from_clippings, path, n)
+                for _ in range(args.repeat)
+            )
+            baseline = baseline or best
+            print(
+                f"{n:>3} workers: {best:7.3f}s  "
+                f"{size_mb / best:7.1f} MB/s  speedup {baseline / best:4.2f}x"
+            )
+
+
+def _timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
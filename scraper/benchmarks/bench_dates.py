@@ -0,0 +1,92 @@
+"""Benchmark highlight date parsing: legacy strptime loop vs app.dates.
+
+Run from the scraper folder:
+
+    python -m benchmarks.bench_dates --strings 200000 --distinct 300
+"""
+
+import argparse
+import re
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.dates import parse_date, parse_dates
+
+from .generators import make_headers
+
+
+def legacy_parse(time_str: str) -> Optional[str]:
+    """The previous scraper.parse_highlight_time, kept as the baseline."""
+    if not time_str:
+        return None
+
+    time_str = time_str.strip()
+
+    patterns = [
+        (r"(\d{1,2})\s+(\w+)\s+(\d{4})", "%d %B %Y"),
+        (r"(\w+)\s+(\d{1,2}),?\s+(\d{4})", "%B %d %Y"),
+        (r"(\d{1,2})\s+(\w{3})\s+(\d{4})", "%d %b %Y"),
+    ]
+
+    for pattern, date_format in patterns:
+        match = re.search(pattern, time_str)
+        if match:
+            try:
+                date_str = " ".join(match.groups())
+                dt = datetime.strptime(date_str, date_format)
+                return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+            except ValueError:
+                continue
+
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strings", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    headers = make_headers(args.strings, args.distinct)
+    print(f"{args.strings} header strings, {args.distinct} distinct")
+
+    def uncached() -> None:
+        for header in headers:
+            parse_date.__wrapped__(header)
+
+    def cached() -> None:
+        parse_date.cache_clear()
+        for header in headers:
+            parse_date(header)
+
+    def batch() -> None:
+        parse_date.cache_clear()
+        parse_dates(headers)
+
+    cases = [
+        ("legacy", lambda: [legacy_parse(header) for header in headers]),
+        ("compiled", uncached),
+        ("cached", cached),
+        ("batch", batch),
+    ]
+
+    baseline = None
+    for name, func in cases:
+        best = min(_timed(func) for _ in range(args.repeat))
+        baseline = baseline or best
+        print(
+            f"{name:>9}: {best:7.3f}s  {args.strings / best:12,.0f} parses/s  "
+            f"speedup {baseline / best:6.1f}x"
+        )
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
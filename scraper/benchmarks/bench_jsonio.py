@@ -0,0 +1,102 @@
+"""Benchmark JSON archive writing and reading: stdlib json vs app.jsonio.
+
+Run from the scraper folder:
+
+    python -m benchmarks.bench_jsonio --items 1000000
+    python -m benchmarks.bench_jsonio --items 1000000 --backend json
+
+The items are generated up front, so the numbers only cover encoding,
+decoding and I/O. Each case is timed once, then run again under
+tracemalloc to measure its peak Python memory (the second run is slower
+and not timed). The legacy cases are the previous utils.save_json and
+load_json: json.dump with indent=2 written in place, and json.load of the
+whole file.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from app import jsonio
+from app.jsonio import iter_items, read_json, write_items, write_json
+
+from .generators import iter_highlights
+
+
+def legacy_save(data: dict, path: Path) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def legacy_load(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def measure(func: Callable[[], object]) -> tuple[float, int]:
+    """Return (seconds, peak traced bytes) for func."""
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--backend", choices=("auto", "json"), default="auto",
+                        help="'json' forces the stdlib fallback even if orjson is installed")
+    args = parser.parse_args()
+    if args.backend == "json":
+        jsonio.orjson = None
+        jsonio.BACKEND = "json"
+
+    n = args.items
+    header = {"updated_at": "2026-01-01T00:00:00Z"}
+    items = list(iter_highlights(n))
+    document = {**header, "items": items}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        plain = tmp / "archive.json"
+        compact = tmp / "archive-compact.json"
+        gz = tmp / "archive.json.gz"
+
+        cases = [
+            ("legacy json.dump indent=2", plain, lambda: legacy_save(document, plain)),
+            ("write_json indent=2 (atomic)", plain, lambda: write_json(document, plain)),
+            ("write_items indent=2 (streamed)", plain,
+             lambda: write_items(plain, iter(items), header)),
+            ("write_items compact (streamed)", compact,
+             lambda: write_items(compact, iter(items), header, compact=True)),
+            ("write_items compact .gz (streamed)", gz,
+             lambda: write_items(gz, iter(items), header, compact=True)),
+            ("legacy json.load", plain, lambda: legacy_load(plain)),
+            ("read_json", plain, lambda: read_json(plain)),
+            ("iter_items indent=2", plain, lambda: sum(1 for _ in iter_items(plain))),
+            ("iter_items compact", compact, lambda: sum(1 for _ in iter_items(compact))),
+            ("iter_items compact .gz", gz, lambda: sum(1 for _ in iter_items(gz))),
+        ]
+
+        print(f"{n:,} items, backend: {jsonio.BACKEND}")
+        print(f"{'case':>36}  {'seconds':>8}  {'items/s':>10}  {'MB/s':>7}  {'peak MB':>8}  {'file MB':>8}")
+        for name, path, func in cases:
+            seconds, peak = measure(func)
+            size = path.stat().st_size
+            print(
+                f"{name:>36}  {seconds:8.2f}  {n / seconds:10,.0f}  "
+                f"{size / seconds / 1e6:7.1f}  {peak / 1e6:8.1f}  {size / 1e6:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Seeded generators for synthetic benchmark inputs.
+
+Every generator takes a `seed`, so the same arguments always produce the
+same data and benchmark runs stay comparable.
+"""
+
+import html
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+
+WORDS = (
+    "the habit system goal identity change small tiny atomic compound "
+    "interest attention focus deep work reading memory practice"
+).split()
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June", "July",
+    "August", "September", "October", "November", "December",
+]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+EPOCH = datetime(2020, 1, 1)
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+
+
+def _when(rng: random.Random) -> datetime:
+    return EPOCH + timedelta(seconds=rng.randrange(6 * 365 * 24 * 3600))
+
+
+def notebook_header(when: datetime) -> str:
+    """A notebook-style highlight header for the given time."""
+    return (
+        f"Yellow highlight | Location: {when.minute * 10} | "
+        f"{WEEKDAYS[when.weekday()]} {when.day} {MONTHS[when.month - 1]} {when.year}"
+    )
+
+
+def iter_highlights(count: int, books: int = 500, seed: int = 1) -> Iterator[dict]:
+    """Yield synthetic highlight dictionaries.
+
+    Roughly one in ten highlights has no highlight_time, so the fetched_at
+    fallback paths are exercised too.
+    """
+    rng = random.Random(seed)
+    fetched_at = "2026-03-01T00:00:00Z"
+    for _ in range(count):
+        book = rng.randrange(books)
+        highlight_time = None
+        if rng.random() >= 0.1:
+            highlight_time = _when(rng).strftime("%Y-%m-%dT%H:%M:%SZ")
+        yield {
+            "book_title": f"Book {book}",
+            "highlight_text": _text(rng),
+            "highlight_time": highlight_time,
+            "fetched_at": fetched_at,
+        }
+
+
+def make_highlights(count: int, books: int = 500, seed: int = 1) -> list[dict]:
+    """Return a list of synthetic highlight dictionaries."""
+    return list(iter_highlights(count, books, seed))
+
+
+def make_headers(count: int, distinct: int = 300, seed: int = 1) -> list[str]:
+    """Return notebook headers drawn from `distinct` unique dates."""
+    rng = random.Random(seed)
+    pool = [notebook_header(_when(rng)) for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def write_clippings(path: Path, records: int, books: int = 500, seed: int = 1) -> None:
+    """Write a synthetic My Clippings.txt with the given number of records.
+
+    Records are written one at a time, so 1e7-record files do not need to
+    fit in memory.
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="\r\n") as f:
+        f.write("\ufeff")
+        for i in range(records):
+            book = rng.randrange(books)
+            f.write(
+                f"Book {book} (Author {book % 37})\n"
+                f"- Your Highlight on page {i % 400} | Location {i}-{i + 2} | "
+                f"Added on Monday, {1 + i % 28} February 2026 "
+                f"{i % 24:02d}:{i % 60:02d}:{i % 60:02d}\n"
+                f"\n{_text(rng)}\n==========\n"
+            )
+
+
+def make_notebook_html(highlights: int, asin: str = "B000000001", seed: int = 1) -> str:
+    """Return a fake notebook annotations fragment for one book.
+
+    Uses the same ids as the real page (kp-notebook-annotations-asin,
+    annotationHighlightHeader, highlight), so capture.parse_annotations_html
+    and the DOM selectors both find the highlights.
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<div id="kp-notebook-annotations">',
+        f'<input type="hidden" id="kp-notebook-annotations-asin" value="{asin}">',
+    ]
+    for i in range(highlights):
+        parts.append(
+            '<div class="a-row a-spacing-base">'
+            f'<span id="annotationHighlightHeader" class="a-size-small">'
+            f"{html.escape(notebook_header(_when(rng)))}</span>"
+            '<div class="kp-notebook-highlight kp-notebook-highlight-yellow">'
+            f'<span id="highlight">{html.escape(_text(rng))}</span></div>'
+            f'<div class="kp-notebook-note" id="note-{i}"><span id="note"></span></div>'
+            "</div>"
+        )
+    parts.append("</div>")
+    return "".join(parts)
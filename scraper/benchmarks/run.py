@@ -0,0 +1,273 @@
+"""Run the benchmark suite and compare the results against a baseline.
+
+Run from the scraper folder:
+
+    python -m benchmarks.run --sizes 1e3,1e4,1e5
+    python -m benchmarks.run --sizes 1e3,1e4 --save-baseline
+
+Results are written to benchmarks/results.json. When benchmarks/baseline.json
+exists, every case is compared against it, and cases that got slower than
+--threshold are reported as regressions (exit code 1 with
+--fail-on-regression).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.build import deduplicate_highlights, merge_with_existing, sort_by_recency
+from app.capture import parse_annotations_html
+from app.clippings import iter_clippings
+from app.gist import content_hash, encode_content
+from app.neardup import collapse_near_duplicates
+from app.search import SearchIndex, build_search_index
+from app.utils import load_json, save_json, utc_now
+
+from .generators import make_headers, make_highlights, make_notebook_html, write_clippings
+
+try:
+    from app.scraper import parse_highlight_time
+except ImportError:
+    # app.scraper needs Playwright; parse_highlight_time is a thin wrapper
+    # around app.dates.parse_date, so time that instead.
+    from app.dates import parse_date as parse_highlight_time
+
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_OUTPUT = BENCH_DIR / "results.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_SIZES = "1e3,1e4,1e5"
+
+# Cases whose input is a single HTML page are capped to keep it realistic.
+HTML_MAX_SIZE = 100_000
+
+Setup = Callable[[int, Path], Optional[Callable[[], object]]]
+
+
+def _quiet(func: Callable[[], object]) -> Callable[[], object]:
+    """Wrap func so the prints inside app functions don't flood the output."""
+    def run() -> object:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def _highlights(n: int, tmp: Path) -> list[dict]:
+    return make_highlights(n)
+
+
+def setup_dedupe(n: int, tmp: Path):
+    highlights = _highlights(n, tmp)
+    return lambda: deduplicate_highlights(highlights)
+
+
+def setup_sort(n: int, tmp: Path):
+    highlights = _highlights(n, tmp)
+    return lambda: sort_by_recency(highlights)
+
+
+def setup_merge(n: int, tmp: Path):
+    highlights = _highlights(n, tmp)
+    existing = tmp / f"existing-{n}.json"
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_json({"items": deduplicate_highlights(make_highlights(n, seed=2))}, existing)
+    return _quiet(lambda: merge_with_existing(highlights, existing))
+
+
+def setup_save_json(n: int, tmp: Path):
+    data = {"updated_at": utc_now(), "items": _highlights(n, tmp)}
+    path = tmp / f"save-{n}.json"
+    return _quiet(lambda: save_json(data, path))
+
+
+def setup_load_json(n: int, tmp: Path):
+    path = tmp / f"load-{n}.json"
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_json({"updated_at": utc_now(), "items": _highlights(n, tmp)}, path)
+    return lambda: load_json(path)
+
+
+def setup_parse_time(n: int, tmp: Path):
+    headers = make_headers(n)
+    clear = getattr(parse_highlight_time, "cache_clear", None)
+
+    def run() -> None:
+        if clear:
+            clear()
+        for header in headers:
+            parse_highlight_time(header)
+    return run
+
+
+def setup_gist_payload(n: int, tmp: Path):
+    data = {"updated_at": utc_now(), "items": _highlights(n, tmp)}
+    return lambda: encode_content(data)
+
+
+def setup_gist_payload_minified(n: int, tmp: Path):
+    data = {"updated_at": utc_now(), "items": _highlights(n, tmp)}
+    return lambda: encode_content(data, minify=True)
+
+
+def setup_gist_hash(n: int, tmp: Path):
+    data = {"updated_at": utc_now(), "items": _highlights(n, tmp)}
+    return lambda: content_hash(data)
+
+
+def setup_clippings(n: int, tmp: Path):
+    path = tmp / f"clippings-{n}.txt"
+    write_clippings(path, n)
+    return lambda: sum(1 for hl, _ in iter_clippings(path) if hl)
+
+
+def setup_notebook_html(n: int, tmp: Path):
+    if n > HTML_MAX_SIZE:
+        return None
+    page = make_notebook_html(n)
+    return lambda: parse_annotations_html(page)
+
+
+def setup_search_build(n: int, tmp: Path):
+    highlights = _highlights(n, tmp)
+    output_dir = tmp / f"search-build-{n}"
+    return _quiet(lambda: build_search_index(highlights, output_dir))
+
+
+def setup_search_query(n: int, tmp: Path):
+    output_dir = tmp / f"search-query-{n}"
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_search_index(_highlights(n, tmp), output_dir)
+    queries = ["atomic habit", '"small change"', "identity", "deep work focus"]
+
+    def run() -> None:
+        index = SearchIndex(output_dir)
+        for query in queries:
+            index.search(query)
+    return run
+
+
+def setup_collapse_variants(n: int, tmp: Path):
+    highlights = _highlights(n, tmp)
+    return lambda: collapse_near_duplicates(highlights)
+
+
+CASES: dict[str, Setup] = {
+    "deduplicate_highlights": setup_dedupe,
+    "sort_by_recency": setup_sort,
+    "merge_with_existing": setup_merge,
+    "save_json": setup_save_json,
+    "load_json": setup_load_json,
+    "parse_highlight_time": setup_parse_time,
+    "gist_payload": setup_gist_payload,
+    "gist_payload_minified": setup_gist_payload_minified,
+    "gist_content_hash": setup_gist_hash,
+    "iter_clippings": setup_clippings,
+    "parse_annotations_html": setup_notebook_html,
+    "search_build": setup_search_build,
+    "search_query": setup_search_query,
+    "collapse_near_duplicates": setup_collapse_variants,
+}
+
+
+def parse_sizes(value: str) -> list[int]:
+    """Parse a comma-separated size list such as '1e3,1e4,250000'."""
+    return [int(float(size)) for size in value.split(",") if size.strip()]
+
+
+def run_suite(sizes: list[int], cases: list[str], repeat: int) -> dict:
+    """Run every case at every size and return the results document."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in cases:
+            for n in sizes:
+                func = CASES[name](n, Path(tmp))
+                if func is None:
+                    continue
+                best = min(_timed(func) for _ in range(repeat))
+                key = f"{name}@{n}"
+                results[key] = {"seconds": best, "per_sec": n / best if best else None}
+                print(f"{key:>34}: {best:9.4f}s  {n / best if best else 0:14,.0f} items/s")
+
+    return {
+        "meta": {
+            "created_at": utc_now(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a comparison with the baseline and return the regressed cases."""
+    regressions = []
+    base = baseline.get("results", {})
+    print(f"\nCompared with baseline from {baseline.get('meta', {}).get('created_at', '?')}:")
+    for key, current in results["results"].items():
+        previous = base.get(key)
+        if not previous or not previous.get("seconds"):
+            continue
+        ratio = current["seconds"] / previous["seconds"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:>34}: {ratio:5.2f}x baseline time{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated input sizes, 1e3 to 1e7 (default: {DEFAULT_SIZES})")
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help="Comma-separated case names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Also write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression (default: 1.25)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    cases = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+
+    results = run_suite(parse_sizes(args.sizes), cases, args.repeat)
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"\nWrote results to {args.output}")
+
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        regressions = compare(results, load_json(args.baseline), args.threshold)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.2f}x")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
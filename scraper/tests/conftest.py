@@ -0,0 +1,83 @@
+"""Shared fixtures: a stub GitHub API server on localhost."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _handle(self) -> None:
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append({
+            "method": self.command,
+            "path": self.path,
+            "headers": {k.lower(): v for k, v in self.headers.items()},
+            "raw": raw,
+            "body": json.loads(raw) if raw else None,
+            "client": self.client_address,
+        })
+        if self.server.responses:
+            status, headers, payload = self.server.responses.pop(0)
+        else:
+            status, headers, payload = 200, {}, self.server.echo(self.path, raw)
+
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = _handle
+
+
+class StubGitHub(ThreadingHTTPServer):
+    """Records every request and answers from a queue of scripted responses.
+
+    responses holds (status, headers, payload) tuples, answered in order.
+    Once it is empty, requests are answered like a Gist PATCH: 200 with
+    the files that were sent, each with a raw_url.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests: list[dict] = []
+        self.responses: list[tuple[int, dict, object]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def echo(self, path: str, raw: bytes) -> dict:
+        gist_id = path.rsplit("/", 1)[-1]
+        files = json.loads(raw).get("files", {}) if raw else {}
+        return {
+            "id": gist_id,
+            "files": {
+                name: {"raw_url": f"https://gist.example/{gist_id}/raw/{len(self.requests)}/{name}"}
+                for name, content in files.items() if content is not None
+            },
+        }
+
+
+@pytest.fixture
+def github_server(monkeypatch):
+    """A StubGitHub that GitHubClient talks to through GITHUB_API_URL."""
+    server = StubGitHub()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    monkeypatch.setenv("GITHUB_API_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
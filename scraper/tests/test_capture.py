@@ -0,0 +1,48 @@
+"""Parsing captured annotations responses."""
+
+from app.capture import parse_annotations_response
+
+
+ROW = (
+    '<div class="a-row"><span id="annotationHighlightHeader">{header}</span>'
+    '<span id="highlight">{text}</span></div>'
+)
+
+
+def test_html_highlights_take_their_row_header():
+    html = (
+        '<input id="kp-notebook-annotations-asin" value="B1">'
+        + ROW.format(header="Yellow highlight | Added on Monday, March 4, 2024", text="First highlight text")
+        + ROW.format(header="Added on Tuesday, March 5, 2024", text="Second highlight text")
+    )
+
+    payload = parse_annotations_response(html, "text/html")
+
+    assert payload["asin"] == "B1"
+    assert [h["header"] for h in payload["highlights"]] == [
+        "Yellow highlight | Added on Monday, March 4, 2024",
+        "Added on Tuesday, March 5, 2024",
+    ]
+    assert payload["headers"] == ["Yellow highlight | Added on Monday, March 4, 2024"]
+
+
+def test_html_header_after_highlight_is_the_page_fallback():
+    html = (
+        '<span id="highlight">A highlight without its own header</span>'
+        '<span id="annotationHighlightHeader">Added on Monday, March 4, 2024</span>'
+    )
+
+    payload = parse_annotations_response(html)
+
+    assert payload["highlights"][0]["header"] is None
+    assert payload["headers"] == ["Added on Monday, March 4, 2024"]
+
+
+def test_json_highlights_carry_exact_times():
+    body = '{"annotations": [{"highlight": "A highlight from JSON", "created": 1709510400000}]}'
+
+    payload = parse_annotations_response(body, "application/json")
+
+    assert payload["highlights"] == [
+        {"text": "A highlight from JSON", "header": None, "time": "2024-03-04T00:00:00Z"}
+    ]
@@ -0,0 +1,95 @@
+"""Checkpointed and bulk parsing of My Clippings.txt."""
+
+import pytest
+
+from app.clippings import iter_clippings, parse_clippings_bulk, read_new_clippings
+
+
+FETCHED_AT = "2026-03-01T00:00:00Z"
+
+
+def record(title: str, text: str, kind: str = "Highlight", day: int = 1) -> str:
+    return (
+        f"{title}\n"
+        f"- Your {kind} on page 3 | Location 40-42 | Added on Monday, February {day}, 2026 12:20:00 PM\n"
+        f"\n{text}\n==========\n"
+    )
+
+
+def texts(highlights: list[dict]) -> list[str]:
+    return [hl["highlight_text"] for hl in highlights]
+
+
+@pytest.fixture
+def clippings(tmp_path):
+    return tmp_path / "My Clippings.txt"
+
+
+@pytest.fixture
+def read(tmp_path, clippings):
+    state_path = tmp_path / "clippings_state.json"
+    return lambda **kw: read_new_clippings(clippings, state_path, **kw)
+
+
+def test_resumes_after_the_last_record(clippings, read):
+    clippings.write_text(record("Dune", "first") + record("Emma", "second"), encoding="utf-8")
+    assert texts(read()) == ["first", "second"]
+
+    with open(clippings, "a", encoding="utf-8") as f:
+        f.write(record("Dune", "third"))
+    assert texts(read()) == ["third"]
+    assert read() == []
+
+
+def test_partial_record_is_deferred_until_complete(clippings, read):
+    clippings.write_text(record("Dune", "first") + "Emma\n- Your Highlight on page 1 | Added on", encoding="utf-8")
+    assert texts(read()) == ["first"]
+    assert read() == []
+
+    with open(clippings, "a", encoding="utf-8") as f:
+        f.write(" Monday, February 2, 2026 12:20:00 PM\n\nsecond\n==========\n")
+    assert texts(read()) == ["second"]
+
+
+@pytest.mark.parametrize("rewrite", [
+    # Same length, different bytes before the checkpoint.
+    lambda text: text.replace("first", "FIRST"),
+    # Shorter than the checkpoint offset.
+    lambda text: record("Dune", "other"),
+])
+def test_rewritten_file_is_parsed_again(clippings, read, rewrite):
+    original = record("Dune", "first") + record("Emma", "second")
+    clippings.write_text(original, encoding="utf-8")
+    read()
+
+    clippings.write_text(rewrite(original), encoding="utf-8")
+    assert texts(read()) == texts(parse_clippings_bulk(clippings, workers=1)[0])
+
+
+def test_full_ignores_the_checkpoint(clippings, read):
+    clippings.write_text(record("Dune", "first"), encoding="utf-8")
+    read()
+    assert texts(read(full=True)) == ["first"]
+
+
+def clippings_file(path, records: int = 60) -> None:
+    parts = ["\ufeff"]
+    for i in range(records):
+        kind = "Note" if i % 7 == 3 else "Bookmark" if i % 11 == 5 else "Highlight"
+        parts.append(record(f"Book {i % 5}", f"Highlight {i}\nwith a second line", kind, 1 + i % 28))
+    parts.append("Book 9\n- Your Highlight on page 1 | Added on Monday")
+    text = "".join(parts)
+    path.write_bytes(text.replace("\n", "\r\n").encode("utf-8"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bulk_parse_matches_the_stream(clippings, workers):
+    clippings_file(clippings)
+
+    streamed = list(iter_clippings(clippings, fetched_at=FETCHED_AT))
+    bulk, end_offset = parse_clippings_bulk(clippings, workers=workers, fetched_at=FETCHED_AT)
+
+    assert bulk == [hl for hl, _ in streamed if hl]
+    assert end_offset == streamed[-1][1]
+    # 9 notes and 4 bookmarks are skipped, and so is the unfinished record.
+    assert len(bulk) == 47
@@ -0,0 +1,63 @@
+"""Parsing highlight dates across Amazon regions."""
+
+import pytest
+
+from app.dates import parse_date, parse_dates
+
+
+@pytest.mark.parametrize("text, expected", [
+    # en (com, co.uk)
+    ("Monday 28 February 2026", "2026-02-28T00:00:00Z"),
+    ("28 Feb 2026", "2026-02-28T00:00:00Z"),
+    ("February 28, 2026", "2026-02-28T00:00:00Z"),
+    ("Sunday, March 1, 2026 1:05:00 PM", "2026-03-01T13:05:00Z"),
+    ("Added on Sunday, 1 March 2026 09:15:30", "2026-03-01T09:15:30Z"),
+    ("Yellow highlight | Page: 12 Added on Sept. 3, 2025", "2025-09-03T00:00:00Z"),
+    # de
+    ("Samstag, 28. Februar 2026 12:20:00", "2026-02-28T12:20:00Z"),
+    ("Hinzugefügt am Dienstag, 3. März 2026", "2026-03-03T00:00:00Z"),
+    ("1. Dez. 2025", "2025-12-01T00:00:00Z"),
+    # fr
+    ("samedi 28 février 2026 12:20:00", "2026-02-28T12:20:00Z"),
+    ("Ajouté le vendredi 15 août 2025 08:00:00", "2025-08-15T08:00:00Z"),
+    ("3 déc. 2025", "2025-12-03T00:00:00Z"),
+    # ja
+    ("2026年2月28日土曜日 12:20:00", "2026-02-28T12:20:00Z"),
+    ("追加日：2025年12月3日水曜日", "2025-12-03T00:00:00Z"),
+])
+def test_regional_formats(text, expected):
+    assert parse_date(text) == expected
+
+
+@pytest.mark.parametrize("time, expected", [
+    ("12:00:00 AM", "00:00:00"),
+    ("12:30:00 AM", "00:30:00"),
+    ("1:05:00 am", "01:05:00"),
+    ("12:00:00 PM", "12:00:00"),
+    ("11:59:59 PM", "23:59:59"),
+    ("7:45 p.m.", "19:45:00"),
+    ("19:45:00", "19:45:00"),
+])
+def test_am_pm(time, expected):
+    assert parse_date(f"Sunday, March 1, 2026 {time}") == f"2026-03-01T{expected}Z"
+
+
+@pytest.mark.parametrize("text", [
+    "Yesterday",
+    "2 hours ago",
+    "",
+    "Location 120-122",
+    "Notiz | Seite 4",
+    "February 30, 2026",
+    "31 Smarch 2026",
+])
+def test_unparseable_is_none(text):
+    assert parse_date(text) is None
+
+
+def test_parse_dates_keeps_order_and_gaps():
+    texts = ["28 Feb 2026", None, "Yesterday", "28 Feb 2026", ""]
+
+    assert parse_dates(texts) == [
+        "2026-02-28T00:00:00Z", None, None, "2026-02-28T00:00:00Z", None,
+    ]
@@ -0,0 +1,97 @@
+"""Gist uploads against the stub GitHub server."""
+
+import json
+
+import pytest
+
+from app import gist
+
+
+DATA = {
+    "updated_at": "2024-01-01T00:00:00Z",
+    "items": [{"book_title": "Dune", "highlight_text": "Fear is the mind-killer."}],
+}
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    path = tmp_path / "gist_state.json"
+    monkeypatch.setattr(gist, "get_gist_state_path", lambda: path)
+    return path
+
+
+def load_state(path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_upload_sends_minified_payload(github_server, state_path):
+    raw_url = gist.upload_to_gist("g1", "token", DATA, minify=True)
+
+    [request] = github_server.requests
+    assert request["method"] == "PATCH"
+    assert request["path"] == "/gists/g1"
+    assert request["headers"]["authorization"] == "Bearer token"
+    content = request["body"]["files"]["latest.json"]["content"]
+    assert content == json.dumps(DATA, separators=(",", ":"), ensure_ascii=False)
+    assert "\n" not in content
+    assert raw_url == "https://gist.example/g1/raw/1/latest.json"
+
+
+def test_unchanged_content_skips_upload(github_server, state_path):
+    first = gist.upload_to_gist("g1", "token", DATA)
+    second = gist.upload_to_gist("g1", "token", {**DATA, "updated_at": "2024-02-01T00:00:00Z"})
+
+    assert len(github_server.requests) == 1
+    assert second == first
+
+
+def test_changed_content_uploads_again(github_server, state_path):
+    gist.upload_to_gist("g1", "token", DATA)
+    gist.upload_to_gist("g1", "token", {**DATA, "items": []})
+
+    assert len(github_server.requests) == 2
+
+
+def test_switching_minify_uploads_again(github_server, state_path):
+    gist.upload_to_gist("g1", "token", DATA)
+    gist.upload_to_gist("g1", "token", DATA, minify=True)
+    gist.upload_to_gist("g1", "token", DATA, minify=True)
+
+    assert len(github_server.requests) == 2
+    assert "\n" not in github_server.requests[1]["body"]["files"]["latest.json"]["content"]
+
+
+def test_force_uploads_unchanged_content(github_server, state_path):
+    gist.upload_to_gist("g1", "token", DATA)
+    raw_url = gist.upload_to_gist("g1", "token", DATA, force=True)
+
+    assert len(github_server.requests) == 2
+    assert raw_url == "https://gist.example/g1/raw/2/latest.json"
+
+
+def test_upload_stats(github_server, state_path):
+    gist.upload_to_gist("g1", "token", DATA, minify=True)
+    content = github_server.requests[0]["body"]["files"]["latest.json"]["content"]
+    sent = gist.payload_size({"latest.json": content})
+    assert sent <= len(github_server.requests[0]["raw"])
+    assert load_state(state_path)["bytes_sent"] == sent
+
+    gist.upload_to_gist("g1", "token", DATA, minify=True)
+    gist.upload_to_gist("g1", "token", DATA, minify=True)
+    state = load_state(state_path)
+    assert state["bytes_sent"] == sent
+    assert state["requests_avoided"] == 2
+
+
+def test_patch_gist_files_deletes_files(github_server):
+    gist.patch_gist_files("g1", "token", {"new.json": "{}", "old.json": None})
+
+    [request] = github_server.requests
+    assert request["body"] == {"files": {"new.json": {"content": "{}"}, "old.json": None}}
+
+
+def test_patch_gist_files_reports_api_errors(github_server):
+    github_server.responses.append((422, {}, {"message": "Validation Failed"}))
+
+    with pytest.raises(RuntimeError, match="422"):
+        gist.patch_gist_files("g1", "token", {"latest.json": "{}"})
@@ -0,0 +1,132 @@
+"""GitHubClient retries and throttling against the stub GitHub server."""
+
+import time
+
+import pytest
+
+from app.github_client import GitHubAPIError, GitHubClient
+
+
+def make_client(server, **kwargs) -> tuple[GitHubClient, list[float]]:
+    sleeps: list[float] = []
+    client = GitHubClient("token", api_url=server.url, sleep=sleeps.append, **kwargs)
+    return client, sleeps
+
+
+def test_reuses_one_connection(github_server):
+    client, _ = make_client(github_server)
+    with client:
+        for _ in range(3):
+            client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert client.requests_sent == 3
+    assert len({request["client"] for request in github_server.requests}) == 1
+
+
+def test_reconnects_after_connection_close(github_server):
+    github_server.responses.append((200, {"Connection": "close"}, {}))
+    client, _ = make_client(github_server)
+    with client:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert len({request["client"] for request in github_server.requests}) == 2
+
+
+def test_retries_server_errors_with_backoff(github_server):
+    github_server.responses += [(503, {}, None), (502, {}, None)]
+    client, sleeps = make_client(github_server, backoff_base=1.0)
+    with client:
+        response = client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert response["id"] == "g1"
+    assert client.retries == 2
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+
+
+def test_gives_up_after_max_retries(github_server):
+    github_server.responses += [(500, {}, None)] * 3
+    client, sleeps = make_client(github_server, max_retries=2)
+    with client, pytest.raises(GitHubAPIError) as error:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert error.value.status == 500
+    assert len(github_server.requests) == 3
+    assert len(sleeps) == 2
+
+
+def test_does_not_retry_client_errors(github_server):
+    github_server.responses.append((404, {}, {"message": "Not Found"}))
+    client, sleeps = make_client(github_server)
+    with client, pytest.raises(GitHubAPIError) as error:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert error.value.status == 404
+    assert sleeps == []
+
+
+def test_honours_retry_after(github_server):
+    github_server.responses.append((429, {"Retry-After": "2"}, None))
+    client, sleeps = make_client(github_server)
+    with client:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert sleeps == [2.0]
+
+
+def test_waits_for_rate_limit_reset(github_server):
+    reset = time.time() + 20
+    github_server.responses.append((
+        403,
+        {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)},
+        {"message": "API rate limit exceeded"},
+    ))
+    client, sleeps = make_client(github_server)
+    with client:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    # sleeps[0] is the retry; the stub sleep does not advance the clock, so
+    # the exhausted quota may also be throttled before the retried request.
+    assert 15 < sleeps[0] <= 20
+    assert len(github_server.requests) == 2
+
+
+def test_fails_instead_of_waiting_past_backoff_max(github_server):
+    github_server.responses.append((429, {"Retry-After": "3600"}, None))
+    client, sleeps = make_client(github_server, backoff_max=60)
+    with client, pytest.raises(GitHubAPIError) as error:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert error.value.status == 429
+    assert "3600s" in error.value.reason
+    assert sleeps == []
+    assert len(github_server.requests) == 1
+
+
+def test_throttles_when_quota_runs_low(github_server):
+    reset = time.time() + 30
+    github_server.responses.append((
+        200, {"X-RateLimit-Remaining": "2", "X-RateLimit-Reset": str(reset)}, {},
+    ))
+    client, sleeps = make_client(github_server, min_remaining=10)
+    with client:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+        assert sleeps == []
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    [delay] = sleeps
+    assert 8 < delay <= 10
+
+
+def test_throttle_waits_at_most_backoff_max(github_server):
+    reset = time.time() + 3600
+    github_server.responses.append((
+        200, {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": str(reset)}, {},
+    ))
+    client, sleeps = make_client(github_server, backoff_max=60)
+    with client:
+        client.request("PATCH", "/gists/g1", {"files": {}})
+        client.request("PATCH", "/gists/g1", {"files": {}})
+
+    assert sleeps == [60]
@@ -0,0 +1,62 @@
+"""LatestIndex against the batch dedupe-then-sort it replaces."""
+
+import random
+
+import pytest
+
+from app.build import deduplicate_highlights, sort_by_recency
+from app.index import LatestIndex
+
+
+def random_highlights(seed: int, n: int = 300) -> list[dict]:
+    rng = random.Random(seed)
+    highlights = []
+    for i in range(n):
+        # Few distinct days and books, so ties and replacements are common;
+        # some highlights have no time, or no title at all.
+        day = rng.choice([None, *range(1, 6)])
+        highlights.append({
+            "book_title": rng.choice(["", *(f"Book {b}" for b in range(25))]),
+            "highlight_text": f"Highlight {i}",
+            "highlight_time": day and f"2024-01-{day:02d}T00:00:00Z",
+            "fetched_at": rng.choice(["2024-01-03T12:00:00Z", "2024-01-06T00:00:00Z"]),
+        })
+    return highlights
+
+
+def batch(highlights: list[dict]) -> list[dict]:
+    return sort_by_recency(deduplicate_highlights(highlights))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_dedupe_then_sort(seed):
+    highlights = random_highlights(seed)
+    expected = batch(highlights)
+
+    index = LatestIndex(highlights)
+
+    assert index.items() == expected
+    assert index.top_k(10) == expected[:10]
+    assert len(index) == len(expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_a_full_rebuild(seed):
+    highlights = random_highlights(seed)
+    index = LatestIndex()
+
+    for start in range(0, len(highlights), 37):
+        index.update(highlights[start:start + 37])
+        assert index.items() == batch(highlights[:start + 37])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_restored_index_keeps_matching(seed):
+    highlights = random_highlights(seed)
+    first, rest = highlights[:150], highlights[150:]
+    saved = LatestIndex(first)
+
+    index = LatestIndex.from_output(saved.to_output(), saved.first_seen())
+    index.update(rest)
+
+    assert index.items() == batch(highlights)
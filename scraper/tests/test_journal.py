@@ -0,0 +1,96 @@
+"""Recovery, compaction and views of the highlight journal."""
+
+import random
+import threading
+
+import pytest
+
+from app import journal as journal_module
+from app.index import LatestIndex
+from app.journal import HighlightJournal
+
+
+def hl(book: str, day: int, text: str = "") -> dict:
+    return {
+        "book_title": book,
+        "highlight_text": text or f"{book} on day {day}",
+        "highlight_time": f"2024-01-{day:02d}T00:00:00Z",
+    }
+
+
+def seqs(journal: HighlightJournal, since: int = 0) -> list[int]:
+    return [record["seq"] for record in journal.iter_records(since)]
+
+
+def rebuild(journal: HighlightJournal) -> list[dict]:
+    records = list(journal.iter_records())
+    return LatestIndex(journal_module._highlight(r) for r in records).items()
+
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    HighlightJournal(tmp_path).append([hl("Dune", 1), hl("Emma", 2)])
+    with open(tmp_path / "journal.jsonl", "ab") as f:
+        f.write(b'{"seq": 3, "recorded_at": "2024-0')
+
+    journal = HighlightJournal(tmp_path)
+    assert journal.last_seq() == 2
+    assert (tmp_path / "journal.jsonl").read_bytes().endswith(b"}\n")
+
+    journal.append([hl("Ulysses", 3)])
+    assert seqs(journal) == [1, 2, 3]
+
+
+def test_append_during_compaction_stays_in_the_journal(tmp_path, monkeypatch):
+    journal = HighlightJournal(tmp_path)
+    journal.append([hl("Dune", 1), hl("Emma", 2)])
+    write_json = journal_module.write_json
+
+    def append_then_write(data, path, compact=False):
+        # Lands after compact() read the journal, before it swaps it out.
+        journal.append([hl("Ulysses", 3)])
+        write_json(data, path, compact)
+
+    monkeypatch.setattr(journal_module, "write_json", append_then_write)
+    assert journal.compact() == 2
+    monkeypatch.undo()
+
+    assert seqs(journal) == [1, 2, 3]
+    assert seqs(HighlightJournal(tmp_path), since=2) == [3]
+    assert journal.snapshot()["seq"] == 2
+    assert journal.view()["items"] == rebuild(journal)
+
+
+def test_appends_racing_compactions_lose_nothing(tmp_path):
+    journal = HighlightJournal(tmp_path, compact_threshold=1)
+    done = threading.Event()
+
+    def appender() -> None:
+        for i in range(200):
+            journal.append([hl(f"Book {i % 7}", 1 + i % 5, f"highlight {i}")])
+        done.set()
+
+    thread = threading.Thread(target=appender)
+    thread.start()
+    while not done.is_set():
+        journal.compact()
+    thread.join()
+    journal.compact()
+
+    assert seqs(journal) == list(range(1, 201))
+    assert journal.view()["items"] == rebuild(journal)
+
+
+@pytest.mark.parametrize("compact_every", [0, 1, 3])
+def test_view_matches_a_rebuild_from_every_record(tmp_path, compact_every):
+    rng = random.Random(compact_every)
+    journal = HighlightJournal(tmp_path)
+    for batch in range(12):
+        # Day-level times, so books often tie and ties must break by
+        # which book was seen first, across compactions too.
+        journal.append([hl(f"Book {rng.randrange(6)}", rng.randint(1, 4)) for _ in range(3)])
+        if compact_every and batch % compact_every == 0:
+            journal.compact()
+
+    view = journal.view()
+    assert view["seq"] == 36
+    assert view["items"] == rebuild(journal)
@@ -0,0 +1,49 @@
+"""Atomic JSON writes."""
+
+import os
+import stat
+
+from app import jsonio
+
+
+def mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_round_trip(tmp_path):
+    data = {"items": [{"highlight_text": "Fear is the mind-killer."}]}
+
+    for name in ("latest.json", "latest.json.gz"):
+        path = jsonio.write_json(data, tmp_path / name)
+        assert jsonio.read_json(path) == data
+
+
+def test_new_file_gets_default_mode(tmp_path):
+    path = jsonio.write_json({}, tmp_path / "latest.json")
+
+    assert mode(path) == 0o666 & ~jsonio._UMASK
+
+
+def test_replacement_keeps_existing_mode(tmp_path):
+    path = tmp_path / "auth.json"
+    path.write_text("{}")
+    path.chmod(0o640)
+
+    jsonio.write_json({"cookies": []}, path)
+
+    assert mode(path) == 0o640
+    assert jsonio.read_json(path) == {"cookies": []}
+
+
+def test_failed_write_leaves_target_untouched(tmp_path):
+    path = jsonio.write_json({"old": True}, tmp_path / "latest.json")
+
+    try:
+        with jsonio.atomic_write(path) as f:
+            f.write(b"{")
+            raise RuntimeError("interrupted")
+    except RuntimeError:
+        pass
+
+    assert jsonio.read_json(path) == {"old": True}
+    assert [p.name for p in tmp_path.iterdir()] == ["latest.json"]
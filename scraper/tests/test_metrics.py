@@ -0,0 +1,25 @@
+"""Run metrics export."""
+
+import json
+
+from app.metrics import Metrics
+
+
+def test_phases_and_counters_are_exported(tmp_path):
+    metrics = Metrics()
+    with metrics.phase("store"):
+        pass
+    with metrics.phase("store"):
+        pass
+    metrics.incr("highlights_stored", 3)
+
+    metrics.write_json(tmp_path / "metrics.json")
+    data = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert data["spans"]["store"]["count"] == 2
+    assert data["counters"] == {"highlights_stored": 3}
+
+    path = metrics.write_prometheus(tmp_path / "prom" / "kindle.prom")
+    text = path.read_text(encoding="utf-8")
+    assert 'kindle_sync_span_count{span="store"} 2' in text
+    assert "kindle_sync_highlights_stored 3" in text
+    assert [p.name for p in path.parent.iterdir()] == ["kindle.prom"]
@@ -0,0 +1,49 @@
+"""Near-duplicate grouping of highlight variants."""
+
+from app.neardup import collapse_near_duplicates, find_variant_groups
+
+
+def hl(text: str, book: str = "Dune") -> dict:
+    return {"book_title": book, "highlight_text": text}
+
+
+def test_extended_highlight_is_collapsed():
+    short = hl("I must not fear. Fear is the mind-killer.")
+    extended = hl("I must not fear. Fear is the mind-killer. Fear is the little-death.")
+
+    assert collapse_near_duplicates([short, extended]) == [extended]
+
+
+def test_short_highlight_matches_by_word_containment():
+    assert find_variant_groups([hl("the map"), hl("the map is not the territory")]) == [[0, 1]]
+
+
+def test_short_highlight_without_shared_words_is_kept():
+    assert find_variant_groups([hl("the cat"), hl("the map is not the territory")]) == []
+
+
+def test_texts_without_words_are_not_grouped():
+    highlights = [hl(""), hl("..."), hl(" — "), hl("!!")]
+
+    assert find_variant_groups(highlights) == []
+    assert collapse_near_duplicates(highlights) == highlights
+
+
+def test_variants_are_only_found_within_a_book():
+    highlights = [hl("the map", "Dune"), hl("the map is not the territory", "Emma")]
+
+    assert find_variant_groups(highlights) == []
+
+
+def test_short_highlight_does_not_bridge_unrelated_passages():
+    highlights = [
+        hl("the map is not the territory"),
+        hl("we drew a map of the city streets at night"),
+        hl("map"),
+    ]
+
+    assert collapse_near_duplicates(highlights) == highlights[:2]
+
+
+def test_short_duplicates_are_collapsed():
+    assert find_variant_groups([hl("the map"), hl("The map.")]) == [[0, 1]]
@@ -0,0 +1,94 @@
+"""Streaming highlights into the store while they are produced."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app import pipeline
+from app.pipeline import store_stream, store_stream_async
+
+
+def highlights(n: int):
+    for i in range(n):
+        yield {
+            "book_title": f"Book {i}",
+            "highlight_text": f"Highlight number {i}",
+            "highlight_time": "2024-01-01T00:00:00Z",
+            "fetched_at": "2024-01-02T00:00:00Z",
+        }
+
+
+@pytest.fixture
+def sink_options(tmp_path):
+    return {
+        "store_path": tmp_path / "highlights.db",
+        "journal_dir": tmp_path / "journal",
+        "latest_path": tmp_path / "latest.json",
+    }
+
+
+@pytest.fixture
+def failing_sink(monkeypatch):
+    """Make the sink raise on its third batch."""
+    add = pipeline.HighlightSink.add
+    calls = []
+
+    def flaky_add(self, batch):
+        calls.append(len(batch))
+        if len(calls) == 3:
+            raise RuntimeError("disk full")
+        return add(self, batch)
+
+    monkeypatch.setattr(pipeline.HighlightSink, "add", flaky_add)
+    return calls
+
+
+def run_with_timeout(target, timeout: float = 10) -> dict:
+    outcome: dict = {}
+
+    def run() -> None:
+        try:
+            outcome["value"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "store_stream deadlocked"
+    return outcome
+
+
+def test_stores_everything_produced(sink_options):
+    assert store_stream(highlights(10), batch_size=3, **sink_options) == 10
+
+
+def test_sink_error_midway_does_not_block_the_producer(sink_options, failing_sink):
+    produced = []
+
+    def producer():
+        for hl in highlights(1000):
+            produced.append(hl)
+            yield hl
+
+    outcome = run_with_timeout(
+        lambda: store_stream(producer(), queue_size=2, batch_size=1, **sink_options)
+    )
+
+    assert isinstance(outcome.get("error"), RuntimeError)
+    assert len(failing_sink) == 3
+    assert len(produced) < 1000
+
+
+def test_async_sink_error_midway_does_not_block_the_producer(sink_options, failing_sink):
+    async def producer():
+        for hl in highlights(1000):
+            yield hl
+
+    outcome = run_with_timeout(lambda: asyncio.run(
+        store_stream_async(producer(), queue_size=2, batch_size=1, **sink_options)
+    ))
+
+    assert isinstance(outcome.get("error"), RuntimeError)
+    assert len(failing_sink) == 3
@@ -0,0 +1,41 @@
+"""Rebuilding the search index."""
+
+import pytest
+
+from app import search
+from app.search import SearchIndex, build_search_index
+
+
+def highlights(*texts: str) -> list[dict]:
+    return [
+        {"book_title": "Dune", "highlight_text": text, "highlight_time": f"2024-01-{i + 1:02d}T00:00:00Z"}
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_rebuild_replaces_the_previous_generation(tmp_path):
+    build_search_index(highlights("fear is the mind killer", "the spice must flow"), tmp_path)
+    build_search_index(highlights("the sleeper must awaken"), tmp_path)
+
+    assert [path.name for path in tmp_path.iterdir() if path.is_dir()] == ["gen-000002"]
+    index = SearchIndex(tmp_path)
+    assert [hit["highlight_text"] for hit in index.search("must")] == ["the sleeper must awaken"]
+    assert index.search("spice") == []
+
+
+def test_failed_rebuild_keeps_the_previous_index(tmp_path, monkeypatch):
+    build_search_index(highlights("fear is the mind killer"), tmp_path)
+
+    def fail(data, path, compact=False):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(search, "write_json", fail)
+    with pytest.raises(OSError):
+        build_search_index(highlights("the spice must flow"), tmp_path)
+    monkeypatch.undo()
+
+    index = SearchIndex(tmp_path)
+    assert [hit["highlight_text"] for hit in index.search("fear")] == ["fear is the mind killer"]
+
+    build_search_index(highlights("the spice must flow"), tmp_path)
+    assert [path.name for path in tmp_path.iterdir() if path.is_dir()] == ["gen-000002"]
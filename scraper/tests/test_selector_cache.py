@@ -0,0 +1,45 @@
+"""Ranking of the selector fallback chains."""
+
+from app.selector_cache import DEMOTE_AFTER, REPROBE_EVERY, SelectorCache
+
+
+CHAIN = ["#highlight", ".kp-notebook-highlight", ".highlight-text", "a"]
+
+
+def miss(cache: SelectorCache, selector: str, times: int = DEMOTE_AFTER) -> None:
+    for _ in range(times):
+        cache.record("highlight", selector, False)
+
+
+def test_hits_move_ahead_only_within_their_group():
+    cache = SelectorCache("com", "kp-notebook")
+    cache.record("highlight", ".highlight-text", True)
+    cache.record("highlight", "a", True)
+
+    assert cache.ranked("highlight", CHAIN) == [
+        "#highlight", ".highlight-text", ".kp-notebook-highlight", "a",
+    ]
+
+
+def test_demoted_selector_stays_ahead_of_less_specific_groups():
+    cache = SelectorCache("com", "kp-notebook")
+    miss(cache, "#highlight")
+    miss(cache, ".kp-notebook-highlight")
+
+    assert cache.ranked("highlight", CHAIN) == [
+        "#highlight", ".highlight-text", ".kp-notebook-highlight", "a",
+    ]
+
+
+def test_reprobe_lookup_tries_demoted_selector_in_place():
+    cache = SelectorCache("com", "kp-notebook")
+    miss(cache, ".kp-notebook-highlight")
+
+    first = cache.order("highlight", CHAIN)
+    second = cache.order("highlight", CHAIN)
+    for _ in range(REPROBE_EVERY - 2):
+        cache.order("highlight", CHAIN)
+
+    assert first == CHAIN
+    assert second.index(".kp-notebook-highlight") > second.index(".highlight-text")
+    assert cache.order("highlight", CHAIN) == CHAIN
@@ -0,0 +1,69 @@
+"""The SQLite highlight store."""
+
+import pytest
+
+from app.store import HighlightStore
+
+
+def hl(text: str, time: str, fetched: str = "2024-03-01T00:00:00Z", book: str = "Dune") -> dict:
+    return {
+        "book_title": book,
+        "highlight_text": text,
+        "highlight_time": time,
+        "fetched_at": fetched,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HighlightStore(tmp_path / "highlights.db") as store:
+        yield store
+
+
+def texts(highlights: list[dict]) -> list[str]:
+    return [h["highlight_text"] for h in highlights]
+
+
+def test_latest_per_book_is_newest_first(store):
+    store.upsert([
+        hl("old", "2024-01-01"),
+        hl("new", "2024-02-01"),
+        hl("emma", "2024-01-15", book="Emma"),
+    ])
+
+    assert texts(store.latest_per_book()) == ["new", "emma"]
+
+
+def test_same_day_tie_goes_to_the_later_fetch(store):
+    store.upsert([hl("old", "2024-01-01", fetched="2024-01-01T08:00:00Z")])
+    store.upsert([hl("new", "2024-01-01", fetched="2024-01-02T08:00:00Z")])
+
+    assert texts(store.latest_per_book()) == ["new"]
+    assert texts(store.highlights_by_book()["Dune"]) == ["new", "old"]
+
+
+def test_full_tie_goes_to_the_row_stored_last(store):
+    store.upsert([hl("first", "2024-01-01")])
+    store.upsert([hl("second", "2024-01-01")])
+
+    assert texts(store.latest_per_book()) == ["second"]
+    assert texts(store.highlights_by_book()["Dune"]) == ["second", "first"]
+    assert texts(store.iter_highlights()) == ["second", "first"]
+
+
+def test_rescraping_changes_nothing_but_fills_in_times(store):
+    assert store.upsert([hl("text", None)]) == 1
+    assert store.upsert([hl("text", None)]) == 0
+    assert store.upsert_changed([hl("text", "2024-01-01")]) == [hl("text", "2024-01-01")]
+
+    assert store.count() == 1
+    assert store.latest_per_book()[0]["highlight_time"] == "2024-01-01"
+
+
+def test_export_latest(store, tmp_path):
+    store.upsert([hl("text", "2024-01-01")])
+
+    output = store.export_latest(tmp_path / "latest.json")
+
+    assert texts(output["items"]) == ["text"]
+    assert (tmp_path / "latest.json").exists()
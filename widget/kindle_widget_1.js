@@ -4,12 +4,26 @@
 const GIST_RAW_URL = 'https://gist.githubusercontent.com/langlois33682/aeb0a9e901f55d999c46397e2213ef58/raw/latest.json';
 const HIGHLIGHT_INDEX = 0; // First (most recent)
 
-async function fetchHighlights() {
-    const req = new Request(GIST_RAW_URL + '?t=' + Date.now());
+async function loadJSON(url) {
+    const req = new Request(url + '?t=' + Date.now());
     try { return await req.loadJSON(); } 
     catch { return null; }
 }
 
+// Accepts latest.json, or the sharded index.json manifest, in which case
+// only the small index and one book's shard are downloaded.
+async function fetchHighlight(index) {
+    if (!GIST_RAW_URL.endsWith('index.json')) {
+        const data = await loadJSON(GIST_RAW_URL);
+        return data?.items?.[index];
+    }
+    const manifest = await loadJSON(GIST_RAW_URL);
+    const entry = manifest?.books?.[index];
+    if (!entry) return null;
+    const shard = await loadJSON(GIST_RAW_URL.replace(/index\.json$/, entry.shard));
+    return shard?.items?.[0];
+}
+
 function truncate(text, max) {
     if (!text) return '';
     return text.length <= max ? text : text.substring(0, max - 3).trim() + '...';
@@ -24,8 +38,7 @@ function timeAgo(iso) {
 }
 
 async function main() {
-    const data = await fetchHighlights();
-    const item = data?.items?.[HIGHLIGHT_INDEX];
+    const item = await fetchHighlight(HIGHLIGHT_INDEX);
     
     // When tapped (not in widget mode), copy to clipboard
     if (!config.runsInWidget && item) {
@@ -7,6 +7,7 @@
 
 const GIST_RAW_URL = 'YOUR_GIST_RAW_URL_HERE';
 // Example: 'https://gist.githubusercontent.com/USERNAME/GIST_ID/raw/latest.json'
+// With --shards uploads, '.../raw/index.json' downloads only the newest book.
 
 const VIEWER_URL = 'YOUR_GITHUB_PAGES_URL_HERE';
 // Example: 'https://USERNAME.github.io/REPO_NAME/viewer/'
@@ -15,9 +16,8 @@ const VIEWER_URL = 'YOUR_GITHUB_PAGES_URL_HERE';
 // WIDGET CODE - No need to edit below
 // ============================================
 
-async function fetchHighlights() {
-    const url = GIST_RAW_URL + '?t=' + Date.now();
-    const req = new Request(url);
+async function loadJSON(url) {
+    const req = new Request(url + '?t=' + Date.now());
     req.headers = { 'Cache-Control': 'no-cache' };
     
     try {
@@ -29,6 +29,24 @@ async function fetchHighlights() {
     }
 }
 
+// GIST_RAW_URL may point at latest.json or at the sharded index.json
+// manifest. With the manifest only the index and the newest book's shard
+// are downloaded, instead of the whole history.
+async function fetchHighlights() {
+    if (!GIST_RAW_URL.endsWith('index.json')) {
+        return await loadJSON(GIST_RAW_URL);
+    }
+    
+    const manifest = await loadJSON(GIST_RAW_URL);
+    const entry = manifest?.books?.[0];
+    if (!entry) return null;
+    
+    const shard = await loadJSON(GIST_RAW_URL.replace(/index\.json$/, entry.shard));
+    if (!shard?.items?.length) return null;
+    
+    return { updated_at: manifest.updated_at, items: [shard.items[0]] };
+}
+
 function formatRelativeTime(isoString) {
     if (!isoString) return '';
     